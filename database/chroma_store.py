@@ -2,6 +2,10 @@ import chromadb
 from langchain_ollama import OllamaEmbeddings
 from chromadb.utils.embedding_functions import EmbeddingFunction
 
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
 
 class LangchainEmbeddingFunction(EmbeddingFunction):
     """
@@ -87,7 +91,7 @@ def store_data(data_chunks, config):
                 ids=ids[i:end]
             )
 
-        print(f"✅ Processed file_id {file_id}: deleted existing chunks and stored {len(file_chunks)} new chunks")
+        logger.info("✅ Processed file_id %s: deleted existing chunks and stored %s new chunks", file_id, len(file_chunks))
 
     # Handle chunks without file_id
     no_file_chunks = [chunk for chunk in data_chunks if "file_id" not in chunk["metadata"]]
@@ -109,7 +113,7 @@ def store_data(data_chunks, config):
                 ids=ids[i:end]
             )
 
-        print(f"✅ Stored {len(no_file_chunks)} data chunks without file_id in ChromaDB.")
+        logger.info("✅ Stored %s data chunks without file_id in ChromaDB.", len(no_file_chunks))
 
-    print(f"✅ Total: Stored {len(data_chunks)} data chunks in ChromaDB.")
+    logger.info("✅ Total: Stored %s data chunks in ChromaDB.", len(data_chunks))
     return collection
\ No newline at end of file
@@ -1,13 +1,20 @@
 
 
-import glob
 import os
 import re
 import sys
 
+import numpy as np
 import yaml
 import json
+import array
+import collections
 import datetime
+import itertools
+import logging
+import operator
+import pickle
+import tempfile
 import great_expectations as ge
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import multiprocessing
@@ -16,9 +23,24 @@ import multiprocessing
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Now import modules using absolute imports
-from parsers.docx_data_parser import extract_insert_statements, inserts_to_dataframe, organize_by_schema
-from utils.data_retriver import get_common_tables
+from parsers.docx_data_parser import (
+    extract_dataframes, extract_insert_statements, inserts_to_dataframe, merge_dataframes,
+    organize_by_schema, should_parse_in_pieces, table_content_digests
+)
+from parsers.file_formats import file_type, is_supported_file
+from parsers.parse_cache import configure_parse_cache
+from utils.comparison_plan import comparison_rules, compile_plan, difference_masks, rows_frame
+from utils.data_retriver import get_common_tables, text_batch_fingerprint
+from utils.external_sort import iter_run, merge_runs, spill_sorted_runs
+from utils.hash_partition import partition_records, repartition
+from utils.key_discovery import configure_key_cache, find_key, row_chunks, schema_fingerprint
+from utils.merkle import build_levels, differing_leaves, repeated_values
+from utils.sampling import DEFAULT_CONFIDENCE, prune_bottom_k, sample_point, wilson_interval
+from utils.run_manifest import (
+    cached_result, entry_key, fingerprint, load_manifest, manifest_dir, save_manifest, store_result
+)
 from utils.chunk_utils import chunk_data
+from utils.log_utils import configure_logging, get_logger
 from database.chroma_store import store_data
 from validators.data_comparator import generate_data_comparison_report
 from validators.ge_validator import compare_data_with_ge
@@ -26,29 +48,31 @@ from langchain_ollama import OllamaLLM
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
+logger = get_logger(__name__)
+
 
 # Helper function to extract inserts from a single file (for parallel processing)
-def process_single_file(file_path):
+def process_single_file(file_path, infer_types=True):
     try:
-        print(f"📄 Processing file: {file_path}")
-        file_extension = file_path.lower().split('.')[-1]
-        print(f"  File type: {file_extension}")
+        logger.info("📄 Processing file: %s", file_path)
+        file_extension = file_type(file_path)
+        logger.info("  File type: %s", file_extension)
 
-        from parsers.docx_data_parser import extract_insert_statements
-        results = extract_insert_statements(file_path)
+        # Build DataFrames batch by batch so the worker never holds every parsed row
+        from parsers.docx_data_parser import extract_dataframes
+        results = extract_dataframes(file_path, infer_types=infer_types)
 
-        print(f"  Extracted {len(results)} INSERT statements")
-        if results and len(results) > 0:
-            # Show sample of first result for debugging
-            first = results[0]
-            print(f"  Sample - Table: {first.get('table_name')}, Columns: {first.get('columns', [])[:3]}...")
+        logger.info("  Extracted %s rows from %s tables", sum(len(df) for df in results.values()), len(results))
+        for key, df in list(results.items())[:1]:
+            # Show sample of first table for debugging
+            logger.info("  Sample - Table: %s, Columns: %s...", key, list(df.columns)[:3])
 
         return results
     except Exception as e:
-        print(f"❌ Error processing file {file_path}: {e}")
+        logger.error("❌ Error processing file %s: %s", file_path, e)
         import traceback
         traceback.print_exc()
-        return []
+        return {}
 
 
 # Helper function for parallel Great Expectations validation
@@ -62,7 +86,7 @@ def validate_table_with_ge(args):
             "results": [r.to_json_dict() for r in result.results]
         }
     except Exception as e:
-        print(f"⚠️ Error in GE validation for table {table}: {e}")
+        logger.warning("⚠️ Error in GE validation for table %s: %s", table, e)
         return table, {"error": str(e)}
 
 
@@ -71,7 +95,7 @@ def generate_html_report(data_comparison):
     """
     Generate an HTML report from the data comparison results
     """
-    print("\nGenerating HTML report...")
+    logger.info("\nGenerating HTML report...")
     # Extract report ID from meta data
     report_id = data_comparison.get("meta", {}).get("report_id",
                                                     datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
@@ -764,22 +788,39 @@ def generate_html_report(data_comparison):
         report_path = os.path.join("validation_reports", f"validation_report_{report_id}.html")
         with open(report_path, "w") as f:
             f.write(html)
-        print(f"✅ HTML report saved to {report_path}")
+        logger.info("✅ HTML report saved to %s", report_path)
         return report_path, report_id
     except Exception as e:
-        print(f"❌ Error saving HTML report: {e}")
+        logger.error("❌ Error saving HTML report: %s", e)
         # Try alternative path
         try:
             alt_path = f"validation_report_{report_id}.html"
             with open(alt_path, "w") as f:
                 f.write(html)
-            print(f"✅ HTML report saved to alternative path: {alt_path}")
+            logger.info("✅ HTML report saved to alternative path: %s", alt_path)
             return alt_path, report_id
         except Exception as e2:
-            print(f"❌ Error saving to alternate path: {e2}")
+            logger.error("❌ Error saving to alternate path: %s", e2)
             return None, None
 
 
+def find_supported_files(directory):
+    """
+    Find every supported data file under a directory and its subdirectories,
+    including compressed SQL and text dumps
+
+    Args:
+        directory: Directory to search
+
+    Returns:
+        list: Sorted paths of the supported files
+    """
+    supported_files = []
+    for root, _, names in os.walk(directory):
+        supported_files.extend(os.path.join(root, name) for name in names if is_supported_file(name))
+    return sorted(supported_files)
+
+
 def get_common_table_list(schema1, schema2, config):
     """
     Get list of common tables between schemas by discovering tables in all supported files.
@@ -809,69 +850,55 @@ def get_common_table_list(schema1, schema2, config):
                 data_dir = os.path.join(project_dir, data_dir[2:])
             schema2_dir = os.path.join(data_dir, schema2)
 
-        print(f"Looking for files in: {schema1_dir} and {schema2_dir}")
+        logger.info("Looking for files in: %s and %s", schema1_dir, schema2_dir)
 
         # Import parser
-        from parsers.docx_data_parser import extract_insert_statements
+        from parsers.docx_data_parser import list_tables
 
         # Find tables in schema1
         schema1_tables = set()
         if os.path.exists(schema1_dir) and os.path.isdir(schema1_dir):
-            # Find all supported files in schema directory - UPDATED TO INCLUDE SQL AND TXT
-            supported_files = []
-            for ext in ['docx', 'sql', 'txt']:
-                supported_files.extend(glob.glob(os.path.join(schema1_dir, f"**/*.{ext}"), recursive=True))
+            # Find all supported files in schema directory, including compressed dumps
+            supported_files = find_supported_files(schema1_dir)
 
-            print(f"Found {len(supported_files)} supported files in {schema1_dir}")
+            logger.info("Found %s supported files in %s", len(supported_files), schema1_dir)
 
             for file_path in supported_files:
                 try:
-                    print(f"Processing {file_path}")
-                    inserts = extract_insert_statements(file_path)
-                    for insert in inserts:
-                        # Extract table name from the dictionary
-                        table_name = insert.get("table_name")
-                        if table_name:
-                            schema1_tables.add(table_name)
+                    logger.info("Processing %s", file_path)
+                    schema1_tables.update(list_tables(file_path))
                 except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
+                    logger.error("Error processing file %s: %s", file_path, e)
 
         # Find tables in schema2
         schema2_tables = set()
         if os.path.exists(schema2_dir) and os.path.isdir(schema2_dir):
-            # Find all supported files in schema directory - UPDATED TO INCLUDE SQL AND TXT
-            supported_files = []
-            for ext in ['docx', 'sql', 'txt']:
-                supported_files.extend(glob.glob(os.path.join(schema2_dir, f"**/*.{ext}"), recursive=True))
+            # Find all supported files in schema directory, including compressed dumps
+            supported_files = find_supported_files(schema2_dir)
 
-            print(f"Found {len(supported_files)} supported files in {schema2_dir}")
+            logger.info("Found %s supported files in %s", len(supported_files), schema2_dir)
 
             for file_path in supported_files:
                 try:
-                    print(f"Processing {file_path}")
-                    inserts = extract_insert_statements(file_path)
-                    for insert in inserts:
-                        # Extract table name from the dictionary
-                        table_name = insert.get("table_name")
-                        if table_name:
-                            schema2_tables.add(table_name)
+                    logger.info("Processing %s", file_path)
+                    schema2_tables.update(list_tables(file_path))
                 except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
+                    logger.error("Error processing file %s: %s", file_path, e)
 
-        print(f"Tables found in {schema1}: {schema1_tables}")
-        print(f"Tables found in {schema2}: {schema2_tables}")
+        logger.info("Tables found in %s: %s", schema1, schema1_tables)
+        logger.info("Tables found in %s: %s", schema2, schema2_tables)
 
         # Find common tables
         common_tables = schema1_tables.intersection(schema2_tables)
 
         if common_tables:
-            print(f"✅ Discovered {len(common_tables)} common tables: {common_tables}")
+            logger.info("✅ Discovered %s common tables: %s", len(common_tables), common_tables)
             return list(common_tables)
         else:
-            print(f"⚠️ No common tables found between {schema1} and {schema2}")
+            logger.warning("⚠️ No common tables found between %s and %s", schema1, schema2)
             return []  # Return empty list instead of defaults
     except Exception as e:
-        print(f"⚠️ Error discovering common tables: {e}")
+        logger.warning("⚠️ Error discovering common tables: %s", e)
         import traceback
         traceback.print_exc()
         return [] # Return empty list on error
@@ -906,355 +933,1002 @@ def get_schema_only_tables(schema1, schema2, config):
                 data_dir = os.path.join(project_dir, data_dir[2:])
             schema2_dir = os.path.join(data_dir, schema2)
 
-        print(f"Looking for schema1 ({schema1}) files in: {schema1_dir}")
-        print(f"Looking for schema2 ({schema2}) files in: {schema2_dir}")
+        logger.info("Looking for schema1 (%s) files in: %s", schema1, schema1_dir)
+        logger.info("Looking for schema2 (%s) files in: %s", schema2, schema2_dir)
 
         # Import parser
-        from parsers.docx_data_parser import extract_insert_statements
+        from parsers.docx_data_parser import list_tables
 
         # Find tables in schema1
         schema1_tables = set()
         if os.path.exists(schema1_dir) and os.path.isdir(schema1_dir):
-            # Find all supported files in schema directory - UPDATED TO INCLUDE SQL AND TXT
-            supported_files = []
-            for ext in ['docx', 'sql', 'txt']:
-                supported_files.extend(glob.glob(os.path.join(schema1_dir, f"**/*.{ext}"), recursive=True))
+            # Find all supported files in schema directory, including compressed dumps
+            supported_files = find_supported_files(schema1_dir)
 
-            print(f"Found {len(supported_files)} supported files in {schema1_dir}")
+            logger.info("Found %s supported files in %s", len(supported_files), schema1_dir)
 
             for file_path in supported_files:
                 try:
-                    inserts = extract_insert_statements(file_path)
-                    for insert in inserts:
-                        # Extract table name from the dictionary
-                        table_name = insert.get("table_name")
-                        if table_name:
-                            schema1_tables.add(table_name)
+                    schema1_tables.update(list_tables(file_path))
                 except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
+                    logger.error("Error processing file %s: %s", file_path, e)
 
         # Find tables in schema2
         schema2_tables = set()
         if os.path.exists(schema2_dir) and os.path.isdir(schema2_dir):
-            # Find all supported files in schema directory - UPDATED TO INCLUDE SQL AND TXT
-            supported_files = []
-            for ext in ['docx', 'sql', 'txt']:
-                supported_files.extend(glob.glob(os.path.join(schema2_dir, f"**/*.{ext}"), recursive=True))
+            # Find all supported files in schema directory, including compressed dumps
+            supported_files = find_supported_files(schema2_dir)
 
-            print(f"Found {len(supported_files)} supported files in {schema2_dir}")
+            logger.info("Found %s supported files in %s", len(supported_files), schema2_dir)
 
             for file_path in supported_files:
                 try:
-                    inserts = extract_insert_statements(file_path)
-                    for insert in inserts:
-                        # Extract table name from the dictionary
-                        table_name = insert.get("table_name")
-                        if table_name:
-                            schema2_tables.add(table_name)
+                    schema2_tables.update(list_tables(file_path))
                 except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
+                    logger.error("Error processing file %s: %s", file_path, e)
 
-        print(f"Tables found in {schema1}: {schema1_tables}")
-        print(f"Tables found in {schema2}: {schema2_tables}")
+        logger.info("Tables found in %s: %s", schema1, schema1_tables)
+        logger.info("Tables found in %s: %s", schema2, schema2_tables)
 
         # Find tables only in schema1
         only_in_schema1 = schema1_tables - schema2_tables
 
         if only_in_schema1:
-            print(f"✅ Discovered {len(only_in_schema1)} tables only in {schema1}: {only_in_schema1}")
+            logger.info("✅ Discovered %s tables only in %s: %s", len(only_in_schema1), schema1, only_in_schema1)
             return list(only_in_schema1)
         else:
-            print(f"No tables found exclusively in {schema1}")
+            logger.info("No tables found exclusively in %s", schema1)
             return []
     except Exception as e:
-        print(f"⚠️ Error discovering schema-only tables: {e}")
+        logger.warning("⚠️ Error discovering schema-only tables: %s", e)
         import traceback
         traceback.print_exc()
         return []
 
 
-def compare_table_in_chunks(schema1, schema2, table, chunk_size=1000, config=None):
+# Fields that identify the entity rather than the row; they differ between
+# source and destination by design, so they are never compared
+ENTITY_ID_FIELDS = ['employee_id', 'contractor_id']
+
+# Times an oversized hash partition is split again, and the most partitions
+# it is split into at once
+HASH_PARTITION_MAX_DEPTH = 3
+HASH_PARTITION_MAX_FAN_OUT = 64
+
+# Under a comparison plan, row pairs are compared this many at a time, and
+# the plan is compiled from up to this many leading rows of each side
+PLAN_BATCH_ROWS = 2048
+PLAN_SAMPLE_ROWS = 1000
+
+# Row digests are computed this many rows at a time and summed per checksum
+# leaf modulo 2**64
+DIGEST_BATCH_ROWS = 2048
+_DIGEST_MASK = (1 << 64) - 1
+
+# Bumped when a table comparison can come out differently for the same input,
+# so results stored by earlier runs are computed again
+COMPARISON_VERSION = "1"
+
+
+def _iter_column_batches(file_paths, table, chunk_size, side):
     """
-    Compare data between two schemas for a single table, processing in chunks
-    to minimize memory usage.
+    Stream a table's INSERT data from uploaded files as (columns, column
+    values) pairs, parsing at most chunk_size rows at a time
     """
-    print(f"\nComparing data for table {table} in chunks of {chunk_size} rows...")
+    from parsers.docx_data_parser import iter_table_batches
 
-    # Initialize counters with minimal memory footprint
-    rows_in_source = 0
-    rows_in_destination = 0
-    matching_rows = 0
-    different_rows = 0
-    missing_rows = 0
-    extra_rows = 0
+    for file_path in file_paths:
+        logger.info("Trying file: %s", file_path)
+        row_count = 0
+        try:
+            # Parse only this table's statements, located through the dump index
+            for batch in iter_table_batches(file_path, table, chunk_size):
+                for insert_dict in batch:
+                    # Each insert_dict holds one list of values per column
+                    column_values = insert_dict["column_values"]
+                    row_count += len(column_values[0]) if column_values else 0
+                    yield insert_dict.get("columns", []), column_values
+            logger.info("Extracted %s rows for table %s from %s", row_count, table, side)
+        except Exception as e:
+            logger.error("Error loading from %s file %s: %s", side, file_path, e)
+            import traceback
+            traceback.print_exc()
 
-    # Track differences (keep only a limited number for reporting to save memory)
-    max_differences_to_track = min(100, config.get("max_differences", 100)) if config else 100
-    different_rows_details = []
-    missing_rows_details = []
-    extra_rows_details = []
-    matching_rows_details = []
 
-    # Get actual data from the config's loaded data
-    source_data = []
-    dest_data = []
+def _rows_from_batches(column_batches, key_filter=None):
+    """
+    Turn (columns, column values) batches into row dicts
 
-    try:
-        # Import required modules
-        from parsers.docx_data_parser import extract_insert_statements
+    key_filter is an optional (key fields, predicate on the stripped key text)
+    pair; rows failing it, or without the key fields, are skipped before their
+    dicts are built.
+    """
+    for columns, column_values in column_batches:
+        rows = zip(*column_values)
+        if key_filter is not None:
+            key_fields, keep = key_filter
+            if not all(field in columns for field in key_fields):
+                continue
+            key_indexes = [columns.index(field) for field in key_fields]
+            rows = (values for values in rows if keep(_key_text([values[i] for i in key_indexes])))
+        for values in rows:
+            yield dict(zip(columns, values))
+
+
+def _iter_table_rows(file_paths, table, chunk_size, side, key_filter=None):
+    """
+    Stream the rows of a table from uploaded files as dicts, parsing at most
+    chunk_size rows at a time; key_filter is as in _rows_from_batches
+    """
+    yield from _rows_from_batches(_iter_column_batches(file_paths, table, chunk_size, side), key_filter)
 
-        # If uploaded files are available in config, use them directly
-        if config.get('source_files'):
-            print("Loading from uploaded source files...")
-            for file_path in config['source_files']:
-                print(f"Trying file: {file_path}")
-                try:
-                    # Extract all INSERT statements from the file
-                    all_inserts = extract_insert_statements(file_path)
-                    print(f"Found {len(all_inserts)} total INSERT statements")
-
-                    # Filter inserts for this specific table
-                    for insert_dict in all_inserts:
-                        if insert_dict.get("table_name") == table:
-                            # Each insert_dict contains one row
-                            columns = insert_dict.get("columns", [])
-                            values = insert_dict.get("values", [])
-
-                            # Convert to dictionary with column names as keys
-                            if len(values) == len(columns):
-                                row_dict = {}
-                                for i, col_name in enumerate(columns):
-                                    row_dict[col_name] = values[i]
-                                source_data.append(row_dict)
-
-                    print(f"Extracted {len(source_data)} rows for table {table} from source")
-                    if source_data:
-                        print(f"First row: {source_data[0]}")
 
-                except Exception as e:
-                    print(f"Error loading from source file {file_path}: {e}")
-                    import traceback
-                    traceback.print_exc()
+def _spilled(column_batches, path):
+    """Pass column batches through, writing each to path for reading back with iter_run"""
+    with open(path, "wb") as f:
+        for batch in column_batches:
+            pickle.dump([batch], f, protocol=pickle.HIGHEST_PROTOCOL)
+            yield batch
 
-        if config.get('dest_files'):
-            print("Loading from uploaded destination files...")
-            for file_path in config['dest_files']:
-                print(f"Trying file: {file_path}")
-                try:
-                    # Extract all INSERT statements from the file
-                    all_inserts = extract_insert_statements(file_path)
-                    print(f"Found {len(all_inserts)} total INSERT statements")
-
-                    # Filter inserts for this specific table
-                    for insert_dict in all_inserts:
-                        if insert_dict.get("table_name") == table:
-                            # Each insert_dict contains one row
-                            columns = insert_dict.get("columns", [])
-                            values = insert_dict.get("values", [])
-
-                            # Convert to dictionary with column names as keys
-                            if len(values) == len(columns):
-                                row_dict = {}
-                                for i, col_name in enumerate(columns):
-                                    row_dict[col_name] = values[i]
-                                dest_data.append(row_dict)
-
-                    print(f"Extracted {len(dest_data)} rows for table {table} from destination")
-                    if dest_data:
-                        print(f"First row: {dest_data[0]}")
 
-                except Exception as e:
-                    print(f"Error loading from dest file {file_path}: {e}")
-                    import traceback
-                    traceback.print_exc()
+def _key_text(values):
+    """Stripped text of key values; a tuple of texts for a composite key"""
+    if len(values) == 1:
+        return str(values[0]).strip()
+    return tuple(str(value).strip() for value in values)
 
-    except Exception as e:
-        print(f"Error loading data for table {table}: {e}")
-        import traceback
-        traceback.print_exc()
-        # Use empty lists as fallback
-        source_data = []
-        dest_data = []
 
-    # Get the actual counts
-    source_total = len(source_data)
-    dest_total = len(dest_data)
+def _keyed_rows(rows, key_fields, counter):
+    """
+    Pair rows with their normalized key and position for sorting, counting
+    every row; rows without the key fields can't be compared and are dropped
+    """
+    for position, row in enumerate(rows):
+        counter[0] += 1
+        if key_fields and all(field in row for field in key_fields):
+            # Keep values exactly as they are; the key is compared as stripped text
+            yield _key_text([row[field] for field in key_fields]), position, row
+
+
+def _discover_key_fields(table, columns, file_paths, chunk_size, primary_key):
+    """
+    Find the source columns, starting with primary_key, whose stripped text
+    identifies every row: primary_key alone when it does, otherwise it
+    together with up to two more columns. The source files are read once
+    unless the table layout's key is cached.
+    """
+    def text_rows():
+        for row in _iter_table_rows(file_paths, table, chunk_size, "source"):
+            yield {field: str(value).strip() if value is not None else None for field, value in row.items()}
+
+    key = find_key(schema_fingerprint(table, columns), row_chunks(text_rows(), chunk_size),
+                   required=[primary_key])
+    return list(key) if key else None
+
 
-    print(f"Processing table with {source_total} source rows and {dest_total} destination rows")
+def _clean_row(row, skip_fields=()):
+    return {field: str(value).strip() if value is not None else None
+            for field, value in row.items() if field not in skip_fields}
 
-    # Process source data first to build index
-    print("Building source data index...")
-    source_index = {}  # Dict mapping primary key to row data
-    source_keys = set()
 
-    # Identify the primary key field dynamically
+def _row_differences(source_row, dest_row, debug, fields=None):
+    """
+    Fields whose stripped text differs between two rows, skipping entity ID
+    fields; only the given fields are compared when fields is not None
+    """
+    row_differences = {}
+    for field in fields if fields is not None else set(source_row.keys()).union(dest_row.keys()):
+        if field in ENTITY_ID_FIELDS:
+            continue
+
+        # Normalize values - strip whitespace and convert to string
+        source_val = source_row.get(field)
+        dest_val = dest_row.get(field)
+        source_str = str(source_val).strip() if source_val is not None else None
+        dest_str = str(dest_val).strip() if dest_val is not None else None
+
+        # Debug output for name fields
+        if debug and field == 'name' and source_str and dest_str:
+            logger.debug("Comparing %s: '%s' vs '%s' (equal: %s)",
+                         field, source_str, dest_str, source_str == dest_str)
+
+        if source_str != dest_str:
+            row_differences[field] = {
+                "source": source_str,
+                "destination": dest_str
+            }
+    return row_differences
+
+
+def _new_tally():
+    """Row counts and capped detail samples for one comparison"""
+    return {
+        "matching_rows": 0,
+        "different_rows": 0,
+        "missing_rows": 0,
+        "extra_rows": 0,
+        "duplicate_keys": 0,
+        "duplicate_source_rows": 0,
+        "duplicate_destination_rows": 0,
+        "details": {"matching_rows": [], "different_rows": [], "missing_rows": [], "extra_rows": [],
+                    "duplicate_keys": []}
+    }
+
+
+def _merge_tally(tally, other, max_details):
+    for kind, count in other.items():
+        if kind != "details":
+            tally[kind] += count
+    for kind, details in other["details"].items():
+        tally["details"][kind].extend(details[:max_details - len(tally["details"][kind])])
+
+
+def _compare_key_rows(key_value, source_row, dest_rows, tally, max_details, debug, fields=None, plan=None):
+    """
+    Tally the destination rows sharing one key against the source row for it
+
+    source_row is None when the key is only in the destination (every row is
+    extra); an empty dest_rows means the key is only in the source (missing).
+    fields limits the compared fields, as in _row_differences. Under a
+    comparison plan, pairs of rows are queued and compared in batches by
+    _compare_pending.
+    """
+    details = tally["details"]
+    if not dest_rows:
+        tally["missing_rows"] += 1
+        if len(details["missing_rows"]) < max_details:
+            details["missing_rows"].append(_clean_row(source_row))
+        return
+
+    for row in dest_rows:
+        if source_row is None:
+            # Row exists only in destination (extra)
+            tally["extra_rows"] += 1
+            if len(details["extra_rows"]) < max_details:
+                details["extra_rows"].append(_clean_row(row))
+            continue
+
+        if debug:
+            logger.debug("Comparing row %s: source %s, destination %s", key_value, source_row, row)
+
+        if plan is not None:
+            pending = tally.setdefault("pending", [])
+            pending.append((source_row, row))
+            if len(pending) >= PLAN_BATCH_ROWS:
+                _compare_pending(tally, plan, max_details, fields)
+            continue
+
+        row_differences = _row_differences(source_row, row, debug, fields)
+        if row_differences:
+            tally["different_rows"] += 1
+            if len(details["different_rows"]) < max_details:
+                details["different_rows"].append({
+                    "source_row": _clean_row(source_row),
+                    "destination_row": _clean_row(row),
+                    "differences": row_differences
+                })
+        else:
+            tally["matching_rows"] += 1
+            if len(details["matching_rows"]) < max_details:
+                # Store matching row, without the entity-specific ID fields
+                details["matching_rows"].append(_clean_row(source_row, ENTITY_ID_FIELDS))
+
+
+def _compare_pending(tally, plan, max_details, fields=None):
+    """
+    Compare the row pairs queued by _compare_key_rows under a comparison
+    plan, column by column, and tally them in queue order
+
+    Entity ID fields are skipped, and only the given fields are compared
+    when fields is not None. Differences are reported as stripped text.
+    """
+    pending = tally.pop("pending", None)
+    if not pending:
+        return
+    source_rows = [source_row for source_row, _ in pending]
+    dest_rows = [dest_row for _, dest_row in pending]
+    if fields is None:
+        fields = dict.fromkeys(itertools.chain(*source_rows, *dest_rows))
+    fields = [field for field in fields if field not in ENTITY_ID_FIELDS]
+    masks = difference_masks(plan, rows_frame(source_rows, fields), rows_frame(dest_rows, fields), fields)
+    differs = np.zeros(len(pending), dtype=bool)
+    for mask in masks.values():
+        differs |= mask
+
+    different = np.flatnonzero(differs)
+    tally["different_rows"] += len(different)
+    tally["matching_rows"] += len(pending) - len(different)
+    details = tally["details"]
+    for i in different[:max(0, max_details - len(details["different_rows"]))]:
+        source_row, dest_row = pending[i]
+        source_clean, dest_clean = _clean_row(source_row), _clean_row(dest_row)
+        details["different_rows"].append({
+            "source_row": source_clean,
+            "destination_row": dest_clean,
+            "differences": {
+                field: {"source": source_clean.get(field), "destination": dest_clean.get(field)}
+                for field in fields if masks[field][i]
+            }
+        })
+    for i in np.flatnonzero(~differs)[:max(0, max_details - len(details["matching_rows"]))]:
+        # Store matching row, without the entity-specific ID fields
+        details["matching_rows"].append(_clean_row(pending[i][0], ENTITY_ID_FIELDS))
+
+
+def _compare_key_multiset(key_value, source_rows, dest_rows, tally, max_details, debug, fields=None, plan=None):
+    """
+    Tally all rows sharing one key, compared as multisets of rows
+
+    Equal rows pair up first, by row digest; the remaining rows of both sides
+    then pair up in order and are compared field by field, and any surplus
+    is missing (source) or extra (destination). A key held by more than one
+    row on either side is reported as a duplicate key.
+    """
+    if len(source_rows) > 1 or len(dest_rows) > 1:
+        tally["duplicate_keys"] += 1
+        tally["duplicate_source_rows"] += max(len(source_rows) - 1, 0)
+        tally["duplicate_destination_rows"] += max(len(dest_rows) - 1, 0)
+        if len(tally["details"]["duplicate_keys"]) < max_details:
+            tally["details"]["duplicate_keys"].append({
+                "key": key_value,
+                "source_rows": len(source_rows),
+                "destination_rows": len(dest_rows)
+            })
+
+    # A single row on each side pairs up whether or not it is equal, so
+    # digests are only needed when a key repeats
+    digests = []
+    if source_rows and dest_rows and (len(source_rows) > 1 or len(dest_rows) > 1):
+        digests = _row_digests([key_value] * (len(source_rows) + len(dest_rows)), source_rows + dest_rows)
+    unpaired = {}
+    for position, digest in enumerate(digests[:len(source_rows)]):
+        unpaired.setdefault(digest, collections.deque()).append(position)
+    paired = [False] * len(source_rows)
+    rest_dest = []
+    for position, row in enumerate(dest_rows):
+        same = unpaired.get(digests[len(source_rows) + position]) if digests else None
+        if same:
+            position = same.popleft()
+            paired[position] = True
+            _compare_key_rows(key_value, source_rows[position], [row], tally, max_details, debug, fields, plan)
+        else:
+            rest_dest.append(row)
+
+    rest_source = [row for position, row in enumerate(source_rows) if not paired[position]]
+    for source_row, dest_row in zip(rest_source, rest_dest):
+        _compare_key_rows(key_value, source_row, [dest_row], tally, max_details, debug, fields, plan)
+    for source_row in rest_source[len(rest_dest):]:
+        _compare_key_rows(key_value, source_row, [], tally, max_details, debug, fields, plan)
+    if rest_dest[len(rest_source):]:
+        _compare_key_rows(key_value, None, rest_dest[len(rest_source):], tally, max_details, debug, fields,
+                          plan)
+
+
+def _compare_key_group(key_value, source_rows, dest_rows, tally, max_details, debug, fields=None, multiset=False,
+                       plan=None):
+    """
+    Tally the rows of one key, given as iterables for each side: as
+    multisets, or else every destination row against the last source row
+    """
+    if multiset:
+        _compare_key_multiset(key_value, list(source_rows), list(dest_rows), tally, max_details, debug, fields,
+                              plan)
+        return
+    source_row = None
+    for source_row in source_rows:
+        pass
+    _compare_key_rows(key_value, source_row, list(dest_rows), tally, max_details, debug, fields, plan)
+
+
+def _detect_primary_key(first_source_row, first_dest_row):
+    """
+    Pick the key column from the first row of each side
+
+    Returns:
+        tuple: (primary key, source entity ID field, destination entity ID field)
+    """
     primary_key = None
     source_id_field = None
     dest_id_field = None
 
-    if source_data and dest_data:
-        # Get the first row from each dataset
-        first_source_row = source_data[0]
-        first_dest_row = dest_data[0]
+    # Find the primary key (looking for table-specific ID like asset_id, payroll_id, etc.)
+    for key in first_source_row.keys():
+        if key.endswith('_id') and key not in ['employee_id', 'contractor_id', 'department_id']:
+            primary_key = key
+            break
 
-        # Find the primary key (looking for table-specific ID like asset_id, payroll_id, etc.)
+    # If no specific table ID found, use the first field that ends with _id
+    if primary_key is None:
         for key in first_source_row.keys():
-            if key.endswith('_id') and key not in ['employee_id', 'contractor_id', 'department_id']:
+            if key.endswith('_id'):
                 primary_key = key
                 break
 
-        # If no specific table ID found, use the first field that ends with _id
-        if primary_key is None:
-            for key in first_source_row.keys():
-                if key.endswith('_id'):
-                    primary_key = key
-                    break
-
-        # If still no ID found, check if 'id' column exists
-        if primary_key is None and 'id' in first_source_row and 'id' in first_dest_row:
-            primary_key = 'id'
-
-        # If STILL no ID found, use first column as a fallback
-        if primary_key is None and len(first_source_row) > 0:
-            primary_key = list(first_source_row.keys())[0]
-            print(f"No ID column found, using first column as key: {primary_key}")
-
-        # Check for entity-specific ID fields
-        if 'employee_id' in first_source_row:
-            source_id_field = 'employee_id'
-        if 'contractor_id' in first_dest_row:
-            dest_id_field = 'contractor_id'
-
-        print(f"Using primary key: {primary_key}")
-        print(f"Source ID field: {source_id_field}")
-        print(f"Destination ID field: {dest_id_field}")
-
-    # Index source data - keep values exactly as they are
-    for row in source_data:
-        if primary_key and primary_key in row:
-            key_value = str(row[primary_key]).strip()  # Convert to string and strip whitespace
-            source_index[key_value] = row
-            source_keys.add(key_value)
-
-    rows_in_source = len(source_data)
-
-    # Now process destination data and compare
-    print("Processing destination data and comparing...")
+    # If still no ID found, check if 'id' column exists
+    if primary_key is None and 'id' in first_source_row and 'id' in first_dest_row:
+        primary_key = 'id'
+
+    # If STILL no ID found, use first column as a fallback
+    if primary_key is None and len(first_source_row) > 0:
+        primary_key = list(first_source_row.keys())[0]
+        logger.info("No ID column found, using first column as key: %s", primary_key)
+
+    # Check for entity-specific ID fields
+    if 'employee_id' in first_source_row:
+        source_id_field = 'employee_id'
+    if 'contractor_id' in first_dest_row:
+        dest_id_field = 'contractor_id'
+
+    return primary_key, source_id_field, dest_id_field
+
+
+def _sort_merge_compare(source_records, dest_records, chunk_size, spill_dir, max_details, debug, fields=None,
+                        multiset=False, plan=None):
+    """
+    Compare keyed rows by spilling each side to sorted runs and merge-joining
+    the two key-ordered streams
+    """
+    tally = _new_tally()
+
+    # Runs are sorted by (key, position), which keeps rows sharing a key in file order
+    sort_key = operator.itemgetter(0, 1)
+    logger.info("Sorting source rows into runs of %s...", chunk_size)
+    source_runs = spill_sorted_runs(source_records, sort_key, chunk_size, spill_dir)
+    logger.info("Sorting destination rows into runs of %s...", chunk_size)
+    dest_runs = spill_sorted_runs(dest_records, sort_key, chunk_size, spill_dir)
+
+    # Merge-join the two key-ordered streams, one key group at a time
+    logger.info("Merging %s source and %s destination runs and comparing...", len(source_runs), len(dest_runs))
+    source_groups = itertools.groupby(merge_runs(source_runs, sort_key, chunk_size, spill_dir),
+                                      key=operator.itemgetter(0))
+    dest_groups = itertools.groupby(merge_runs(dest_runs, sort_key, chunk_size, spill_dir),
+                                    key=operator.itemgetter(0))
+    source_group = next(source_groups, None)
+    dest_group = next(dest_groups, None)
+
+    rows = operator.itemgetter(2)
+    while source_group is not None or dest_group is not None:
+        if dest_group is None or (source_group is not None and source_group[0] < dest_group[0]):
+            # Key only in source (missing)
+            _compare_key_group(source_group[0], map(rows, source_group[1]), [],
+                               tally, max_details, debug, fields, multiset, plan)
+            source_group = next(source_groups, None)
+        elif source_group is None or dest_group[0] < source_group[0]:
+            # Key only in destination (extra)
+            _compare_key_group(dest_group[0], [], map(rows, dest_group[1]),
+                               tally, max_details, debug, fields, multiset, plan)
+            dest_group = next(dest_groups, None)
+        else:
+            _compare_key_group(source_group[0], map(rows, source_group[1]), map(rows, dest_group[1]),
+                               tally, max_details, debug, fields, multiset, plan)
+            source_group = next(source_groups, None)
+            dest_group = next(dest_groups, None)
+
+    _compare_pending(tally, plan, max_details, fields)
+    return tally
+
+
+def _compare_partition(source_path, dest_path, max_details, debug, fields=None, multiset=False, plan=None):
+    """
+    Compare one pair of hash partitions in memory
+
+    Module level so that it can run on a process pool.
+    """
+    tally = _new_tally()
+
+    if multiset:
+        source_groups = {}
+        for key_value, _, row in iter_run(source_path):
+            source_groups.setdefault(key_value, []).append(row)
+        dest_groups = {}
+        for key_value, _, row in iter_run(dest_path):
+            dest_groups.setdefault(key_value, []).append(row)
+        for key_value, dest_rows in dest_groups.items():
+            _compare_key_multiset(key_value, source_groups.pop(key_value, []), dest_rows,
+                                  tally, max_details, debug, fields, plan)
+        for key_value, source_rows in source_groups.items():
+            _compare_key_multiset(key_value, source_rows, [], tally, max_details, debug, fields, plan)
+        _compare_pending(tally, plan, max_details, fields)
+        return tally
+
+    # The last source row with a key is the one compared
+    source_index = {key_value: row for key_value, _, row in iter_run(source_path)}
     dest_keys = set()
+    for key_value, _, row in iter_run(dest_path):
+        dest_keys.add(key_value)
+        _compare_key_rows(key_value, source_index.get(key_value), [row], tally, max_details, debug, fields, plan)
 
-    for row in dest_data:
-        if primary_key and primary_key in row:
-            key_value = str(row[primary_key]).strip()  # Convert to string and strip whitespace
-            dest_keys.add(key_value)
-
-            if key_value in source_index:
-                # Row exists in both source and destination
-                source_row = source_index[key_value]
-                row_differences = {}
-
-                # Debug for specific tables
-                if table == 'table_17' and primary_key:
-                    print(f"\nDebug - Table 17 comparison:")
-                    print(f"Primary key field: {primary_key}")
-                    print(f"Source row key: {key_value}")
-                    print(f"Source row: {source_row}")
-                    print(f"Dest row: {row}")
-
-                # Get all fields from both rows
-                all_fields = set(source_row.keys()).union(set(row.keys()))
-
-                for field in all_fields:
-                    # Skip entity-specific ID fields since they're expected to be different
-                    if field in ['employee_id', 'contractor_id']:
-                        continue
+    for key_value, source_row in source_index.items():
+        if key_value not in dest_keys:
+            _compare_key_rows(key_value, source_row, [], tally, max_details, debug, fields, plan)
+    _compare_pending(tally, plan, max_details, fields)
+    return tally
 
-                    # Get values from both rows
-                    source_val = source_row.get(field)
-                    dest_val = row.get(field)
 
-                    # Normalize values - strip whitespace and convert to string
-                    source_str = str(source_val).strip() if source_val is not None else None
-                    dest_str = str(dest_val).strip() if dest_val is not None else None
+def _partition_pairs(source_parts, dest_parts, max_rows, spill_dir, depth=0):
+    """
+    Pair up the source and destination partitions, repartitioning pairs with
+    more than max_rows rows on a side into smaller ones
 
-                    # Debug output for name fields
-                    if field == 'name' and source_str and dest_str:
-                        print(f"Debug - Comparing {field}: '{source_str}' vs '{dest_str}'")
-                        print(f"  Equal? {source_str == dest_str}")
+    Returns:
+        list: (source path, destination path) per non-empty partition
+    """
+    key = operator.itemgetter(0)
+    pairs = []
+    for (source_path, source_rows), (dest_path, dest_rows) in zip(source_parts, dest_parts):
+        largest = max(source_rows, dest_rows)
+        if largest == 0:
+            os.remove(source_path)
+            os.remove(dest_path)
+        elif largest <= max_rows:
+            pairs.append((source_path, dest_path))
+        elif depth >= HASH_PARTITION_MAX_DEPTH:
+            # Rows sharing a key can't be split up, so a skewed key stays in one partition
+            logger.warning("⚠️ Partition with %s source and %s destination rows can't be split further",
+                           source_rows, dest_rows)
+            pairs.append((source_path, dest_path))
+        else:
+            partitions = min(HASH_PARTITION_MAX_FAN_OUT, -(-largest // max_rows))
+            pairs.extend(_partition_pairs(
+                repartition(source_path, key, partitions, spill_dir, max_rows, depth + 1),
+                repartition(dest_path, key, partitions, spill_dir, max_rows, depth + 1),
+                max_rows, spill_dir, depth + 1))
+    return pairs
 
-                    # Direct comparison after normalization
-                    if source_str != dest_str:
-                        row_differences[field] = {
-                            "source": source_str,
-                            "destination": dest_str
-                        }
 
-                if row_differences:
-                    different_rows += 1
-                    if len(different_rows_details) < max_differences_to_track:
-                        # Create proper details with both source and destination rows
-                        dest_row_clean = {}
-                        for field, value in row.items():
-                            dest_row_clean[field] = str(value).strip() if value is not None else None
-
-                        source_row_clean = {}
-                        for field, value in source_row.items():
-                            source_row_clean[field] = str(value).strip() if value is not None else None
-
-                        different_rows_details.append({
-                            "source_row": source_row_clean,
-                            "destination_row": dest_row_clean,
-                            "differences": row_differences
-                        })
-                else:
-                    matching_rows += 1
-                    if len(matching_rows_details) < max_differences_to_track:
-                        # Store matching row
-                        matching_row = {}
-                        for field, value in source_row.items():
-                            # Skip entity-specific ID field
-                            if field in ['employee_id', 'contractor_id']:
-                                continue
-                            matching_row[field] = str(value).strip() if value is not None else None
-                        matching_rows_details.append(matching_row)
+def _hash_partition_compare(source_records, dest_records, chunk_size, partitions, spill_dir,
+                            max_details, debug, executor=None, fields=None, multiset=False, plan=None):
+    """
+    Compare keyed rows by hash-partitioning both sides on the key into spill
+    files (grace hash join) and comparing each partition pair in memory,
+    on the executor when one is given
+    """
+    key = operator.itemgetter(0)
+    logger.info("Partitioning source rows into %s partitions...", partitions)
+    source_parts = partition_records(source_records, key, partitions, spill_dir, chunk_size)
+    logger.info("Partitioning destination rows into %s partitions...", partitions)
+    dest_parts = partition_records(dest_records, key, partitions, spill_dir, chunk_size)
+    pairs = _partition_pairs(source_parts, dest_parts, chunk_size, spill_dir)
+
+    logger.info("Comparing %s partition pairs%s...", len(pairs), " in parallel" if executor else "")
+    map_partitions = executor.map if executor is not None else map
+    results = map_partitions(
+        _compare_partition,
+        [source_path for source_path, _ in pairs],
+        [dest_path for _, dest_path in pairs],
+        itertools.repeat(max_details, len(pairs)),
+        itertools.repeat(debug, len(pairs)),
+        itertools.repeat(fields, len(pairs)),
+        itertools.repeat(multiset, len(pairs)),
+        itertools.repeat(plan, len(pairs))
+    )
+
+    tally = _new_tally()
+    for partition_tally in results:
+        _merge_tally(tally, partition_tally, max_details)
+    return tally
+
+
+def _row_digests(key_values, rows):
+    """
+    Digest of each row as the comparison sees it: its key and the stripped
+    text of every non-null field but the entity IDs (see text_batch_fingerprint)
+    """
+    columns = list(dict.fromkeys(field for row in rows for field in row))
+    _, row_hashes, _ = text_batch_fingerprint(key_values, columns,
+                                              [[row.get(field) for row in rows] for field in columns],
+                                              ENTITY_ID_FIELDS)
+    return row_hashes.tolist()
+
+
+def _merkle_leaves(records, leaves, key_hashes=None, samples=None, sample_limit=0):
+    """
+    Fold keyed rows into checksum leaves chosen by a hash of the key
+
+    Args:
+        records: (key, position, row) records
+        leaves: Number of leaves
+        key_hashes: Optional array.array("q") collecting the hash of every key
+        samples: Optional list collecting (leaf, row) for the first rows
+        sample_limit: Most rows to collect in samples
+
+    Returns:
+        tuple: (row count per leaf, digest per leaf)
+    """
+    counts = [0] * leaves
+    sums = [0] * leaves
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, DIGEST_BATCH_ROWS))
+        if not batch:
+            break
+        key_values = [key_value for key_value, _, _ in batch]
+        rows = [row for _, _, row in batch]
+        for key_value, row, digest in zip(key_values, rows, _row_digests(key_values, rows)):
+            key_hash = hash(key_value)
+            leaf = key_hash % leaves
+            counts[leaf] += 1
+            sums[leaf] = (sums[leaf] + digest) & _DIGEST_MASK
+            if key_hashes is not None:
+                key_hashes.append(key_hash)
+            if samples is not None and len(samples) < sample_limit:
+                samples.append((leaf, row))
+    return counts, [hash(leaf) for leaf in zip(counts, sums)]
+
+
+def _merkle_compare(source_records, dest_records, reread, leaves, chunk_size, partitions, spill_dir,
+                    max_details, debug, executor=None, fields=None, multiset=False, plan=None):
+    """
+    Compare keyed rows through checksum trees, comparing rows only where the
+    trees differ
+
+    Both sides are folded into checksum leaves by key in one pass, and the
+    trees over the leaves are compared from the root down. Rows of equal
+    leaves match; rows of differing leaves, or of leaves holding a key
+    repeated in the source (on either side when comparing multisets, so
+    duplicate keys are reported), are read again with reread(keep), given a
+    predicate on the key text, and compared through hash partitions.
+    Besides the leaves, memory holds 8 bytes per row for spotting repeated
+    keys.
+    """
+    key_hashes = array.array("q")
+    dest_key_hashes = array.array("q") if multiset else None
+    samples = []
+    logger.info("Building checksum trees over %s leaves...", leaves)
+    source_counts, source_digests = _merkle_leaves(source_records, leaves, key_hashes, samples, 4 * max_details)
+    dest_counts, dest_digests = _merkle_leaves(dest_records, leaves, dest_key_hashes)
+
+    suspect = set(differing_leaves(build_levels(source_digests), build_levels(dest_digests)))
+    # A repeated source key compares only its last row, so equal digests don't imply matching rows
+    suspect.update(int(key_hash) % leaves for key_hash in repeated_values(key_hashes))
+    if multiset:
+        suspect.update(int(key_hash) % leaves for key_hash in repeated_values(dest_key_hashes))
+    del key_hashes, dest_key_hashes
+    logger.info("%s of %s checksum leaves differ", len(suspect), leaves)
+
+    tally = _new_tally()
+    tally["matching_rows"] = sum(count for leaf, count in enumerate(dest_counts) if leaf not in suspect)
+    matching_details = tally["details"]["matching_rows"]
+    for leaf, row in samples:
+        if leaf not in suspect and len(matching_details) < max_details:
+            matching_details.append(_clean_row(row, ENTITY_ID_FIELDS))
+
+    if suspect:
+        source_records, dest_records = reread(lambda key_value: hash(key_value) % leaves in suspect)
+        _merge_tally(tally, _hash_partition_compare(source_records, dest_records, chunk_size, partitions,
+                                                    spill_dir, max_details, debug, executor, fields, multiset,
+                                                    plan),
+                     max_details)
+    return tally
+
+
+def _table_fingerprint(column_batches, key_fields, key_hashes, samples=None, sample_limit=0):
+    """
+    Order-independent fingerprint of one side of a table, from one pass over
+    its (columns, column values) batches
+
+    Every non-null cell but the entity IDs is hashed together with its row's
+    key text, column name and stripped text (see text_batch_fingerprint). A
+    column's aggregate is the sum of its cell hashes, and a row's hash the
+    sum of its key hash and cells. Rows without the key fields are counted
+    but otherwise left out, as the comparison leaves them out.
+
+    Args:
+        key_hashes: array.array("q") collecting the hash of every key
+        samples: Optional list collecting the first rows as dicts
+        sample_limit: Most rows to collect in samples
+
+    Returns:
+        dict: rows, keyed_rows, row_sum and row_xor (of row hashes) and
+              columns (column name to aggregate)
+    """
+    fingerprint = {"rows": 0, "keyed_rows": 0, "row_sum": 0, "row_xor": 0, "columns": {}}
+    column_sums = fingerprint["columns"]
+    for columns, column_values in column_batches:
+        row_count = len(column_values[0]) if column_values else 0
+        fingerprint["rows"] += row_count
+        if not all(field in columns for field in key_fields):
+            continue
+
+        keys = [_key_text(values) for values in zip(*(column_values[columns.index(field)] for field in key_fields))]
+        batch_key_hashes, row_hashes, batch_sums = text_batch_fingerprint(keys, columns, column_values,
+                                                                          ENTITY_ID_FIELDS)
+        fingerprint["row_sum"] = (fingerprint["row_sum"] + int(row_hashes.sum(dtype=np.uint64))) & _DIGEST_MASK
+        fingerprint["row_xor"] ^= int(np.bitwise_xor.reduce(row_hashes))
+        for column, column_sum in batch_sums.items():
+            column_sums[column] = (column_sums.get(column, 0) + column_sum) & _DIGEST_MASK
+        key_hashes.frombytes(batch_key_hashes.tobytes())
+        fingerprint["keyed_rows"] += row_count
+        if samples is not None and len(samples) < sample_limit:
+            samples.extend(dict(zip(columns, values))
+                           for values in itertools.islice(zip(*column_values), sample_limit - len(samples)))
+    return fingerprint
+
+
+def _fingerprint_precheck(config, table, chunk_size, key_fields, max_details, spill_dir):
+    """
+    Compare table fingerprints of both sides before any row-level work
+
+    With no key repeated on either side, equal column aggregates mean every
+    row matches, and an equal column aggregate means the column holds the
+    same value for every key present on both sides, so only the other
+    columns need comparing. The parsed batches are spilled to spill_dir on
+    the way, so the row comparison doesn't parse the files again.
+
+    Returns:
+        tuple: (tally, None, batch paths) when the sides match, with the row
+               counts under "rows_in_source" and "rows_in_destination";
+               otherwise (None, the columns left to compare or None to
+               compare them all, batch paths), where batch paths maps
+               "source" and "destination" to the spilled batches
+    """
+    batch_paths = {side: os.path.join(spill_dir, f"{side}.batches") for side in ("source", "destination")}
+    source_key_hashes = array.array("q")
+    dest_key_hashes = array.array("q")
+    samples = []
+    logger.info("Fingerprinting table %s...", table)
+    source = _table_fingerprint(
+        _spilled(_iter_column_batches(config.get('source_files') or [], table, chunk_size, "source"),
+                 batch_paths["source"]),
+        key_fields, source_key_hashes, samples, max_details)
+    dest = _table_fingerprint(
+        _spilled(_iter_column_batches(config.get('dest_files') or [], table, chunk_size, "destination"),
+                 batch_paths["destination"]),
+        key_fields, dest_key_hashes)
+
+    unique_keys = not len(repeated_values(source_key_hashes)) and not len(repeated_values(dest_key_hashes))
+    del source_key_hashes, dest_key_hashes
+    all_columns = set(source["columns"]).union(dest["columns"])
+    differing = sorted(column for column in all_columns
+                       if source["columns"].get(column, 0) != dest["columns"].get(column, 0))
+
+    if unique_keys and not differing and all(source[part] == dest[part]
+                                             for part in ("keyed_rows", "row_sum", "row_xor")):
+        logger.info("Table %s fingerprints match; skipping row comparison", table)
+        tally = _new_tally()
+        tally["matching_rows"] = dest["keyed_rows"]
+        tally["details"]["matching_rows"] = [_clean_row(row, ENTITY_ID_FIELDS) for row in samples[:max_details]]
+        tally["rows_in_source"] = source["rows"]
+        tally["rows_in_destination"] = dest["rows"]
+        return tally, None, batch_paths
+
+    if not unique_keys:
+        logger.info("Table %s fingerprints differ; comparing all columns", table)
+        return None, None, batch_paths
+    logger.info("Table %s fingerprints differ in columns: %s", table, ", ".join(differing) or "none")
+    return None, differing, batch_paths
+
+
+def _sampled_rows(config, table, chunk_size, key_fields, sample_rate=None, sample_size=None):
+    """
+    Rows of both sides for a key-consistent sample of the keys
+
+    A key is sampled when its sample_point is below a threshold: sample_rate
+    itself, or for sample_size the point past the sample_size lowest source
+    keys. Rows of other keys are dropped before their dicts are built. With
+    sample_size the source sample is held in memory while the source is
+    read, at most about twice the sampled rows.
+
+    Returns:
+        tuple: (source rows, destination rows, predicate on the key text
+               telling whether a key is sampled, share of the key space
+               sampled)
+    """
+    if sample_size:
+        sample_size = max(1, int(sample_size))
+        threshold = 1.0
+        kept = []
+        next_prune = 2 * sample_size
+        below_threshold = lambda key_value: sample_point(key_value) < threshold
+        for row in _iter_table_rows(config.get('source_files') or [], table, chunk_size, "source",
+                                    (key_fields, below_threshold)):
+            kept.append((sample_point(_key_text([row[field] for field in key_fields])), row))
+            if len(kept) >= next_prune:
+                kept, threshold = prune_bottom_k(kept, sample_size, threshold)
+                next_prune = max(2 * sample_size, 2 * len(kept))
+        kept, threshold = prune_bottom_k(kept, sample_size, threshold)
+        source_rows = (row for _, row in kept)
+    else:
+        threshold = min(1.0, float(sample_rate))
+        source_rows = None
+
+    in_sample = lambda key_value: sample_point(key_value) < threshold
+    if source_rows is None:
+        source_rows = _iter_table_rows(config.get('source_files') or [], table, chunk_size, "source",
+                                       (key_fields, in_sample))
+    dest_rows = _iter_table_rows(config.get('dest_files') or [], table, chunk_size, "destination",
+                                 (key_fields, in_sample))
+    logger.info("Sampling keys below %.6f of the key space", threshold)
+    return source_rows, dest_rows, in_sample, threshold
+
+
+def _sample_estimates(tally, key_share, config):
+    """
+    Match and mismatch rates over the compared rows of a sample, with
+    Wilson score intervals at config["sample_confidence"]
+    """
+    confidence = config.get("sample_confidence", DEFAULT_CONFIDENCE)
+    matching = tally["matching_rows"]
+    compared = matching + tally["different_rows"] + tally["missing_rows"] + tally["extra_rows"]
+    lower, upper = wilson_interval(matching, compared, confidence)
+    return {
+        "sample_rate": config.get("sample_rate"),
+        "sample_size": config.get("sample_size"),
+        "key_share": key_share,
+        "confidence": confidence,
+        "rows_compared": compared,
+        "match_rate": matching / compared if compared else None,
+        "match_rate_interval": [lower, upper],
+        "mismatch_rate": 1 - matching / compared if compared else None,
+        "mismatch_rate_interval": [1 - upper, 1 - lower] if compared else [None, None]
+    }
+
+
+def compare_table_in_chunks(schema1, schema2, table, chunk_size=1000, config=None, executor=None):
+    """
+    Compare data between two schemas for a single table, keeping memory
+    bounded by chunk_size rather than the table size.
+
+    Rows of each side are parsed chunk_size at a time and spilled to disk
+    under config["spill_dir"] (or the system temporary directory), using
+    config["comparison_strategy"]:
+    - "sort_merge" (default): sorted runs keyed by the stripped text of the
+      primary key, merge-joined as two key-ordered streams
+    - "hash_partition": config["hash_partitions"] partitions per side by
+      hash of the key, each pair compared in memory (on executor, a process
+      pool, when given); partitions over chunk_size rows are split again
+    - "merkle": checksum trees over config["merkle_leaves"] key-hashed
+      leaves per side, read in one pass; only the rows of differing leaves
+      are read again and compared as with "hash_partition"
+    Unless config["fingerprint_precheck"] is false, a first pass compares
+    order-independent fingerprints of both sides; identical tables are then
+    reported as matching without any row comparison, and otherwise only the
+    columns whose fingerprints differ are compared row by row.
+    When several source rows share a key the last one is compared; every
+    destination row is counted, and missing rows are counted per key. With
+    config["multiset_comparison"], the rows sharing a key are instead
+    compared as multisets: equal rows match, the rest pair up in order, any
+    surplus is missing or extra, and keys held by several rows on either
+    side are reported under "duplicate_keys".
+    With config["sample_rate"] (a share of keys) or config["sample_size"] (a
+    number of source keys), only a sample of keys chosen by a hash of the
+    key text is compared, the same keys on both sides, and the result gets
+    a "sample" entry with the estimated match and mismatch rates and their
+    confidence intervals; the row counts then cover the sampled rows only.
+    With config["type_aware_comparison"], values are compared by a plan
+    compiled from the leading rows of both sides (see compile_plan):
+    numbers within config["numeric_abs_tolerance"] or
+    config["numeric_rel_tolerance"], timestamps in UTC at
+    config["timestamp_precision"] and text under config["text_trim"] and
+    config["text_case_sensitive"], a batch of row pairs at a time; otherwise
+    values are compared as stripped text.
+    """
+    logger.info("\nComparing data for table %s in chunks of %s rows...", table, chunk_size)
+    config = config or {}
+    chunk_size = max(1, int(chunk_size))
+    strategy = config.get("comparison_strategy", "sort_merge")
+    multiset = config.get("multiset_comparison", False)
+
+    # Row counts, filled in as the sides are spilled
+    source_count = [0]
+    dest_count = [0]
+
+    # Track differences (keep only a limited number for reporting to save memory)
+    max_differences_to_track = min(100, config.get("max_differences", 100))
+
+    # Checked once: the per-row debug output below is skipped entirely unless enabled
+    debug = logger.isEnabledFor(logging.DEBUG)
+
+    spill_root = config.get("spill_dir")
+    if spill_root:
+        os.makedirs(spill_root, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix=f"compare_{table}_", dir=spill_root) as spill_dir:
+        if config.get('source_files'):
+            logger.info("Loading from uploaded source files...")
+        source_rows = _iter_table_rows(config.get('source_files') or [], table, chunk_size, "source")
+        if config.get('dest_files'):
+            logger.info("Loading from uploaded destination files...")
+        dest_rows = _iter_table_rows(config.get('dest_files') or [], table, chunk_size, "destination")
+
+        # Identify the primary key field dynamically from the first row of each side
+        key_fields = []
+        first_source_row = next(source_rows, None)
+        first_dest_row = next(dest_rows, None)
+        if first_source_row is not None and first_dest_row is not None:
+            if debug:
+                logger.debug("First source row: %s", first_source_row)
+                logger.debug("First dest row: %s", first_dest_row)
+
+            primary_key, source_id_field, dest_id_field = _detect_primary_key(first_source_row, first_dest_row)
+            key_fields = [primary_key] if primary_key else []
+
+            # When the guessed key repeats in the source, extend it with the
+            # columns that make it identify every row
+            if primary_key and config.get("key_discovery", False):
+                discovered = _discover_key_fields(table, list(first_source_row), config.get('source_files') or [],
+                                                  chunk_size, primary_key)
+                if discovered and all(field in first_dest_row for field in discovered):
+                    key_fields = discovered
+
+            logger.info("Using primary key: %s", ", ".join(key_fields) or None)
+            logger.debug("Source ID field: %s", source_id_field)
+            logger.debug("Destination ID field: %s", dest_id_field)
+
+        source_head = [first_source_row] if first_source_row is not None else []
+        dest_head = [first_dest_row] if first_dest_row is not None else []
+
+        # Type-aware comparison decides how to compare each column once, from
+        # the leading rows of both sides
+        plan = None
+        rules = comparison_rules(config)
+        if rules is not None and key_fields:
+            source_head.extend(itertools.islice(source_rows, PLAN_SAMPLE_ROWS - 1))
+            dest_head.extend(itertools.islice(dest_rows, PLAN_SAMPLE_ROWS - 1))
+            columns = list(dict.fromkeys(itertools.chain(*source_head, *dest_head)))
+            plan = compile_plan(rows_frame(source_head, columns), rows_frame(dest_head, columns), rules)
+            logger.debug("Comparison plan for table %s: %s", table, plan["columns"])
+        source_rows = itertools.chain(source_head, source_rows)
+        dest_rows = itertools.chain(dest_head, dest_rows)
+
+        # Only a sample of keys is compared when a sample setting is given
+        in_sample = None
+        if key_fields and (config.get("sample_rate") or config.get("sample_size")):
+            source_rows, dest_rows, in_sample, key_share = _sampled_rows(
+                config, table, chunk_size, key_fields, config.get("sample_rate"), config.get("sample_size"))
+
+        # A cheap fingerprint pass settles identical tables and narrows the
+        # columns the row comparison below has to look at
+        tally, fields, batch_paths = None, None, {}
+        if key_fields and in_sample is None and config.get("fingerprint_precheck", True):
+            tally, fields, batch_paths = _fingerprint_precheck(config, table, chunk_size, key_fields,
+                                                               max_differences_to_track, spill_dir)
+        if batch_paths:
+            # Read the batches spilled by the fingerprint pass rather than parse again
+            source_rows = _rows_from_batches(iter_run(batch_paths["source"]))
+            dest_rows = _rows_from_batches(iter_run(batch_paths["destination"]))
+
+        source_records = _keyed_rows(source_rows, key_fields, source_count)
+        dest_records = _keyed_rows(dest_rows, key_fields, dest_count)
+
+        def reread(keep):
+            # Records of both sides whose key text passes keep, read again without counting rows
+            if in_sample is not None:
+                key_filter = (key_fields, lambda key_value: in_sample(key_value) and keep(key_value))
+            else:
+                key_filter = (key_fields, keep)
+            if batch_paths:
+                source_again = _rows_from_batches(iter_run(batch_paths["source"]), key_filter)
+                dest_again = _rows_from_batches(iter_run(batch_paths["destination"]), key_filter)
             else:
-                # Row exists only in destination (extra)
-                extra_rows += 1
-                if len(extra_rows_details) < max_differences_to_track:
-                    clean_row = {}
-                    for field, value in row.items():
-                        clean_row[field] = str(value).strip() if value is not None else None
-                    extra_rows_details.append(clean_row)
-
-    rows_in_destination = len(dest_data)
-
-    # Identify missing rows (in source but not in destination)
-    missing_keys = source_keys - dest_keys
-    missing_rows = len(missing_keys)
-
-    # Collect a sample of missing rows for reporting
-    for key in list(missing_keys)[:max_differences_to_track]:
-        if key in source_index:
-            source_row = source_index[key]
-            clean_row = {}
-            for field, value in source_row.items():
-                clean_row[field] = str(value).strip() if value is not None else None
-            missing_rows_details.append(clean_row)
-
-    # Debug: Print detailed comparison for first few rows
-    if source_data and dest_data:
-        print(f"\nDebug - First source row: {source_data[0]}")
-        print(f"Debug - First dest row: {dest_data[0]}")
-
-        # Check primary key matching
-        if primary_key:
-            source_key = str(source_data[0].get(primary_key)).strip()
-            for dest_row in dest_data:
-                dest_key = str(dest_row.get(primary_key)).strip()
-                if source_key == dest_key:
-                    print(f"Found matching primary key: {source_key}")
-                    print(f"Source name: {source_data[0].get('name')}")
-                    print(f"Dest name: {dest_row.get('name')}")
-                    break
+                source_again = _iter_table_rows(config.get('source_files') or [], table, chunk_size, "source",
+                                                key_filter)
+                dest_again = _iter_table_rows(config.get('dest_files') or [], table, chunk_size, "destination",
+                                              key_filter)
+            return _keyed_rows(source_again, key_fields, [0]), _keyed_rows(dest_again, key_fields, [0])
+
+        if tally is not None:
+            source_count[0] = tally.pop("rows_in_source")
+            dest_count[0] = tally.pop("rows_in_destination")
+        elif strategy == "merkle":
+            tally = _merkle_compare(source_records, dest_records, reread, config.get("merkle_leaves", 4096),
+                                    chunk_size, config.get("hash_partitions", 16), spill_dir,
+                                    max_differences_to_track, debug, executor, fields, multiset, plan)
+        elif strategy == "hash_partition":
+            tally = _hash_partition_compare(source_records, dest_records, chunk_size,
+                                            config.get("hash_partitions", 16), spill_dir,
+                                            max_differences_to_track, debug, executor, fields, multiset, plan)
+        else:
+            tally = _sort_merge_compare(source_records, dest_records, chunk_size, spill_dir,
+                                        max_differences_to_track, debug, fields, multiset, plan)
+
+    rows_in_source = source_count[0]
+    rows_in_destination = dest_count[0]
+    matching_rows = tally["matching_rows"]
+    different_rows = tally["different_rows"]
+    missing_rows = tally["missing_rows"]
+    extra_rows = tally["extra_rows"]
+    logger.info("Compared %s source rows with %s destination rows", rows_in_source, rows_in_destination)
 
     # Compute summary for this table
     has_differences = (different_rows > 0 or missing_rows > 0 or extra_rows > 0)
@@ -1268,6 +1942,13 @@ def compare_table_in_chunks(schema1, schema2, table, chunk_size=1000, config=Non
         "extra_rows": extra_rows,
         "has_differences": has_differences
     }
+    details = tally["details"]
+    if multiset:
+        table_summary["duplicate_keys"] = tally["duplicate_keys"]
+        table_summary["duplicate_source_rows"] = tally["duplicate_source_rows"]
+        table_summary["duplicate_destination_rows"] = tally["duplicate_destination_rows"]
+    else:
+        del details["duplicate_keys"]
 
     # Create table comparison result with proper structure
     table_comparison = {
@@ -1279,18 +1960,87 @@ def compare_table_in_chunks(schema1, schema2, table, chunk_size=1000, config=Non
             "timestamp": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
         },
         "summary": table_summary,
-        "details": {
-            "matching_rows": matching_rows_details[:max_differences_to_track],
-            "different_rows": different_rows_details[:max_differences_to_track] if different_rows > 0 else [],
-            "missing_rows": missing_rows_details[:max_differences_to_track] if missing_rows > 0 else [],
-            "extra_rows": extra_rows_details[:max_differences_to_track] if extra_rows > 0 else []
-        }
+        "details": details
     }
 
-    print(
-        f"✅ Table {table} comparison completed: {matching_rows} matching, {different_rows} different, {missing_rows} missing, {extra_rows} extra")
+    if in_sample is not None:
+        table_comparison["sample"] = _sample_estimates(tally, key_share, config)
+
+    logger.info("✅ Table %s comparison completed: %s matching, %s different, %s missing, %s extra",
+                table, matching_rows, different_rows, missing_rows, extra_rows)
     return table_comparison
 
+def _run_sample_prepass(schema1, schema2, tables, chunk_size, config):
+    """
+    Compare a key-consistent sample of every table ahead of the full run
+
+    Returns:
+        dict: The "sample" entry of each table's sampled comparison
+    """
+    logger.info("\nSampling %s tables before the full comparison...", len(tables))
+    estimates = {}
+
+    def record(table, table_comparison):
+        sample = table_comparison.get("sample")
+        if sample is None:
+            return
+        estimates[table] = sample
+        if sample["match_rate"] is not None:
+            lower, upper = sample["match_rate_interval"]
+            logger.info("Table %s sample: %.2f%% of %s rows match (%.2f%% to %.2f%% at %s confidence)",
+                        table, 100 * sample["match_rate"], sample["rows_compared"], 100 * lower, 100 * upper,
+                        sample["confidence"])
+
+    workers = min(len(tables), multiprocessing.cpu_count() - 1, 4)
+    if workers > 1 and config.get("use_parallel", True):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            future_to_table = {
+                executor.submit(compare_table_in_chunks, schema1, schema2, table, chunk_size, config): table
+                for table in tables
+            }
+            for future in as_completed(future_to_table):
+                table = future_to_table[future]
+                try:
+                    record(table, future.result())
+                except Exception as e:
+                    logger.error("❌ Error sampling table %s: %s", table, e)
+                    import traceback
+                    traceback.print_exc()
+    else:
+        for table in tables:
+            try:
+                record(table, compare_table_in_chunks(schema1, schema2, table, chunk_size, config))
+            except Exception as e:
+                logger.error("❌ Error sampling table %s: %s", table, e)
+                import traceback
+                traceback.print_exc()
+    return estimates
+
+
+def _table_input_fingerprints(file_paths, tables, side):
+    """
+    Fingerprint the input of each table across one side's files without
+    parsing them; tables get None when a file can't be read
+    """
+    per_file = []
+    for file_path in file_paths:
+        try:
+            per_file.append(table_content_digests(file_path, tables))
+        except Exception as e:
+            logger.warning("Could not fingerprint %s file %s: %s", side, file_path, e)
+            return dict.fromkeys(tables)
+    return {table: fingerprint(*(digests[table] for digests in per_file)) for table in tables}
+
+
+def _comparison_settings(config, schema1, schema2):
+    """Fingerprint of the settings a table comparison result depends on"""
+    return fingerprint(COMPARISON_VERSION, schema1, schema2, config.get("comparison_strategy", "sort_merge"),
+                       min(100, config.get("max_differences", 100)), bool(config.get("key_discovery", False)),
+                       bool(config.get("multiset_comparison", False)), config.get("sample_rate"),
+                       config.get("sample_size"), config.get("sample_confidence", DEFAULT_CONFIDENCE),
+                       comparison_rules(config))
+
+
 def process_table_result(table, table_comparison, summary, table_comparisons, temp_dir, config):
             """
             Process the result of a table comparison and update the summary.
@@ -1323,9 +2073,9 @@ def process_table_result(table, table_comparison, summary, table_comparisons, te
                         "summary": table_summary,
                         "disk_path": table_path
                     }
-                    print(f"✅ Table {table} saved to disk ({table_summary.get('rows_in_source', 0)} rows)")
+                    logger.info("✅ Table %s saved to disk (%s rows)", table, table_summary.get('rows_in_source', 0))
                 except Exception as e:
-                    print(f"⚠️ Error saving table to disk: {e}")
+                    logger.warning("⚠️ Error saving table to disk: %s", e)
                     # Fallback to keeping in memory
                     table_comparisons[table] = table_comparison
             else:
@@ -1338,7 +2088,7 @@ def run_great_expectations_validation(common_tables, schema1, schema2, context,
             Returns a dictionary of validation results.
             """
             if context is None:
-                print("Great Expectations context not available, skipping validation")
+                logger.info("Great Expectations context not available, skipping validation")
                 return {}
 
             ge_results = {}
@@ -1348,7 +2098,7 @@ def run_great_expectations_validation(common_tables, schema1, schema2, context,
 
             for i in range(0, len(common_tables), ge_batch_size):
                 batch_tables = common_tables[i:i + ge_batch_size]
-                print(f"Running GE validation for tables: {batch_tables}")
+                logger.info("Running GE validation for tables: %s", batch_tables)
 
                 for table in batch_tables:
                     try:
@@ -1367,8 +2117,7 @@ def run_great_expectations_validation(common_tables, schema1, schema2, context,
 
                         # Load schema1 data
                         if os.path.exists(schema1_dir):
-                            docx_files = glob.glob(os.path.join(schema1_dir, "**/*.docx"), recursive=True)
-                            for file_path in docx_files:
+                            for file_path in find_supported_files(schema1_dir):
                                 try:
                                     inserts = extract_insert_statements(file_path)
                                     dataframes = inserts_to_dataframe(inserts)
@@ -1376,12 +2125,11 @@ def run_great_expectations_validation(common_tables, schema1, schema2, context,
                                         df1 = dataframes[table]
                                         break
                                 except Exception as e:
-                                    print(f"Error loading schema1 data: {e}")
+                                    logger.error("Error loading schema1 data: %s", e)
 
                         # Load schema2 data
                         if os.path.exists(schema2_dir):
-                            docx_files = glob.glob(os.path.join(schema2_dir, "**/*.docx"), recursive=True)
-                            for file_path in docx_files:
+                            for file_path in find_supported_files(schema2_dir):
                                 try:
                                     inserts = extract_insert_statements(file_path)
                                     dataframes = inserts_to_dataframe(inserts)
@@ -1389,24 +2137,24 @@ def run_great_expectations_validation(common_tables, schema1, schema2, context,
                                         df2 = dataframes[table]
                                         break
                                 except Exception as e:
-                                    print(f"Error loading schema2 data: {e}")
+                                    logger.error("Error loading schema2 data: %s", e)
 
                         # Run validation if both dataframes are available
                         if df1 is not None and df2 is not None:
-                            print(f"Running GE validation for table {table}...")
+                            logger.info("Running GE validation for table %s...", table)
                             result = compare_data_with_ge(df1, df2, table, context)
                             ge_results[table] = {
                                 "success": result.success,
                                 "statistics": result.statistics,
                                 "results": [r.to_json_dict() for r in result.results]
                             }
-                            print(f"✅ GE validation for table {table} completed")
+                            logger.info("✅ GE validation for table %s completed", table)
                         else:
-                            print(f"⚠️ Could not load data for table {table}")
+                            logger.warning("⚠️ Could not load data for table %s", table)
                             ge_results[table] = {"error": "Could not load data for validation"}
 
                     except Exception as e:
-                        print(f"⚠️ Error in GE validation for table {table}: {e}")
+                        logger.warning("⚠️ Error in GE validation for table %s: %s", table, e)
                         ge_results[table] = {"error": str(e)}
 
             return ge_results
@@ -1417,17 +2165,17 @@ def process_data_in_batches(config, use_ge, context):
             """
             # Load schema names from config
             schema_names = config.get("schemas", [])
-            print(f"Schemas specified in config: {schema_names}")
+            logger.info("Schemas specified in config: %s", schema_names)
 
             if len(schema_names) != 2:
-                print(f"⚠️ Need exactly two schemas for comparison")
+                logger.warning("⚠️ Need exactly two schemas for comparison")
                 return None
 
             schema1, schema2 = schema_names
-            print(f"Comparing data between schemas: {schema1} (source) and {schema2} (destination)")
+            logger.info("Comparing data between schemas: %s (source) and %s (destination)", schema1, schema2)
 
             # Step 1: Find common tables between schemas without loading all data
-            print("\nStep 1: Finding common tables between schemas...")
+            logger.info("\nStep 1: Finding common tables between schemas...")
             try:
                 common_tables = get_common_table_list(schema1, schema2, config)
 
@@ -1440,15 +2188,15 @@ def process_data_in_batches(config, use_ge, context):
                     f"{schema2}_only": list(schema2_only_tables)
                 }
 
-                print(f"Found {len(common_tables)} common tables to compare")
-                print(f"Found {len(schema1_only_tables)} tables only in {schema1}")
-                print(f"Found {len(schema2_only_tables)} tables only in {schema2}")
+                logger.info("Found %s common tables to compare", len(common_tables))
+                logger.info("Found %s tables only in %s", len(schema1_only_tables), schema1)
+                logger.info("Found %s tables only in %s", len(schema2_only_tables), schema2)
             except Exception as e:
-                print(f"❌ Error finding common tables: {e}")
+                logger.error("❌ Error finding common tables: %s", e)
                 return None
 
             if len(common_tables) == 0:
-                print("❌ No common tables found between schemas. Cannot generate comparison report.")
+                logger.error("❌ No common tables found between schemas. Cannot generate comparison report.")
                 return None
 
             # Initialize summary data structure
@@ -1470,24 +2218,89 @@ def process_data_in_batches(config, use_ge, context):
             batch_size = config.get("batch_size", 3)  # Default to 3 tables per batch
             chunk_size = config.get("chunk_size", 1000)  # Default to 1000 rows per chunk
 
-            print(f"\nStep 2: Processing tables in batches of {batch_size} with chunk size {chunk_size}...")
+            logger.info("\nStep 2: Processing tables in batches of %s with chunk size %s...", batch_size, chunk_size)
 
             # Create a directory for temporary storage
             report_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             temp_dir = os.path.join("validation_reports", "temp", report_id)
             os.makedirs(temp_dir, exist_ok=True)
 
+            # Rows spilled while comparing go under the run's temp directory unless spill_dir is set
+            config = dict(config, spill_dir=config.get("spill_dir") or temp_dir)
+
+            # With hash partitioning (which merkle uses for differing leaves),
+            # tables run one at a time and the pool compares the partitions
+            # of each table instead
+            partition_workers = min(multiprocessing.cpu_count() - 1, 4)
+            parallel_partitions = (config.get("comparison_strategy") in ("hash_partition", "merkle")
+                                   and partition_workers > 1 and config.get("use_parallel", True))
+
+            # A sampled comparison of every table can run first for quick
+            # estimates; the full run then compares every row
+            sample_estimates = None
+            if config.get("sample_prepass", False) and (config.get("sample_rate") or config.get("sample_size")):
+                sample_estimates = _run_sample_prepass(schema1, schema2, common_tables, chunk_size, config)
+                config = dict(config, sample_rate=None, sample_size=None)
+
+            # Tables whose inputs and settings match the run manifest reuse the
+            # comparison stored by an earlier run instead of being compared again
+            incremental = config.get("incremental", False)
+            if incremental:
+                manifest_path = manifest_dir(config)
+                manifest = load_manifest(manifest_path)
+                settings = _comparison_settings(config, schema1, schema2)
+                source_inputs = _table_input_fingerprints(config.get('source_files') or [], common_tables, "source")
+                dest_inputs = _table_input_fingerprints(config.get('dest_files') or [], common_tables, "destination")
+
+            def finish_table(table, table_comparison):
+                # Store a fresh comparison for later runs, then add it to the report
+                if incremental and source_inputs[table] and dest_inputs[table]:
+                    store_result(manifest_path, manifest, entry_key(schema1, schema2, table),
+                                 source_inputs[table], dest_inputs[table], settings, table_comparison)
+                process_table_result(table, table_comparison, summary, table_comparisons, temp_dir, config)
+
             # Process tables in batches
             for i in range(0, len(common_tables), batch_size):
                 batch_tables = common_tables[i:i + batch_size]
-                print(
-                    f"Processing batch {(i // batch_size) + 1}/{(len(common_tables) + batch_size - 1) // batch_size}: {batch_tables}")
+                logger.info("Processing batch %s/%s: %s", (i // batch_size) + 1,
+                            (len(common_tables) + batch_size - 1) // batch_size, batch_tables)
+
+                if incremental:
+                    changed_tables = []
+                    for table in batch_tables:
+                        table_comparison = None
+                        if source_inputs[table] and dest_inputs[table]:
+                            table_comparison = cached_result(manifest_path, manifest,
+                                                             entry_key(schema1, schema2, table),
+                                                             source_inputs[table], dest_inputs[table], settings)
+                        if table_comparison is None:
+                            changed_tables.append(table)
+                            continue
+                        logger.info("✅ Table %s unchanged since %s, reusing its comparison", table,
+                                    table_comparison.get("meta", {}).get("timestamp"))
+                        table_comparison.setdefault("meta", {})["reused"] = True
+                        process_table_result(table, table_comparison, summary, table_comparisons, temp_dir, config)
+                    batch_tables = changed_tables
+                    if not batch_tables:
+                        continue
 
                 # Use parallel processing if available
                 max_workers = min(len(batch_tables), multiprocessing.cpu_count() - 1, 4)
 
-                if max_workers > 1 and config.get("use_parallel", True):
-                    print(f"Using {max_workers} parallel processes for batch processing")
+                if parallel_partitions:
+                    logger.info("Using %s parallel processes for table partitions", partition_workers)
+                    with ProcessPoolExecutor(max_workers=partition_workers) as executor:
+                        for table in batch_tables:
+                            try:
+                                table_comparison = compare_table_in_chunks(schema1, schema2, table, chunk_size,
+                                                                           config, executor=executor)
+                                finish_table(table, table_comparison)
+                            except Exception as e:
+                                logger.error("❌ Error processing table %s: %s", table, e)
+                                import traceback
+                                traceback.print_exc()
+                elif max_workers > 1 and config.get("use_parallel", True):
+                    logger.info("Using %s parallel processes for batch processing", max_workers)
                     with ProcessPoolExecutor(max_workers=max_workers) as executor:
                         # Create tasks for each table
                         future_to_table = {
@@ -1506,10 +2319,9 @@ def process_data_in_batches(config, use_ge, context):
                             table = future_to_table[future]
                             try:
                                 table_comparison = future.result()
-                                process_table_result(table, table_comparison, summary, table_comparisons,
-                                                     temp_dir, config)
+                                finish_table(table, table_comparison)
                             except Exception as e:
-                                print(f"❌ Error processing table {table}: {e}")
+                                logger.error("❌ Error processing table %s: %s", table, e)
                                 import traceback
                                 traceback.print_exc()
                 else:
@@ -1518,10 +2330,9 @@ def process_data_in_batches(config, use_ge, context):
                         try:
                             table_comparison = compare_table_in_chunks(schema1, schema2, table, chunk_size,
                                                                        config)
-                            process_table_result(table, table_comparison, summary, table_comparisons, temp_dir,
-                                                 config)
+                            finish_table(table, table_comparison)
                         except Exception as e:
-                            print(f"❌ Error processing table {table}: {e}")
+                            logger.error("❌ Error processing table %s: %s", table, e)
                             import traceback
                             traceback.print_exc()
 
@@ -1529,9 +2340,12 @@ def process_data_in_batches(config, use_ge, context):
                 import gc
                 gc.collect()
 
+                if incremental:
+                    save_manifest(manifest_path, manifest)
+
             # Run Great Expectations validation if enabled
             if use_ge and context is not None:
-                print("\nStep 3: Running Great Expectations validations...")
+                logger.info("\nStep 3: Running Great Expectations validations...")
                 ge_results = run_great_expectations_validation(common_tables, schema1, schema2, context,
                                                                chunk_size, config)
 
@@ -1552,6 +2366,8 @@ def process_data_in_batches(config, use_ge, context):
                 "summary": summary,
                 "mismatched_tables": mismatched_tables
             }
+            if sample_estimates is not None:
+                data_comparison["sample_prepass"] = sample_estimates
 
             # Handle table_comparisons specially because they might be on disk
             if config.get("save_tables_to_disk", False):
@@ -1571,27 +2387,27 @@ def generate_and_save_reports(data_comparison, config, temp_dir):
             report_id = data_comparison["meta"]["report_id"]
 
             # Save JSON report
-            print("\nSaving JSON report...")
+            logger.info("\nSaving JSON report...")
             report_path = os.path.join("validation_reports", f"validation_report_{report_id}.json")
             try:
                 with open(report_path, "w") as f:
                     json.dump(data_comparison, f, indent=2)
-                print(f"✅ JSON report saved to {report_path}")
+                logger.info("✅ JSON report saved to %s", report_path)
             except Exception as e:
-                print(f"❌ Error saving JSON report: {e}")
+                logger.error("❌ Error saving JSON report: %s", e)
                 alt_path = f"validation_report_{report_id}.json"
                 try:
                     with open(alt_path, "w") as f:
                         json.dump(data_comparison, f, indent=2)
-                    print(f"✅ JSON report saved to {alt_path}")
+                    logger.info("✅ JSON report saved to %s", alt_path)
                     report_path = alt_path
                 except Exception as e2:
-                    print(f"❌ Error saving to alternate path: {e2}")
+                    logger.error("❌ Error saving to alternate path: %s", e2)
                     return None
 
             # Load table comparison data from disk if needed
             if "table_comparisons_location" in data_comparison:
-                print("Loading table comparison data from disk for HTML report...")
+                logger.info("Loading table comparison data from disk for HTML report...")
                 table_comparisons = {}
                 for filename in os.listdir(temp_dir):
                     if filename.endswith("_comparison.json"):
@@ -1600,7 +2416,7 @@ def generate_and_save_reports(data_comparison, config, temp_dir):
                             with open(os.path.join(temp_dir, filename), "r") as f:
                                 table_comparisons[table_name] = json.load(f)
                         except Exception as e:
-                            print(f"⚠️ Error loading table {table_name} from disk: {e}")
+                            logger.warning("⚠️ Error loading table %s from disk: %s", table_name, e)
 
                 # Add to data_comparison for HTML report
                 data_comparison["table_comparisons"] = table_comparisons
@@ -1608,19 +2424,19 @@ def generate_and_save_reports(data_comparison, config, temp_dir):
             # Generate HTML report
             html_report_path, _ = generate_html_report(data_comparison)
             if html_report_path:
-                print(f"\n✅ Reports generated successfully:")
-                print(f"  - JSON Report: {report_path}")
-                print(f"  - HTML Report: {html_report_path}")
+                logger.info("\n✅ Reports generated successfully:")
+                logger.info("  - JSON Report: %s", report_path)
+                logger.info("  - HTML Report: %s", html_report_path)
 
                 # Optionally open the HTML report in the default browser
                 if config.get("open_browser", True):
                     try:
                         import webbrowser
                         webbrowser.open('file://' + os.path.abspath(html_report_path))
-                        print("✅ Opened HTML report in your default browser")
+                        logger.info("✅ Opened HTML report in your default browser")
                     except Exception as e:
-                        print(f"⚠️ Could not open browser automatically: {e}")
-                        print(f"  You can open the HTML report at: file://{os.path.abspath(html_report_path)}")
+                        logger.warning("⚠️ Could not open browser automatically: %s", e)
+                        logger.info("  You can open the HTML report at: file://%s", os.path.abspath(html_report_path))
 
             # Return report information for UI
             return {
@@ -1637,111 +2453,132 @@ def process_document_data(config, use_ge, context):
     report_id = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
     # Step 1: Load data from all supported files with parallel processing
-    print("\nStep 1: Loading data from documents (in parallel)...")
+    logger.info("\nStep 1: Loading data from documents (in parallel)...")
     data_dir = config["data_directory"]
 
     try:
-        # Find all supported files - UPDATED TO INCLUDE SQL AND TXT
+        # Find all supported files, including compressed SQL and text dumps
+        names = os.listdir(data_dir)
         files = []
         for ext in ['docx', 'sql', 'txt']:
-            files.extend([f for f in os.listdir(data_dir) if f.endswith(f".{ext}")])
+            files.extend([f for f in names if is_supported_file(f) and file_type(f) == ext])
 
-        print(f"Found {len(files)} supported documents in {data_dir}: {files}")
+        logger.info("Found %s supported documents in %s: %s", len(files), data_dir, files)
     except Exception as e:
-        print(f"❌ Error accessing data directory {data_dir}: {e}")
+        logger.error("❌ Error accessing data directory %s: %s", data_dir, e)
         return {"success": False, "error": f"Failed to access data directory: {str(e)}"}
 
     # Prepare file paths for parallel processing
     file_paths = [os.path.join(data_dir, file) for file in files]
 
+    # Large dumps are split into pieces, so they can use every core on their own
+    split_files = [file_path for file_path in file_paths if should_parse_in_pieces(file_path)]
+
     # Determine number of workers based on CPU cores
-    max_workers = min(multiprocessing.cpu_count(), len(file_paths))
-    print(f"Using {max_workers} parallel workers for document processing")
+    if split_files:
+        max_workers = multiprocessing.cpu_count()
+    else:
+        max_workers = min(multiprocessing.cpu_count(), len(file_paths))
+    logger.info("Using %s parallel workers for document processing", max_workers)
 
-    all_inserts = []
+    # Each worker streams its file and returns DataFrames keyed by schema.table.
+    # Values keep their literal text unless they are compared by type
+    infer_types = comparison_rules(config) is not None
+    file_dataframes = {}
     # Use ProcessPoolExecutor for parallel file processing
     with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        future_to_file = {executor.submit(process_single_file, file_path): file_path for file_path in file_paths}
+        future_to_file = {executor.submit(process_single_file, file_path, infer_types): file_path
+                          for file_path in file_paths if file_path not in split_files}
+
+        # Pieces of large dumps share the pool with the whole-file tasks above
+        for file_path in split_files:
+            try:
+                file_dataframes[file_path] = extract_dataframes(file_path, executor=executor, workers=max_workers,
+                                                                infer_types=infer_types)
+                logger.info("✅ Completed processing: %s", file_path)
+            except Exception as e:
+                logger.error("❌ Error processing file %s: %s", file_path, e)
 
         for future in as_completed(future_to_file):
             file_path = future_to_file[future]
             try:
-                inserts = future.result()
-                all_inserts.extend(inserts)
-                print(f"✅ Completed processing: {file_path}")
+                file_dataframes[file_path] = future.result()
+                logger.info("✅ Completed processing: %s", file_path)
             except Exception as e:
-                print(f"❌ Error processing file {file_path}: {e}")
+                logger.error("❌ Error processing file %s: %s", file_path, e)
 
-    print(f"🧠 Total rows extracted from INSERT statements: {len(all_inserts)}")
+    total_rows = sum(len(df) for frames in file_dataframes.values() for df in frames.values())
+    logger.info("🧠 Total rows extracted from INSERT statements: %s", total_rows)
 
-    if len(all_inserts) == 0:
-        print("❌ No data extracted from documents. Cannot proceed.")
+    if total_rows == 0:
+        logger.error("❌ No data extracted from documents. Cannot proceed.")
         return {"success": False, "error": "No data extracted from documents"}
 
-    # Process INSERT statements to DataFrames
-    print("\nStep 2: Converting data to DataFrames...")
+    # Merge per-file DataFrames, keeping file order stable
+    logger.info("\nStep 2: Converting data to DataFrames...")
     try:
-        all_dataframes = inserts_to_dataframe(all_inserts)
-        print(f"📊 Created DataFrames for {len(all_dataframes)} tables")
+        all_dataframes = merge_dataframes(file_dataframes.get(path, {}) for path in file_paths)
+        file_dataframes = None
+        logger.info("📊 Created DataFrames for %s tables", len(all_dataframes))
 
         # Print summary of data loaded
         for key, df in all_dataframes.items():
-            print(f"  - {key}: {len(df)} rows, columns: {list(df.columns)}")
+            logger.info("  - %s: %s rows, columns: %s", key, len(df), list(df.columns))
     except Exception as e:
-        print(f"❌ Error converting to DataFrames: {e}")
+        logger.error("❌ Error converting to DataFrames: %s", e)
         import traceback
         traceback.print_exc()
         return {"success": False, "error": f"Error converting to DataFrames: {str(e)}"}
 
     # Organize data by schema
-    print("\nStep 3: Organizing data by schema...")
+    logger.info("\nStep 3: Organizing data by schema...")
     try:
         schema_data = organize_by_schema(all_dataframes)
-        print(f"Found {len(schema_data)} schemas: {list(schema_data.keys())}")
+        logger.info("Found %s schemas: %s", len(schema_data), list(schema_data.keys()))
     except Exception as e:
-        print(f"❌ Error organizing data by schema: {e}")
+        logger.error("❌ Error organizing data by schema: %s", e)
         return {"success": False, "error": f"Error organizing data by schema: {str(e)}"}
 
     # Load schema names from config
     schema_names = config.get("schemas", [])
-    print(f"Schemas specified in config: {schema_names}")
+    logger.info("Schemas specified in config: %s", schema_names)
 
     if len(schema_names) != 2:
-        print(f"⚠️ Missing one or both of the required schemas in config.yaml")
+        logger.warning("⚠️ Missing one or both of the required schemas in config.yaml")
         available_schemas = list(schema_data.keys())
         if len(available_schemas) >= 2:
-            print(f"Using available schemas instead: {available_schemas[0]}, {available_schemas[1]}")
+            logger.info("Using available schemas instead: %s, %s", available_schemas[0], available_schemas[1])
             schema_names = available_schemas[:2]
         else:
-            print(f"❌ Need at least two schemas to generate comparison report")
+            logger.error("❌ Need at least two schemas to generate comparison report")
             return {"success": False,
                     "error": "Need at least two schemas to generate comparison report"}
 
     schema1, schema2 = schema_names
-    print(f"Comparing data between schemas: {schema1} (source) and {schema2} (destination)")
+    logger.info("Comparing data between schemas: %s (source) and %s (destination)", schema1, schema2)
 
     # Step 4: Generate data chunks and store in vector database
-    print("\nStep 4: Storing data in vector database...")
+    logger.info("\nStep 4: Storing data in vector database...")
     try:
         data_chunks = chunk_data(all_dataframes)
         store_data(data_chunks, config)
-        print("✅ Data stored in vector database")
+        logger.info("✅ Data stored in vector database")
     except Exception as e:
-        print(f"⚠️ Error storing data: {e}")
-        print("Continuing without vector storage...")
+        logger.warning("⚠️ Error storing data: %s", e)
+        logger.info("Continuing without vector storage...")
 
     # Step 5: Generate data comparison report
-    print("\nStep 5: Generating data comparison report...")
+    logger.info("\nStep 5: Generating data comparison report...")
     if schema1 in schema_data and schema2 in schema_data:
         schema1_data = schema_data[schema1]
         schema2_data = schema_data[schema2]
 
         # Get common tables
         try:
-            print("Finding common tables between schemas...")
+            logger.info("Finding common tables between schemas...")
             common_tables = get_common_tables(schema1_data, schema2_data)
         except Exception as e:
-            print(f"⚠️ Error using get_common_tables function: {e}")
+            logger.warning("⚠️ Error using get_common_tables function: %s", e)
             # Fallback implementation
             common_tables = set(schema1_data.keys()) & set(schema2_data.keys())
 
@@ -1750,21 +2587,23 @@ def process_document_data(config, use_ge, context):
         schema2_only_tables = set(schema2_data.keys()) - set(schema1_data.keys())
         mismatched_tables = schema1_only_tables.union(schema2_only_tables)
 
-        print(f"Found {len(common_tables)} common tables to compare: {common_tables}")
-        print(f"Found {len(mismatched_tables)} mismatched tables: {mismatched_tables}")
+        logger.info("Found %s common tables to compare: %s", len(common_tables), common_tables)
+        logger.info("Found %s mismatched tables: %s", len(mismatched_tables), mismatched_tables)
 
         if len(common_tables) == 0:
-            print("❌ No common tables found between schemas. Cannot generate comparison report.")
+            logger.error("❌ No common tables found between schemas. Cannot generate comparison report.")
             return {"success": False, "error": "No common tables found between schemas"}
 
         # Generate data comparison report
-        print("Comparing data between schemas...")
+        logger.info("Comparing data between schemas...")
         try:
             data_comparison = generate_data_comparison_report(
                 schema1_data,
                 schema2_data,
                 schema1,
-                schema2
+                schema2,
+                multiset=config.get("multiset_comparison", False),
+                rules=comparison_rules(config)
             )
 
             # Add information about mismatched tables to the report
@@ -1776,17 +2615,17 @@ def process_document_data(config, use_ge, context):
             # Add report ID
             data_comparison["meta"]["report_id"] = report_id
 
-            print("✅ Data comparison completed")
+            logger.info("✅ Data comparison completed")
 
         except Exception as e:
-            print(f"❌ Error generating comparison report: {e}")
+            logger.error("❌ Error generating comparison report: %s", e)
             import traceback
             traceback.print_exc()
             return {"success": False, "error": f"Error generating comparison report: {str(e)}"}
 
         # Optional: Use Great Expectations for additional validation
         if use_ge and context is not None:
-            print("\nPerforming Great Expectations validations (in parallel)...")
+            logger.info("\nPerforming Great Expectations validations (in parallel)...")
             ge_results = {}
 
             # Prepare tasks for parallel processing
@@ -1801,37 +2640,37 @@ def process_document_data(config, use_ge, context):
             with ProcessPoolExecutor(max_workers=max_workers) as executor:
                 for table, result in executor.map(validate_table_with_ge, validation_tasks):
                     ge_results[table] = result
-                    print(f"✅ GE validation for table {table} completed")
+                    logger.info("✅ GE validation for table %s completed", table)
 
             # Add GE results to the comparison report
             data_comparison["great_expectations"] = ge_results
 
         # Step 6: Save JSON report
-        print("\nStep 6: Saving JSON report...")
+        logger.info("\nStep 6: Saving JSON report...")
         json_report_path = os.path.join("validation_reports", f"validation_report_{report_id}.json")
         try:
             os.makedirs(os.path.dirname(json_report_path), exist_ok=True)
             with open(json_report_path, "w") as f:
                 json.dump(data_comparison, f, indent=2)
-            print(f"✅ JSON report saved to {json_report_path}")
+            logger.info("✅ JSON report saved to %s", json_report_path)
         except Exception as e:
-            print(f"❌ Error saving JSON report: {e}")
+            logger.error("❌ Error saving JSON report: %s", e)
             # Try with a different path as a fallback
             alt_path = f"validation_report_{report_id}.json"
-            print(f"Trying to save to {alt_path} instead...")
+            logger.info("Trying to save to %s instead...", alt_path)
             try:
                 with open(alt_path, "w") as f:
                     json.dump(data_comparison, f, indent=2)
-                print(f"✅ JSON report saved to {alt_path}")
+                logger.info("✅ JSON report saved to %s", alt_path)
                 json_report_path = alt_path
             except Exception as e2:
-                print(f"❌ Error saving to alternate path: {e2}")
+                logger.error("❌ Error saving to alternate path: %s", e2)
                 return {"success": False, "error": f"Error saving report: {str(e)} and {str(e2)}"}
 
         # Step 7: Generate HTML report
         html_report_path, _ = generate_html_report(data_comparison)
         if not html_report_path:
-            print("⚠️ Could not generate HTML report")
+            logger.warning("⚠️ Could not generate HTML report")
             html_report_path = None
 
         # Return report information
@@ -1842,8 +2681,7 @@ def process_document_data(config, use_ge, context):
             "html_report": html_report_path
         }
     else:
-        print(
-            f"❌ One or both schemas not found in the data. Available schemas: {list(schema_data.keys())}")
+        logger.error("❌ One or both schemas not found in the data. Available schemas: %s", list(schema_data.keys()))
         return {"success": False,
                 "error": f"One or both schemas not found. Available: {list(schema_data.keys())}"}
 
@@ -1933,7 +2771,7 @@ def list_available_reports():
                         "html_report": os.path.join(report_dir, filename.replace(".json", ".html"))
                     })
             except Exception as e:
-                print(f"Error loading report {filename}: {e}")
+                logger.error("Error loading report %s: %s", filename, e)
 
     # Sort by timestamp (newest first)
     reports.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
@@ -1955,7 +2793,7 @@ def get_report_by_id(report_id):
             report_data = json.load(f)
         return report_data
     except Exception as e:
-        print(f"Error loading report {report_id}: {e}")
+        logger.error("Error loading report %s: %s", report_id, e)
         return None
 
 
@@ -1976,16 +2814,16 @@ def clean_up_temporary_files(report_id=None):
             if os.path.exists(report_temp_dir):
                 import shutil
                 shutil.rmtree(report_temp_dir)
-                print(f"✅ Temporary files for report {report_id} removed")
+                logger.info("✅ Temporary files for report %s removed", report_id)
         else:
             # Clean up all temporary files
             import shutil
             shutil.rmtree(temp_dir)
             os.makedirs(temp_dir, exist_ok=True)
-            print("✅ All temporary files removed")
+            logger.info("✅ All temporary files removed")
         return True
     except Exception as e:
-        print(f"⚠️ Error cleaning up temporary files: {e}")
+        logger.warning("⚠️ Error cleaning up temporary files: %s", e)
         return False
 
 
@@ -1997,58 +2835,64 @@ def main(config=None):
 
     Returns a dictionary with the report results.
     """
-    print("Starting report generation process...")
+    logger.info("Starting report generation process...")
 
     # Load configuration
     if isinstance(config, str):
         # Load from file path
-        print(f"Loading configuration from {config}...")
+        logger.info("Loading configuration from %s...", config)
         try:
             with open(config, "r") as f:
                 config = yaml.safe_load(f)
-            print("✅ Configuration loaded successfully")
+            logger.info("✅ Configuration loaded successfully")
         except Exception as e:
-            print(f"❌ Error loading configuration: {e}")
+            logger.error("❌ Error loading configuration: %s", e)
             return {"success": False, "error": f"Failed to load config: {str(e)}"}
     elif config is None:
         # Use default config.yaml
-        print("Loading configuration from config.yaml...")
+        logger.info("Loading configuration from config.yaml...")
         try:
             with open("config.yaml", "r") as f:
                 config = yaml.safe_load(f)
-            print("✅ Configuration loaded successfully")
+            logger.info("✅ Configuration loaded successfully")
         except Exception as e:
-            print(f"❌ Error loading configuration: {e}")
+            logger.error("❌ Error loading configuration: %s", e)
             return {"success": False, "error": f"Failed to load default config: {str(e)}"}
     elif not isinstance(config, dict):
-        print(f"❌ Invalid config type: {type(config)}")
+        logger.error("❌ Invalid config type: %s", type(config))
         return {"success": False,
                 "error": "Config must be a dictionary, path to YAML file, or None"}
 
+    # Apply the configured log level and rate limits, then any cache settings;
+    # parsed files are cached across runs
+    configure_logging(config)
+    configure_parse_cache(config)
+    configure_key_cache(config)
+
     # Create output directories
-    print("Creating validation_reports directory if it doesn't exist...")
+    logger.info("Creating validation_reports directory if it doesn't exist...")
     try:
         os.makedirs("validation_reports", exist_ok=True)
-        print("✅ Directory structure verified")
+        logger.info("✅ Directory structure verified")
     except Exception as e:
-        print(f"❌ Error creating directories: {e}")
+        logger.error("❌ Error creating directories: %s", e)
         return {"success": False, "error": f"Failed to create directories: {str(e)}"}
 
     # Initialize Great Expectations context
     context = None  # Initialize as None to handle failure case
     try:
-        print("Initializing Great Expectations context...")
+        logger.info("Initializing Great Expectations context...")
         context = ge.data_context.DataContext(config.get("ge_dir", "./great_expectations"))
-        print("✅ Great Expectations context loaded")
+        logger.info("✅ Great Expectations context loaded")
         use_ge = True
     except Exception as e:
-        print(f"⚠️ Could not load Great Expectations context: {e}")
-        print("Continuing without Great Expectations...")
+        logger.warning("⚠️ Could not load Great Expectations context: %s", e)
+        logger.info("Continuing without Great Expectations...")
         use_ge = False
 
     # Process data based on chosen approach
     if config.get("use_direct_comparison", False):
-        print("\nUsing direct database-to-database comparison for better space efficiency...")
+        logger.info("\nUsing direct database-to-database comparison for better space efficiency...")
         # Process tables in batches to reduce memory usage
         result = process_data_in_batches(config, use_ge, context)
         if result is None:
@@ -2061,7 +2905,7 @@ def main(config=None):
             return result
         except Exception as e:
             import traceback
-            print(f"❌ Error in document processing: {e}")
+            logger.error("❌ Error in document processing: %s", e)
             traceback.print_exc()
             return {"success": False, "error": f"Error in document processing: {str(e)}"}
 
@@ -2069,4 +2913,4 @@ def main(config=None):
 if __name__ == "__main__":
     # When run directly, use the default config.yaml
     result = main()
-    print("\nValidation process completed with result:", result)
\ No newline at end of file
+    logger.info("\nValidation process completed with result: %s", result)
\ No newline at end of file
@@ -5,45 +5,52 @@ import yaml
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from parsers.docx_data_parser import extract_insert_statements, inserts_to_dataframe
+from parsers.docx_data_parser import iter_insert_batches, inserts_to_dataframe
+from parsers.file_formats import is_supported_file
+from parsers.parse_cache import configure_parse_cache
 from database.chroma_store import store_data
 from utils.chunk_utils import chunk_data
+from utils.log_utils import configure_logging
 
 
 def main():
     # Load configuration
     with open("config.yaml", "r") as f:
         config = yaml.safe_load(f)
+    configure_logging(config)
+    configure_parse_cache(config)
 
     data_dir = config.get("data_directory", "./data_validation")
     # files = sorted([f for f in os.listdir(data_dir) if f.endswith(".docx")])
-    files = sorted([f for f in os.listdir(data_dir) if f.endswith((".docx", ".txt", ".sql"))])
+    files = sorted([f for f in os.listdir(data_dir) if is_supported_file(f)])
 
-    all_inserts = []
+    # Rows stored so far per schema.table; also offsets row ids across batches
+    table_row_counts = {}
 
     for file in files:
         file_path = os.path.join(data_dir, file)
         print(f"📄 Parsing file: {file_path}")
 
-        # Extract INSERT statements
-        inserts = extract_insert_statements(file_path)
-        all_inserts.extend(inserts)
+        # Stream INSERT rows in batches and store each batch before parsing the next
+        for batch in iter_insert_batches(file_path):
+            data_dataframes = inserts_to_dataframe(batch)
 
-    print(f"🧠 Total rows extracted from INSERT statements: {len(all_inserts)}")
+            for key, df in data_dataframes.items():
+                offset = table_row_counts.get(key, 0)
+                df.index += offset
+                table_row_counts[key] = offset + len(df)
 
-    # Convert INSERT statements to DataFrames
-    data_dataframes = inserts_to_dataframe(all_inserts)
-    print(f"📊 Created DataFrames for {len(data_dataframes)} tables")
+            # Generate data chunks and store them in ChromaDB
+            data_chunks = chunk_data(data_dataframes)
+            store_data(data_chunks, config)
 
-    # Print summary of data loaded
-    for key, df in data_dataframes.items():
-        print(f"  - {key}: {len(df)} rows")
+    print(f"🧠 Total rows extracted from INSERT statements: {sum(table_row_counts.values())}")
+    print(f"📊 Created DataFrames for {len(table_row_counts)} tables")
 
-    # Generate and count data chunks
-    data_chunks = chunk_data(data_dataframes)
+    # Print summary of data loaded
+    for key, count in table_row_counts.items():
+        print(f"  - {key}: {count} rows")
 
-    # Store data in ChromaDB
-    store_data(data_chunks, config)
     print(f"✅ Data loaded and stored successfully")
 
 
@@ -1,8 +1,296 @@
-from docx import Document
-import re
 import pandas as pd
-import json
+import numpy as np
+import hashlib
+import mmap
 import os
+import re
+import zipfile
+from decimal import Decimal
+from pandas.api.types import union_categoricals
+from xml.etree import ElementTree
+
+from parsers.dump_index import load_index, sniff_dialect, split_ranges, table_ranges
+from parsers.file_formats import file_type, is_compressed, open_decompressed
+from parsers.parse_cache import cached_parse
+from parsers.sql_insert_parser import PARSER_VERSION, InsertStatementParser, detect_dialect
+from parsers.text_encoding import decode_chunks, is_ascii_compatible, sniff_encoding
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Bytes of input handed to the parser per step when streaming a file
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Default number of parsed rows per yielded batch
+DEFAULT_BATCH_SIZE = 10000
+
+# WordprocessingML element names
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_T, _W_TAB = _W + "body", _W + "p", _W + "t", _W + "tab"
+_W_LINE_BREAKS = (_W + "br", _W + "cr")
+
+# Quoted values that look like ISO dates or timestamps without a time zone
+_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,9})?)?)?")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_BOOLEAN_WORDS = {"true": True, "false": False}
+
+# Decimal literals up to this many characters fit a float64 without losing digits
+_MAX_FLOAT_LITERAL = 16
+
+# Text columns with at most this share of distinct values are stored as categoricals
+_CATEGORY_MAX_SHARE = 0.5
+
+_PANDAS_ISO8601 = int(pd.__version__.split(".")[0]) >= 2
+
+# Text and SQL files at least this large are split and parsed in parallel
+PARALLEL_PARSE_MIN_BYTES = 64 * 1024 * 1024
+
+
+def _slice_column_batch(batch, start, stop):
+    """
+    Return rows start:stop of a column batch as a new column batch
+    """
+    return {
+        "schema_name": batch["schema_name"],
+        "table_name": batch["table_name"],
+        "columns": batch["columns"],
+        "column_values": [column[start:stop] for column in batch["column_values"]],
+        "quoted": batch["quoted"],
+        "row_count": stop - start,
+    }
+
+
+def _rebatch(column_batches, batch_size):
+    """
+    Regroup column batches into lists holding at most batch_size rows in total
+    """
+    pending = []
+    pending_rows = 0
+
+    for batch in column_batches:
+        start = 0
+        while start < batch["row_count"]:
+            take = min(batch_size - pending_rows, batch["row_count"] - start)
+            if take == batch["row_count"]:
+                pending.append(batch)
+            else:
+                pending.append(_slice_column_batch(batch, start, start + take))
+            pending_rows += take
+            start += take
+
+            if pending_rows == batch_size:
+                yield pending
+                pending = []
+                pending_rows = 0
+
+    if pending:
+        yield pending
+
+
+def _iter_text_chunks(file_path, chunk_size=STREAM_CHUNK_SIZE, ranges=None):
+    """
+    Yield the decoded text of a file piece by piece
+
+    The encoding is detected once from the start of the file and the file is
+    then decoded in a single pass. Plain files are read through a memory map;
+    if ranges is given, only those [start, end) byte ranges are read, in
+    order. Compressed files are decompressed as a stream and can only be read
+    whole.
+    """
+    encoding = sniff_encoding(file_path)
+
+    if is_compressed(file_path):
+        if ranges is not None:
+            raise ValueError(f"Byte ranges can't be read from compressed file {file_path}")
+        with open_decompressed(file_path) as stream:
+            def pieces():
+                offset = 0
+                for data in iter(lambda: stream.read(chunk_size), b''):
+                    yield offset, data
+                    offset += len(data)
+            yield from decode_chunks(file_path, pieces(), encoding)
+        return
+
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if ranges is None:
+                ranges = [(0, len(mapped))]
+            yield from decode_chunks(file_path, (
+                (start, mapped[start:min(start + chunk_size, range_end)])
+                for range_start, range_end in ranges
+                for start in range(range_start, range_end, chunk_size)
+            ), encoding)
+
+
+def _is_byte_addressable(file_path):
+    """
+    True if statements of a text or SQL file can be located by byte offset:
+    the file is stored uncompressed in an ASCII-compatible encoding
+    """
+    return not is_compressed(file_path) and is_ascii_compatible(sniff_encoding(file_path))
+
+
+def _parse_text_file(file_path, ranges=None):
+    """
+    Parse a plain text or SQL file incrementally, yielding column batches
+
+    If ranges is given, only statements inside those byte ranges are parsed.
+    The dialect is detected from the start of the file, so every range of a
+    dump is read the same way.
+    """
+    schema_name = os.path.basename(file_path).split('.')[0]
+    dialect = sniff_dialect(file_path)
+    if ranges is None:
+        logger.debug("Reading %s as %s SQL", file_path, dialect)
+    parser = InsertStatementParser(schema_name, dialect)
+
+    for text in _iter_text_chunks(file_path, ranges=ranges):
+        yield from parser.feed(text)
+    yield from parser.close()
+
+    if parser.rows_skipped:
+        logger.warning("Skipped %s rows with mismatched column counts in %s", parser.rows_skipped, file_path)
+
+
+def parse_file_piece(file_path, start, end):
+    """
+    Parse the statements in one byte range of a text or SQL file
+
+    Runs in a worker process; start and end come from split_ranges, so the
+    range begins and ends between statements.
+
+    Returns:
+        list: Column batches of the range, in file order
+    """
+    return list(_parse_text_file(file_path, ranges=[(start, end)]))
+
+
+def _parse_text_file_parallel(file_path, executor, workers):
+    """
+    Parse a large text or SQL file as independent pieces on an executor,
+    yielding column batches in file order
+    """
+    # Twice as many pieces as workers evens out pieces that parse slowly
+    pieces = split_ranges(file_path, workers * 2)
+    logger.debug("Parsing %s in %s pieces", file_path, len(pieces))
+
+    futures = [executor.submit(parse_file_piece, file_path, start, end) for start, end in pieces]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def should_parse_in_pieces(file_path):
+    """
+    True for text and SQL files large enough to be worth parsing in parallel
+
+    Compressed and UTF-16/UTF-32 files can't be split at byte offsets, so
+    they are always parsed as a single stream.
+    """
+    return (file_type(file_path) in ['txt', 'sql'] and os.path.getsize(file_path) >= PARALLEL_PARSE_MIN_BYTES
+            and _is_byte_addressable(file_path))
+
+
+def _iter_docx_text(file_path, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield the text of a Word document piece by piece, straight from the zip
+
+    word/document.xml is read with iterparse, so only the paragraph being
+    read is held in memory. Paragraphs in the body and in table cells are
+    produced in document order, each followed by a newline.
+    """
+    pieces = []
+    size = 0
+    body = None
+
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as xml:
+            for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    if tag == _W_BODY:
+                        body = elem
+                    continue
+
+                if tag == _W_T:
+                    if elem.text:
+                        pieces.append(elem.text)
+                        size += len(elem.text)
+                elif tag == _W_TAB:
+                    pieces.append("\t")
+                elif tag in _W_LINE_BREAKS:
+                    pieces.append("\n")
+                elif tag == _W_P:
+                    pieces.append("\n")
+                    elem.clear()
+                    if size >= chunk_size:
+                        yield "".join(pieces)
+                        pieces = []
+                        size = 0
+
+                if body is not None and len(body) > 1:
+                    # Drop finished top-level blocks (paragraphs, tables)
+                    del body[:-1]
+
+    if pieces:
+        yield "".join(pieces)
+
+
+def _parse_docx_file(file_path):
+    """
+    Parse the paragraphs and table cells of a Word document incrementally,
+    yielding column batches
+    """
+    schema_name = os.path.basename(file_path).split('.')[0]
+    parser = None
+
+    # Parse with the same tokenizer as the text path
+    for text in _iter_docx_text(file_path):
+        if parser is None:
+            dialect = detect_dialect(text)
+            logger.debug("Reading %s as %s SQL", file_path, dialect)
+            parser = InsertStatementParser(schema_name, dialect)
+        yield from parser.feed(text)
+    if parser is None:
+        return
+    yield from parser.close()
+
+    if parser.rows_skipped:
+        logger.warning("Skipped %s rows with mismatched column counts in %s", parser.rows_skipped, file_path)
+
+
+def _iter_column_batches(file_path):
+    """
+    Yield the column batches of a supported document, going through the parse cache
+    """
+    file_extension = file_type(file_path)
+
+    if file_extension in ['txt', 'sql']:
+        return cached_parse(file_path, lambda: _parse_text_file(file_path))
+    elif file_extension == 'docx':
+        return cached_parse(file_path, lambda: _parse_docx_file(file_path))
+    else:
+        logger.error("Unsupported file type: %s", file_extension)
+        return iter(())
+
+
+def iter_insert_batches_from_text(file_path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Lazily parse a plain text or SQL file
+
+    Args:
+        file_path: Path to the file
+        batch_size: Maximum number of rows per batch
+
+    Yields:
+        list: Column batches holding at most batch_size rows in total
+    """
+    yield from _rebatch(cached_parse(file_path, lambda: _parse_text_file(file_path)), batch_size)
 
 
 def extract_insert_statements_from_text(file_path):
@@ -12,163 +300,16 @@ def extract_insert_statements_from_text(file_path):
     try:
         # Extract schema name from document filename
         schema_name = os.path.basename(file_path).split('.')[0]
-        print(f"DEBUG: Extracting from text file: {file_path}, Schema: {schema_name}")
-
-        # Read file content with different encodings for better compatibility
-        encodings = ['utf-8', 'latin-1', 'cp1252']
-        content = None
-
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    content = file.read()
-                    print(f"DEBUG: Successfully read file with {encoding} encoding")
-                    break
-            except UnicodeDecodeError:
-                continue
-
-        if content is None:
-            print(f"ERROR: Could not read file {file_path} with any encoding")
-            return []
+        logger.debug("Extracting from text file: %s, Schema: %s", file_path, schema_name)
 
-        # Find all INSERT statements
-        insert_statements = re.findall(
-            r"(INSERT\s+INTO[\s\S]+?;)",
-            content,
-            re.IGNORECASE | re.MULTILINE
-        )
-
-        print(f"DEBUG: Found {len(insert_statements)} INSERT statements in {file_path}")
-
-        parsed_inserts = []
-        for idx, stmt in enumerate(insert_statements):
-            print(f"DEBUG: Processing statement {idx + 1}/{len(insert_statements)}")
-
-            # Extract table name
-            table_match = re.search(r"INSERT\s+INTO\s+(?:(\w+)\.)?(\w+)", stmt, re.IGNORECASE)
-            if not table_match:
-                print(f"DEBUG: No table name found in statement {idx + 1}")
-                continue
-
-            schema_prefix = table_match.group(1) or schema_name
-            table_name = table_match.group(2)
-            print(f"DEBUG: Table: {table_name}, Schema: {schema_prefix}")
-
-            # Extract column names if present
-            column_match = re.search(r"INSERT\s+INTO\s+[\w\.]+\s*\(([^)]+)\)", stmt, re.IGNORECASE)
-            columns = []
-            if column_match:
-                columns_str = column_match.group(1)
-                columns = [col.strip().strip('`[]"\' ') for col in columns_str.split(',')]
-                print(f"DEBUG: Columns found: {columns}")
-            else:
-                print(f"DEBUG: No columns specified in INSERT statement")
-
-            # Extract values section
-            values_section_match = re.search(r"VALUES\s*(.*?)(?:;|$)", stmt, re.IGNORECASE | re.DOTALL)
-            if values_section_match:
-                values_section = values_section_match.group(1)
-                # Find all value sets - improved regex to handle nested parentheses
-                value_sets = []
-                temp_value = ""
-                paren_count = 0
-                in_string = False
-
-                for char in values_section:
-                    if char in ["'", '"'] and (not temp_value or temp_value[-1] != '\\'):
-                        in_string = not in_string
-
-                    if not in_string:
-                        if char == '(':
-                            paren_count += 1
-                        elif char == ')':
-                            paren_count -= 1
-
-                    temp_value += char
-
-                    if paren_count == 0 and char == ')':
-                        # Extract the content between parentheses
-                        value_content = re.search(r'\((.*)\)', temp_value)
-                        if value_content:
-                            value_sets.append(value_content.group(1))
-                        temp_value = ""
-
-                print(f"DEBUG: Found {len(value_sets)} value sets")
-
-                for values_str in value_sets:
-                    # Parse values more robustly
-                    values = []
-                    in_string = False
-                    current_value = ""
-                    quote_char = None
-
-                    i = 0
-                    while i < len(values_str):
-                        char = values_str[i]
-
-                        if not in_string:
-                            if char in ["'", '"']:
-                                in_string = True
-                                quote_char = char
-                                current_value = ""
-                            elif char == ',':
-                                if current_value.strip():
-                                    values.append(current_value.strip())
-                                current_value = ""
-                            else:
-                                current_value += char
-                        else:
-                            if char == quote_char and (i + 1 >= len(values_str) or values_str[i + 1] != quote_char):
-                                in_string = False
-                                values.append(current_value)
-                                current_value = ""
-                                quote_char = None
-                            elif char == quote_char and i + 1 < len(values_str) and values_str[i + 1] == quote_char:
-                                current_value += char
-                                i += 1  # Skip the escaped quote
-                            else:
-                                current_value += char
-
-                        i += 1
-
-                    # Add the last value
-                    if current_value.strip():
-                        values.append(current_value.strip())
-
-                    # Clean values
-                    cleaned_values = []
-                    for val in values:
-                        val = val.strip()
-                        if val.lower() == "null":
-                            val = None
-                        elif val.startswith("'") and val.endswith("'"):
-                            val = val[1:-1].replace("''", "'")  # Handle escaped quotes
-                        elif val.startswith('"') and val.endswith('"'):
-                            val = val[1:-1].replace('""', '"')  # Handle escaped quotes
-                        cleaned_values.append(val)
-
-                    # If no columns were specified, create generic ones
-                    if not columns:
-                        columns = [f"column_{i + 1}" for i in range(len(cleaned_values))]
-
-                    # Create data entry
-                    if len(columns) == len(cleaned_values):
-                        parsed_inserts.append({
-                            "schema_name": schema_prefix,
-                            "table_name": table_name,
-                            "columns": columns,
-                            "values": cleaned_values,
-                            "raw_statement": stmt[:100] + "..." if len(stmt) > 100 else stmt
-                        })
-                    else:
-                        print(
-                            f"WARNING: Column count ({len(columns)}) doesn't match value count ({len(cleaned_values)})")
-
-        print(f"DEBUG: Successfully extracted {len(parsed_inserts)} rows from {file_path}")
+        parsed_inserts = list(cached_parse(file_path, lambda: _parse_text_file(file_path)))
+
+        row_count = sum(insert["row_count"] for insert in parsed_inserts)
+        logger.debug("Successfully extracted %s rows from %s", row_count, file_path)
         return parsed_inserts
 
     except Exception as e:
-        print(f"ERROR: Failed to process text file {file_path}: {e}")
+        logger.error("Failed to process text file %s: %s", file_path, e)
         import traceback
         traceback.print_exc()
         return []
@@ -177,123 +318,354 @@ def extract_insert_statements_from_text(file_path):
 def extract_insert_statements(file_path):
     """
     Extract INSERT statements from a document, automatically detecting file type
+
+    Returns:
+        list: Column batches, each a dict with schema_name, table_name, columns,
+              column_values (one list per column) and row_count
     """
     try:
-        # Determine file type based on extension
-        file_extension = file_path.lower().split('.')[-1]
-        print(f"DEBUG: Processing file {file_path} with extension: {file_extension}")
-
-        # Extract schema name from document filename
-        schema_name = os.path.basename(file_path).split('.')[0]
+        # Determine file type based on extension, looking through compression suffixes
+        file_extension = file_type(file_path)
+        logger.debug("Processing file %s with extension: %s", file_path, file_extension)
 
         if file_extension == 'docx':
-            print(f"DEBUG: Processing as DOCX file")
+            logger.debug("Processing as DOCX file")
             # Process Word document
-            doc = Document(file_path)
-            full_text = "\n".join([para.text for para in doc.paragraphs])
-
-            # Find all INSERT statements
-            insert_statements = re.findall(r"(INSERT\s+INTO[\s\S]+?;)", full_text, re.IGNORECASE)
-
-            print(f"Found {len(insert_statements)} INSERT statements in {file_path}")
-
-            parsed_inserts = []
-            for stmt in insert_statements:
-                # Extract table name
-                table_match = re.search(r"INSERT\s+INTO\s+(?:(\w+)\.)?(\w+)", stmt, re.IGNORECASE)
-                if not table_match:
-                    continue
+            parsed_inserts = list(_iter_column_batches(file_path))
 
-                schema_prefix = table_match.group(1) or schema_name
-                table_name = table_match.group(2)
-
-                # Extract column names if present
-                column_match = re.search(r"INSERT\s+INTO\s+[\w\.]+\s*\(([^)]+)\)", stmt, re.IGNORECASE)
-                columns = []
-                if column_match:
-                    columns = [col.strip().strip('`[]"\' ') for col in column_match.group(1).split(',')]
-                    print(f"  Extracted columns for {table_name}: {columns}")
-                else:
-                    print(f"  No columns found in INSERT statement for {table_name}")
-
-                # Extract values section
-                values_section_match = re.search(r"VALUES\s*(.*?);", stmt, re.IGNORECASE | re.DOTALL)
-                if values_section_match:
-                    values_section = values_section_match.group(1)
-                    value_sets = re.findall(r"\(([^)]+)\)", values_section)
-
-                    for values_str in value_sets:
-                        # Parse values
-                        values = []
-                        in_string = False
-                        current_value = ""
-
-                        for char in values_str:
-                            if char == "'" and (len(current_value) == 0 or current_value[-1] != '\\'):
-                                in_string = not in_string
-                                current_value += char
-                            elif char == ',' and not in_string:
-                                values.append(current_value.strip())
-                                current_value = ""
-                            else:
-                                current_value += char
-
-                        # Add the last value
-                        if current_value.strip():
-                            values.append(current_value.strip())
-
-                        # Clean values
-                        cleaned_values = []
-                        for val in values:
-                            val = val.strip()
-                            if val.startswith("'") and val.endswith("'"):
-                                val = val[1:-1]
-                            elif val.lower() == "null":
-                                val = None
-                            cleaned_values.append(val)
-
-                        # If no columns were specified, create generic ones
-                        if not columns:
-                            columns = [f"column_{i + 1}" for i in range(len(cleaned_values))]
-
-                        # Create data entry
-                        if len(columns) == len(cleaned_values):
-                            parsed_inserts.append({
-                                "schema_name": schema_prefix,
-                                "table_name": table_name,
-                                "columns": columns,
-                                "values": cleaned_values,
-                                "raw_statement": stmt
-                            })
-
-            print(f"Extracted {len(parsed_inserts)} rows from INSERT statements in {file_path}")
+            row_count = sum(insert["row_count"] for insert in parsed_inserts)
+            logger.info("Extracted %s rows from INSERT statements in %s", row_count, file_path)
             return parsed_inserts
 
         elif file_extension in ['txt', 'sql']:
-            print(f"DEBUG: Processing as {file_extension.upper()} file")
+            logger.debug("Processing as %s file", file_extension.upper())
             result = extract_insert_statements_from_text(file_path)
-            print(f"DEBUG: Extracted {len(result)} statements from {file_extension} file")
+            logger.debug("Extracted %s column batches from %s file", len(result), file_extension)
             return result
         else:
-            print(f"ERROR: Unsupported file type: {file_extension}")
+            logger.error("Unsupported file type: %s", file_extension)
             return []
 
     except Exception as e:
-        print(f"ERROR: Failed to process file {file_path}: {e}")
+        logger.error("Failed to process file %s: %s", file_path, e)
         import traceback
         traceback.print_exc()
         return []
 
 
-def inserts_to_dataframe(insert_list):
+def iter_insert_batches(file_path, batch_size=DEFAULT_BATCH_SIZE):
     """
-    Convert INSERT statements to a pandas DataFrame using actual column names
+    Lazily extract INSERT rows from a document, automatically detecting file type
+
+    Text and SQL files are memory-mapped and parsed incrementally, so peak
+    memory depends on batch_size rather than on the size of the file. Files
+    parsed before are read back from the parse cache instead.
+
+    Args:
+        file_path: Path to the document
+        batch_size: Maximum number of rows per batch
+
+    Yields:
+        list: Column batches holding at most batch_size rows in total
+    """
+    yield from _rebatch(_iter_column_batches(file_path), batch_size)
+
+
+def iter_table_batches(file_path, table, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Lazily extract the INSERT rows of a single table from a document
+
+    For uncompressed text and SQL files in an ASCII-compatible encoding the
+    table's statements are located through the dump's byte-offset index, so
+    only those ranges are read and parsed.
+
+    Args:
+        file_path: Path to the document
+        table: Table name, matched in any schema
+        batch_size: Maximum number of rows per batch
+
+    Yields:
+        list: Column batches of the table holding at most batch_size rows in total
+    """
+    if file_type(file_path) in ['txt', 'sql'] and _is_byte_addressable(file_path):
+        column_batches = _parse_text_file(file_path, ranges=table_ranges(file_path, table))
+    else:
+        column_batches = _iter_column_batches(file_path)
+
+    yield from _rebatch((batch for batch in column_batches if batch["table_name"] == table), batch_size)
+
+
+def list_tables(file_path):
+    """
+    Names of the tables a document has INSERT rows for
+
+    Text and SQL files that can be located by byte offset are answered from
+    the dump index without parsing any rows.
+
+    Args:
+        file_path: Path to the document
+
+    Returns:
+        set: Table names
+    """
+    if file_type(file_path) in ['txt', 'sql'] and _is_byte_addressable(file_path):
+        return {entry["table"] for entry in load_index(file_path)["tables"].values() if entry["ranges"]}
+    return {insert["table_name"] for insert in extract_insert_statements(file_path) if insert.get("table_name")}
+
+
+def table_content_digests(file_path, tables):
+    """
+    Digest the input each table's rows are parsed from, without parsing them
+
+    For uncompressed text and SQL files in an ASCII-compatible encoding only
+    the table's statements, located through the dump index, are hashed, so a
+    change to one table leaves the digests of the others unchanged. Other
+    files are hashed whole and every table gets the file's digest.
+
+    Args:
+        file_path: Path to the document
+        tables: Table names, matched in any schema
+
+    Returns:
+        dict: Hex digest per table
+    """
+    def new_digest():
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{PARSER_VERSION}:{file_type(file_path)}:".encode())
+        return digest
+
+    if not (file_type(file_path) in ['txt', 'sql'] and _is_byte_addressable(file_path)):
+        digest = new_digest()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(STREAM_CHUNK_SIZE), b''):
+                digest.update(block)
+        return {table: digest.hexdigest() for table in tables}
+
+    ranges = {table: [] for table in tables}
+    for entry in load_index(file_path)["tables"].values():
+        if entry["table"] in ranges:
+            ranges[entry["table"]].extend(entry["ranges"])
+
+    # The dialect and encoding are read from the start of the file and decide
+    # how the statements parse
+    header = f"{sniff_dialect(file_path)}:{sniff_encoding(file_path)}:".encode()
+    digests = {}
+    with open(file_path, 'rb') as file:
+        for table, spans in ranges.items():
+            digest = new_digest()
+            digest.update(header)
+            for range_start, range_end in sorted(spans):
+                file.seek(range_start)
+                remaining = range_end - range_start
+                while remaining > 0:
+                    block = file.read(min(STREAM_CHUNK_SIZE, remaining))
+                    if not block:
+                        break
+                    digest.update(block)
+                    remaining -= len(block)
+                # Mark where each statement ends, so bytes moved between statements change the digest
+                digest.update(b"\0")
+            digests[table] = digest.hexdigest()
+    return digests
+
+
+def extract_dataframes(file_path, executor=None, workers=1, infer_types=True):
+    """
+    Build DataFrames for every table in a document
+
+    Column types are inferred once per table over all of its rows, so they
+    don't depend on how the parser batched the rows.
+
+    Args:
+        file_path: Path to the document
+        executor: Optional process pool; large text and SQL files are split at
+                  statement boundaries and their pieces parsed on it
+        workers: Number of workers in the executor
+        infer_types: False to keep every value as its literal text
+
+    Returns:
+        dict: DataFrames keyed by schema.table
+    """
+    if executor is not None and workers > 1 and should_parse_in_pieces(file_path):
+        column_batches = cached_parse(file_path, lambda: _parse_text_file_parallel(file_path, executor, workers))
+    else:
+        column_batches = _iter_column_batches(file_path)
+
+    return inserts_to_dataframe(list(column_batches), infer_types=infer_types)
+
+
+def _part_kind(column):
+    """dtype of one part's column, telling object columns apart by the values they hold"""
+    if column.dtype == object:
+        return "object:" + pd.api.types.infer_dtype(column, skipna=True)
+    return str(column.dtype)
+
+
+def _literal_texts(column):
+    """Values of a typed column as the SQL literal text they were inferred from, None where missing"""
+    values = column.astype(object).where(column.notna(), None)
+    if pd.api.types.is_bool_dtype(column):
+        return [None if value is None else str(value).lower() for value in values]
+    return [None if value is None else str(value) for value in values]
+
+
+def _concat_parts(parts):
+    """
+    Concatenate DataFrames of one table, such as those of several files,
+    keeping each column's type consistent
+
+    pd.concat turns categoricals with different categories into object
+    columns, so such columns are combined with union_categoricals instead.
+    Columns typed differently by different parts, such as integers in one
+    and only NULLs in another, are typed again over all of their values.
+    """
+    df = pd.concat(parts, ignore_index=True)
+    df.attrs = dict(parts[0].attrs)
+
+    if any(list(part.columns) != list(df.columns) for part in parts):
+        return df
+
+    for i in range(df.shape[1]):
+        if isinstance(df.iloc[:, i].dtype, pd.CategoricalDtype):
+            continue
+        columns = [part.iloc[:, i] for part in parts]
+        kinds = {_part_kind(column) for column in columns}
+        if len(kinds) == 1 and "category" not in kinds:
+            continue
+        # Parts that stayed text (e.g. a short last batch) join the categorical
+        if all(isinstance(column.dtype, pd.CategoricalDtype)
+               or pd.api.types.infer_dtype(column, skipna=True) in ("string", "empty")
+               for column in columns):
+            if "category" in kinds:
+                categorical = union_categoricals([column.astype("category") for column in columns])
+                df.isetitem(i, pd.Series(categorical, index=df.index))
+            continue
+        quoted = any(column.dtype.kind == "M" or isinstance(column.dtype, pd.CategoricalDtype)
+                     or pd.api.types.infer_dtype(column, skipna=True) == "string" for column in columns)
+        typed = _infer_column([text for column in columns for text in _literal_texts(column)], quoted)
+        df.isetitem(i, typed.set_axis(df.index))
+
+    return df
+
+
+def merge_dataframes(dataframe_dicts):
+    """
+    Combine several {schema.table: DataFrame} dictionaries, concatenating
+    DataFrames that share a key in the order they are given
+    """
+    parts_by_key = {}
+    for dataframes in dataframe_dicts:
+        for key, df in dataframes.items():
+            parts_by_key.setdefault(key, []).append(df)
+
+    return {
+        key: parts[0] if len(parts) == 1 else _concat_parts(parts)
+        for key, parts in parts_by_key.items()
+    }
+
+
+def _infer_unquoted_column(series, non_null):
+    """
+    Type a column of bare SQL literals: integers, floats, decimals or booleans
+
+    Anything else, such as CURRENT_TIMESTAMP or NOW(), is a keyword or
+    expression and keeps the column as strings.
+    """
+    try:
+        numbers = pd.to_numeric(non_null)
+    except (ValueError, TypeError):
+        numbers = None
+
+    # to_numeric also accepts words such as nan and inf, which are not SQL numbers
+    if numbers is not None and set("".join(non_null)) <= _NUMBER_CHARS:
+        if numbers.dtype.kind == "i":
+            if len(non_null) == len(series):
+                return numbers
+            data = np.zeros(len(series), dtype=numbers.dtype)
+            mask = series.isna().to_numpy()
+            data[~mask] = numbers.to_numpy()
+            return pd.Series(pd.arrays.IntegerArray(data, mask), index=series.index)
+        if numbers.dtype.kind == "f" and max(map(len, non_null)) <= _MAX_FLOAT_LITERAL:
+            return numbers.reindex(series.index)
+        # Too many digits for int64 or float64: keep exact values
+        return series.map(Decimal, na_action="ignore")
+
+    unique_values = pd.unique(non_null)
+    if len(unique_values) <= 4 and all(str(value).lower() in _BOOLEAN_WORDS for value in unique_values):
+        booleans = non_null.str.lower().map(_BOOLEAN_WORDS)
+        if len(non_null) == len(series):
+            return booleans.astype(bool)
+        return booleans.reindex(series.index).astype("boolean")
+
+    return series
+
+
+def _infer_quoted_column(series, non_null):
+    """
+    Type a column containing quoted literals: timestamps or strings
+    """
+    if _TIMESTAMP_RE.fullmatch(non_null.iloc[0]) and non_null.str.fullmatch(_TIMESTAMP_RE.pattern).all():
+        if _PANDAS_ISO8601:
+            timestamps = pd.to_datetime(non_null, errors="coerce", format="ISO8601")
+        else:
+            timestamps = pd.to_datetime(non_null, errors="coerce")
+        if timestamps.notna().all():
+            return timestamps.reindex(series.index)
+
+    return series
+
+
+def _infer_column(values, quoted):
+    """
+    Convert one column of parsed values to a native or nullable dtype
+
+    Args:
+        values: Parsed values (str or None)
+        quoted: True if any value in the column was a quoted literal
+
+    Returns:
+        Series: int64/Int64, float64, Decimal, bool/boolean, datetime64,
+                category or object (str) values, with None/NA for SQL NULL
+    """
+    series = pd.Series(values, dtype=object)
+    non_null = series.dropna()
+    if non_null.empty:
+        return series
+
+    if quoted:
+        typed = _infer_quoted_column(series, non_null)
+    else:
+        typed = _infer_unquoted_column(series, non_null)
+
+    if typed is series:
+        return _text_column(series, non_null)
+    return typed
+
+
+def _text_column(series, non_null):
+    """
+    Keep a column as text; columns such as status codes or CURRENT_TIMESTAMP
+    are stored as categoricals when few of their values are distinct
+    """
+    if len(non_null) and non_null.nunique() <= len(non_null) * _CATEGORY_MAX_SHARE:
+        return series.astype("category")
+    return series
+
+
+def inserts_to_dataframe(insert_list, infer_types=True):
+    """
+    Convert column batches of INSERT rows to pandas DataFrames using actual column names
+
+    The schema and table of each DataFrame are kept in df.attrs["schema"]
+    and df.attrs["table"] rather than in per-row columns. With infer_types
+    False, every value keeps its literal text, as comparing values as text
+    needs.
     """
     if not insert_list:
-        print("DEBUG: No inserts to convert to dataframe")
+        logger.debug("No inserts to convert to dataframe")
         return {}
 
-    # Group by schema and table
+    # Group batches by schema and table
     grouped_data = {}
 
     for insert in insert_list:
@@ -308,53 +680,65 @@ def inserts_to_dataframe(insert_list):
                 "schema": schema_name,
                 "table": table_name,
                 "columns": columns,
-                "data": []
+                "batches": []
             }
 
         # Ensure columns are consistent
         if grouped_data[key]["columns"] != columns:
-            print(f"⚠️ Warning: Inconsistent columns for {key}:")
-            print(f"  Existing: {grouped_data[key]['columns']}")
-            print(f"  New: {columns}")
+            logger.warning("⚠️ Inconsistent columns for %s: existing %s, new %s",
+                           key, grouped_data[key]['columns'], columns)
             # Use the longer column list
             if len(columns) > len(grouped_data[key]["columns"]):
                 grouped_data[key]["columns"] = columns
 
-        grouped_data[key]["data"].append(insert["values"])
+        grouped_data[key]["batches"].append(insert)
 
     # Convert to DataFrames using actual column names
     dataframes = {}
 
     for key, group in grouped_data.items():
-        if group["data"]:
-            try:
-                column_names = group["columns"]
-                print(f"DEBUG: Creating DataFrame for {key} with columns: {column_names}")
-
-                # Ensure all rows have the same number of values as columns
-                cleaned_data = []
-                for row in group["data"]:
-                    if len(row) == len(column_names):
-                        cleaned_data.append(row)
-                    elif len(row) < len(column_names):
-                        # Pad with None values
-                        cleaned_data.append(row + [None] * (len(column_names) - len(row)))
-                    else:
-                        # Truncate extra values
-                        cleaned_data.append(row[:len(column_names)])
-
-                df = pd.DataFrame(cleaned_data, columns=column_names)
-                df["__schema__"] = group["schema"]
-                df["__table__"] = group["table"]
-                dataframes[key] = df
-
-                print(f"DEBUG: Created DataFrame for {key} with shape: {df.shape}")
-            except Exception as e:
-                print(f"ERROR: Failed to create DataFrame for {key}: {e}")
-                import traceback
-                traceback.print_exc()
-
-    print(f"DEBUG: Created {len(dataframes)} dataframes from inserts")
+        try:
+            column_names = group["columns"]
+            batches = group["batches"]
+            logger.debug("Creating DataFrame for %s with columns: %s", key, column_names)
+
+            if len(batches) == 1 and len(batches[0]["columns"]) == len(column_names):
+                column_data = batches[0]["column_values"]
+                quoted = batches[0]["quoted"]
+            else:
+                # Concatenate batches column by column, padding narrower batches with None
+                column_data = [[] for _ in column_names]
+                quoted = [False] * len(column_names)
+                for batch in batches:
+                    values = batch["column_values"]
+                    for i, column in enumerate(column_data):
+                        if i < len(values):
+                            column.extend(values[i])
+                            quoted[i] = quoted[i] or batch["quoted"][i]
+                        else:
+                            column.extend([None] * batch["row_count"])
+
+            # Type each column, building positionally so that repeated column names survive
+            if infer_types:
+                df = pd.DataFrame({
+                    i: _infer_column(column, quoted[i]) for i, column in enumerate(column_data)
+                })
+            else:
+                df = pd.DataFrame({
+                    i: _text_column(series, series.dropna())
+                    for i, series in enumerate(pd.Series(column, dtype=object) for column in column_data)
+                })
+            df.columns = column_names
+            df.attrs = {"schema": group["schema"], "table": group["table"]}
+            dataframes[key] = df
+
+            logger.debug("Created DataFrame for %s with shape: %s", key, df.shape)
+        except Exception as e:
+            logger.error("Failed to create DataFrame for %s: %s", key, e)
+            import traceback
+            traceback.print_exc()
+
+    logger.debug("Created %s dataframes from inserts", len(dataframes))
     return dataframes
 
 
@@ -365,19 +749,14 @@ def organize_by_schema(dataframes):
     organized = {}
 
     for key, df in dataframes.items():
-        schema = df["__schema__"].iloc[0]
-        table = df["__table__"].iloc[0]
+        schema = df.attrs["schema"]
+        table = df.attrs["table"]
 
         if schema not in organized:
             organized[schema] = {}
 
-        # Remove __schema__ and __table__ columns but preserve all other columns
-        columns_to_drop = ["__schema__", "__table__"]
-        columns_to_keep = [col for col in df.columns if col not in columns_to_drop]
-
-        cleaned_df = df[columns_to_keep]
-        print(f"DEBUG: Organizing table {table} in schema {schema} with columns: {list(cleaned_df.columns)}")
+        logger.debug("Organizing table %s in schema %s with columns: %s", table, schema, list(df.columns))
 
-        organized[schema][table] = cleaned_df
+        organized[schema][table] = df
 
     return organized
\ No newline at end of file
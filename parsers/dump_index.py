@@ -0,0 +1,289 @@
+import bisect
+import codecs
+import json
+import mmap
+import os
+import re
+
+from parsers.sql_insert_parser import detect_dialect, parse_copy_header, parse_insert_header
+from parsers.text_encoding import read_text_sample, sniff_encoding
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Bump whenever the index layout or the statement scan changes
+INDEX_VERSION = 4
+
+SIDECAR_SUFFIX = ".index.json"
+
+# A statement start is recorded roughly this often, giving safe points at
+# which a dump can be split for parallel parsing
+BOUNDARY_SPACING = 4 * 1024 * 1024
+
+# Bytes read from the start of a dump to detect its dialect
+DIALECT_SNIFF_BYTES = 64 * 1024
+
+
+def _compile_scan(backslash_escapes):
+    """Compile the statement scan patterns for one quoting style"""
+    if backslash_escapes:
+        squote = rb"""'[^'\\]*+(?:(?:''|\\.)[^'\\]*+)*+'"""
+        dquote = rb'"[^"\\]*+(?:(?:""|\\.)[^"\\]*+)*+"'
+    else:
+        squote = rb"""'[^']*+(?:''[^']*+)*+'"""
+        dquote = rb'"[^"]*+(?:""[^"]*+)*+"'
+
+    # One token between statements, mirroring the INSERT tokenizer: whitespace,
+    # comments and quoted text are skipped whole so that an INSERT keyword inside
+    # them is never mistaken for the start of a statement
+    gap_token = re.compile(rb"""
+          \s++
+        | --[^\n]*+\n
+        | /\*.*?\*/
+        | %s
+        | %s
+        | `[^`]*+(?:``[^`]*+)*+`
+        | \[[^\]]*+\]
+        | [(),;]
+        | (?P<word>[^\s'"`\[(),;]++)
+        | .
+    """ % (squote, dquote), re.VERBOSE | re.DOTALL)
+
+    # The rest of a statement up to (not including) its terminating semicolon.
+    # Quotes, identifiers and comments are consumed whole; an unterminated one is
+    # treated as a plain character, as the tokenizer does at the end of input.
+    statement_body = re.compile(rb"""(?:
+          [^;'"`\[/-]++
+        | %s
+        | %s
+        | `[^`]*+(?:``[^`]*+)*+`
+        | \[[^\]]*+\]
+        | --[^\n]*+\n
+        | /\*.*?\*/
+        | [-/'"`\[]
+    )*+""" % (squote, dquote), re.VERBOSE | re.DOTALL)
+
+    return gap_token, statement_body
+
+
+# Scan patterns keyed by whether backslashes escape characters in quoted literals
+_SCAN = {False: _compile_scan(False), True: _compile_scan(True)}
+
+# The line ending a COPY data block
+_COPY_END_RE = re.compile(rb"^\\\.\r?$\n?", re.M)
+
+# The common header shape: INSERT [modifiers] INTO name followed by a column
+# list or VALUES. Anything else is resolved by the parser itself.
+_NAME_PART = rb"""(?:`[^`]*+`|"[^"]*+"|\[[^\]]*+\]|[^\s'"`\[(),;]++)"""
+_FAST_HEADER_RE = re.compile(rb"""
+    INSERT\s++(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE)\s++)*+INTO\s++
+    (%s(?:\s*+\.\s*+%s)*+)\s*+(?=\(|VALUES?\b)
+""" % (_NAME_PART, _NAME_PART), re.VERBOSE | re.IGNORECASE)
+
+# Bytes of a statement handed to the header parser when the fast path fails
+_HEADER_PEEK = 64 * 1024
+
+
+def _decode(data, encoding):
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def sniff_dialect(file_path):
+    """
+    Detect the SQL dialect of a dump from its first few kilobytes
+
+    Args:
+        file_path: Path to a .sql or .txt dump, possibly compressed
+
+    Returns:
+        str: One of the parser's DIALECTS
+    """
+    return detect_dialect(read_text_sample(file_path, DIALECT_SNIFF_BYTES))
+
+
+def sidecar_path(file_path):
+    return file_path + SIDECAR_SUFFIX
+
+
+def build_index(file_path):
+    """
+    Scan a SQL dump once and record where each table's INSERT statements
+    and COPY ... FROM stdin blocks are
+
+    Args:
+        file_path: Path to a .sql or .txt dump
+
+    Returns:
+        dict: "tables" holds entries keyed by schema.table, each with schema,
+              table and a list of [start, end) byte ranges in file order;
+              "boundaries" holds statement start offsets usable as split points
+    """
+    default_schema = os.path.basename(file_path).split('.')[0]
+    dialect = sniff_dialect(file_path)
+    encoding = sniff_encoding(file_path)
+    gap_token_re, statement_body_re = _SCAN[dialect == "mysql"]
+    tables = {}
+    boundaries = []
+    next_boundary = BOUNDARY_SPACING
+    last_key = None
+    name_memo = {}
+
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {"tables": tables, "boundaries": boundaries}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            # Skip a UTF-8 byte order mark, which would stick to the first keyword
+            pos = len(codecs.BOM_UTF8) if data[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+            while pos < size:
+                m = gap_token_re.match(data, pos)
+                keyword = m.group().upper() if m.lastgroup == "word" else None
+                if keyword != b"INSERT" and (keyword != b"COPY" or dialect == "mysql"):
+                    pos = m.end()
+                    continue
+
+                start = pos
+                if start >= next_boundary:
+                    boundaries.append(start)
+                    next_boundary = start + BOUNDARY_SPACING
+                end = statement_body_re.match(data, m.end()).end()
+                if end < size:
+                    # Include the terminating semicolon
+                    end += 1
+
+                target = None
+                header = _FAST_HEADER_RE.match(data, start, end) if keyword == b"INSERT" else None
+                if keyword == b"COPY":
+                    line_end = data.find(b"\n", end)
+                    line_end = size if line_end == -1 else line_end + 1
+                    target = parse_copy_header(_decode(data[start:line_end], encoding), default_schema)
+                    if target is not None:
+                        # The data block runs up to and including its terminating line
+                        terminator = _COPY_END_RE.search(data, line_end)
+                        end = terminator.end() if terminator else size
+                elif header:
+                    name = header.group(1)
+                    if name not in name_memo:
+                        name_memo[name] = parse_insert_header(
+                            "INSERT INTO " + _decode(name, encoding) + " VALUES", default_schema)
+                    target = name_memo[name]
+                else:
+                    target = parse_insert_header(
+                        _decode(data[start:min(end, start + _HEADER_PEEK)], encoding), default_schema)
+                    if target is None and end - start > _HEADER_PEEK:
+                        target = parse_insert_header(_decode(data[start:end], encoding), default_schema)
+
+                if target is not None:
+                    schema, table = target
+                    key = f"{schema}.{table}"
+                    entry = tables.setdefault(key, {"schema": schema, "table": table, "ranges": []})
+                    if key == last_key:
+                        # Consecutive statements of one table form a single range
+                        entry["ranges"][-1][1] = end
+                    else:
+                        entry["ranges"].append([start, end])
+                    last_key = key
+                else:
+                    last_key = None
+                pos = end
+
+    return {"tables": tables, "boundaries": boundaries}
+
+
+def load_index(file_path):
+    """
+    Return the table index of a dump, reusing its sidecar file when it is current
+
+    The sidecar is rebuilt whenever the dump's size or modification time
+    changes. If it can't be written, the index is still returned.
+
+    Args:
+        file_path: Path to a .sql or .txt dump
+
+    Returns:
+        dict: The index, as returned by build_index
+    """
+    stat = os.stat(file_path)
+    path = sidecar_path(file_path)
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        if (sidecar.get("version") == INDEX_VERSION and sidecar.get("size") == stat.st_size
+                and sidecar.get("mtime_ns") == stat.st_mtime_ns):
+            return sidecar["index"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(file_path)
+    sidecar = {
+        "version": INDEX_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "index": index,
+    }
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(sidecar, f)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning("Could not write table index %s: %s", path, e)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+    logger.debug("Indexed %s tables in %s", len(index['tables']), file_path)
+    return index
+
+
+def table_ranges(file_path, table):
+    """
+    Byte ranges of every INSERT statement for a table, in file order
+
+    Args:
+        file_path: Path to a .sql or .txt dump
+        table: Table name, matched in any schema
+
+    Returns:
+        list: [start, end) byte ranges
+    """
+    ranges = []
+    for entry in load_index(file_path)["tables"].values():
+        if entry["table"] == table:
+            ranges.extend(entry["ranges"])
+    return sorted(ranges)
+
+
+def split_ranges(file_path, piece_count):
+    """
+    Split a dump into byte ranges that each start at a statement boundary
+
+    Args:
+        file_path: Path to a .sql or .txt dump
+        piece_count: Desired number of pieces; fewer are returned when the
+                     dump has too few boundaries
+
+    Returns:
+        list: Contiguous [start, end) byte ranges covering the whole file
+    """
+    size = os.path.getsize(file_path)
+    boundaries = load_index(file_path)["boundaries"]
+
+    cuts = [0]
+    for piece in range(1, piece_count):
+        # The recorded boundary closest to an even split
+        target = size * piece // piece_count
+        i = bisect.bisect_left(boundaries, target)
+        candidates = boundaries[max(i - 1, 0):i + 1]
+        if candidates:
+            cut = min(candidates, key=lambda offset: abs(offset - target))
+            if cut > cuts[-1]:
+                cuts.append(cut)
+    cuts.append(size)
+
+    return list(zip(cuts[:-1], cuts[1:]))
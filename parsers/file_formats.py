@@ -0,0 +1,102 @@
+import bz2
+import gzip
+import lzma
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Document types the parsers understand
+DOCUMENT_TYPES = ("docx", "sql", "txt")
+
+# Compressed variants are accepted for the plain text types only; a .docx is
+# already a zip archive
+COMPRESSIBLE_TYPES = ("sql", "txt")
+
+# Compression suffixes, decompressed as a stream while parsing
+COMPRESSION_SUFFIXES = ("gz", "bz2", "xz", "zst")
+
+
+def split_file_type(file_path):
+    """
+    Return the document type and compression of a file from its name
+
+    Args:
+        file_path: File name or path, e.g. "schema_one.sql.gz"
+
+    Returns:
+        tuple: (document_type, compression), e.g. ("sql", "gz"); compression
+               is None for uncompressed files
+    """
+    parts = os.path.basename(file_path).lower().split('.')
+    if len(parts) > 2 and parts[-1] in COMPRESSION_SUFFIXES:
+        return parts[-2], parts[-1]
+    return parts[-1], None
+
+
+def file_type(file_path):
+    """Document type of a file, looking through any compression suffix"""
+    return split_file_type(file_path)[0]
+
+
+def is_compressed(file_path):
+    return split_file_type(file_path)[1] is not None
+
+
+def is_supported_file(file_path):
+    """
+    True if the file is a document the parsers can read
+
+    Args:
+        file_path: File name or path
+
+    Returns:
+        bool: True for .docx, .sql and .txt files and for .sql/.txt files
+              compressed with gzip, bzip2 or xz (or zstd when the zstandard
+              package is installed)
+    """
+    document_type, compression = split_file_type(file_path)
+    if compression is None:
+        return document_type in DOCUMENT_TYPES
+    if compression == "zst" and zstandard is None:
+        return False
+    return document_type in COMPRESSIBLE_TYPES
+
+
+def supported_suffixes():
+    """File name suffixes accepted by is_supported_file, for messages"""
+    suffixes = [f".{document_type}" for document_type in DOCUMENT_TYPES]
+    for compression in COMPRESSION_SUFFIXES:
+        if compression == "zst" and zstandard is None:
+            continue
+        suffixes.extend(f".{document_type}.{compression}" for document_type in COMPRESSIBLE_TYPES)
+    return suffixes
+
+
+def open_decompressed(file_path):
+    """
+    Open a file for binary reading, decompressing it on the fly if its name
+    ends in a compression suffix
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        file object: Readable binary stream of the uncompressed content
+    """
+    compression = split_file_type(file_path)[1]
+    if compression == "gz":
+        return gzip.open(file_path, "rb")
+    if compression == "bz2":
+        return bz2.open(file_path, "rb")
+    if compression == "xz":
+        return lzma.open(file_path, "rb")
+    if compression == "zst":
+        if zstandard is None:
+            raise ValueError(f"Reading {file_path} requires the zstandard package")
+        # Multi-threaded zstd writes several frames; read through all of them
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), read_across_frames=True, closefd=True)
+    return open(file_path, "rb")
@@ -0,0 +1,219 @@
+import gzip
+import hashlib
+import os
+import pickle
+
+from parsers.file_formats import file_type
+from parsers.sql_insert_parser import PARSER_VERSION
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Settings travel through the environment so that worker processes inherit them
+_ENV_DIR = "PARSE_CACHE_DIR"
+_ENV_MAX_MB = "PARSE_CACHE_MAX_MB"
+_ENV_ENABLED = "PARSE_CACHE_ENABLED"
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, ".parse_cache")
+DEFAULT_MAX_MB = 1024
+
+_ENTRY_SUFFIX = ".pkl.gz"
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# Content hashes already computed in this process, keyed by (path, size, mtime)
+_key_memo = {}
+
+
+def configure_parse_cache(config):
+    """
+    Apply parse cache settings from the configuration
+
+    Args:
+        config: Configuration dictionary; reads parse_cache_enabled,
+                parse_cache_dir and parse_cache_max_mb
+    """
+    cache_dir = config.get("parse_cache_dir")
+    if cache_dir:
+        if not os.path.isabs(cache_dir):
+            cache_dir = os.path.join(PROJECT_ROOT, cache_dir)
+        os.environ[_ENV_DIR] = cache_dir
+    if config.get("parse_cache_max_mb") is not None:
+        os.environ[_ENV_MAX_MB] = str(config["parse_cache_max_mb"])
+    if config.get("parse_cache_enabled") is not None:
+        os.environ[_ENV_ENABLED] = "1" if config["parse_cache_enabled"] else "0"
+
+
+def _cache_dir():
+    return os.environ.get(_ENV_DIR, DEFAULT_CACHE_DIR)
+
+
+def _enabled():
+    return os.environ.get(_ENV_ENABLED, "1") != "0"
+
+
+def _file_key(file_path):
+    """Return the cache key for a file's content, or None if it can't be read"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _key_memo:
+        return _key_memo[memo_key]
+
+    # The file type picks the reader and the file name gives the default
+    # schema, so both are part of the key alongside the (possibly compressed)
+    # content
+    name = os.path.basename(file_path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{PARSER_VERSION}:{name.split('.')[0]}:{file_type(name)}:".encode())
+    try:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    except OSError:
+        return None
+
+    key = digest.hexdigest()
+    _key_memo[memo_key] = key
+    return key
+
+
+def _read_entry(path):
+    """Yield the column batches stored in a cache entry"""
+    with gzip.open(path, "rb") as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                raise ValueError("cache entry is truncated")
+            # A complete entry ends with None
+            if batch is None:
+                return
+            yield batch
+
+
+def _evict(keep):
+    """Delete least recently used entries until the cache fits its size limit"""
+    cache_dir = _cache_dir()
+    try:
+        max_bytes = float(os.environ.get(_ENV_MAX_MB, DEFAULT_MAX_MB)) * 1024 * 1024
+    except ValueError:
+        max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(_ENTRY_SUFFIX):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def cached_parse(file_path, parse):
+    """
+    Yield a file's column batches from the parse cache, parsing it on a miss
+
+    Entries are keyed by the file content and the parser version, so a rerun
+    over unchanged files skips parsing entirely. On a miss, batches are written
+    to the cache as they are produced and the entry is committed only once the
+    whole file has been parsed.
+
+    Args:
+        file_path: Path to the document
+        parse: Callable returning an iterable of column batches for the file
+
+    Yields:
+        dict: Column batches, in the same order parse() produces them
+    """
+    key = _file_key(file_path) if _enabled() else None
+    if key is None:
+        yield from parse()
+        return
+
+    cache_dir = _cache_dir()
+    entry_path = os.path.join(cache_dir, key + _ENTRY_SUFFIX)
+
+    if os.path.exists(entry_path):
+        served = 0
+        try:
+            # Touch the entry so eviction sees it as recently used
+            os.utime(entry_path)
+            for batch in _read_entry(entry_path):
+                yield batch
+                served += 1
+            logger.debug("Loaded %s from parse cache", file_path)
+            return
+        except Exception as e:
+            logger.warning("Discarding unreadable parse cache entry for %s: %s", file_path, e)
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+
+        # Parsing is deterministic, so skip what the broken entry already served
+        for index, batch in enumerate(parse()):
+            if index >= served:
+                yield batch
+        return
+
+    writer = None
+    temp_path = f"{entry_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        writer = gzip.open(temp_path, "wb", compresslevel=1)
+    except OSError as e:
+        logger.warning("Parse cache unavailable at %s: %s", cache_dir, e)
+
+    complete = False
+    try:
+        for batch in parse():
+            if writer is not None:
+                try:
+                    pickle.dump(batch, writer, protocol=pickle.HIGHEST_PROTOCOL)
+                except OSError as e:
+                    logger.warning("Could not write parse cache entry for %s: %s", file_path, e)
+                    _discard(writer, temp_path)
+                    writer = None
+            yield batch
+        complete = True
+    finally:
+        if writer is not None:
+            if complete:
+                try:
+                    pickle.dump(None, writer)
+                    writer.close()
+                    os.replace(temp_path, entry_path)
+                    _evict(keep=entry_path)
+                except OSError as e:
+                    logger.warning("Could not save parse cache entry for %s: %s", file_path, e)
+                    _discard(None, temp_path)
+            else:
+                _discard(writer, temp_path)
+
+
+def _discard(writer, temp_path):
+    """Close and delete a partially written cache entry"""
+    try:
+        if writer is not None:
+            writer.close()
+        os.remove(temp_path)
+    except OSError:
+        pass
@@ -0,0 +1,794 @@
+import itertools
+import re
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Bump whenever the parser's output changes, so cached parse results are rebuilt
+PARSER_VERSION = "6"
+
+# Supported dump dialects. "mysql" reads backslash escapes inside quoted
+# literals, as mysqldump writes them; "generic" and "postgres" also read
+# PostgreSQL COPY ... FROM stdin blocks.
+DIALECTS = ("generic", "mysql", "postgres")
+
+_MYSQL_HINT_RE = re.compile(r"^-- (?:MySQL|MariaDB) dump|/\*!\d{5}|^LOCK TABLES `|^INSERT INTO `", re.M | re.I)
+_POSTGRES_HINT_RE = re.compile(r"^-- PostgreSQL database dump|^COPY [^;]*\bFROM stdin;", re.M | re.I)
+
+
+def _quoted_pattern(quote, backslash_escapes):
+    """Pattern for a complete quoted literal, with doubled quote (and optionally backslash) escapes"""
+    if backslash_escapes:
+        return r"%s[^%s\\]*+(?:(?:%s%s|\\[\s\S])[^%s\\]*+)*+%s" % ((quote,) * 6)
+    return r"%s[^%s]*+(?:%s%s[^%s]*+)*+%s" % ((quote,) * 6)
+
+
+def _compile_syntax(backslash_escapes):
+    """Compile the tokenizer and flat-run patterns for one quoting style"""
+    squote = _quoted_pattern("'", backslash_escapes)
+    dquote = _quoted_pattern('"', backslash_escapes)
+
+    # Generic SQL token. Quoted strings are matched as a whole so that commas,
+    # parentheses and semicolons inside literals never reach the state machine.
+    token = re.compile(r"""
+          (?P<ws>\s+)
+        | (?P<comment>--[^\n]*\n|/\*[\s\S]*?\*/)
+        | (?P<squote>%s)
+        | (?P<dquote>%s)
+        | (?P<ident>`[^`]*+(?:``[^`]*+)*+`|\[[^\]]*+\])
+        | (?P<punct>[(),;])
+        | (?P<open>['"`\[]|/\*|--)
+        | (?P<word>[^\s'"`\[(),;]+)
+    """ % (squote, dquote), re.VERBOSE)
+
+    # A single value of a "flat" tuple: a quoted literal or bare text without parentheses
+    field = r"""(?:%s|%s|[^,'"()\s]*+(?:\s++[^,'"()\s]++)*+)""" % (squote, dquote)
+
+    # A run of consecutive flat tuples, e.g. "(1, 'a'),\n(2, 'b')". This is what
+    # almost every row of a dump looks like, so runs are split with C-level
+    # regex calls instead of Python loops.
+    flat_run = re.compile(r"(?:\s*+,?\s*+\(\s*+%s\s*+(?:,\s*+%s\s*+)*+\))*+" % (field, field))
+
+    # Values inside a flat run together with the separator that follows each one
+    # (',' for the next value, ')' for the end of the tuple)
+    run_field = re.compile(r"(?:\s*+,?\s*+\()?\s*+(%s)\s*+([,)])" % field)
+
+    return token, flat_run, run_field
+
+
+# Patterns keyed by whether backslashes escape characters in quoted literals
+_SYNTAX = {False: _compile_syntax(False), True: _compile_syntax(True)}
+
+# Whitespace and comments between tuples
+_GAP_RE = re.compile(r"(?:\s+|--[^\n]*\n|/\*[\s\S]*?\*/)*")
+
+# Upper bound for the text handed to one findall call
+_RUN_WINDOW = 1 << 22
+
+# MySQL escape sequences inside quoted literals; \% and \_ keep their backslash
+_MYSQL_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a", "%": "\\%", "_": "\\_"}
+_MYSQL_ESCAPE_RES = {"'": re.compile(r"\\([\s\S])|''"), '"': re.compile(r'\\([\s\S])|""')}
+
+# The line ending a COPY data block
+_COPY_END_RE = re.compile(r"^\\\.\r?$\n?", re.M)
+
+# Escape sequences of the COPY text format
+_COPY_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+_COPY_ESCAPE_RE = re.compile(r"\\(?:([0-7]{1,3})|x([0-9A-Fa-f]{1,2})|([\s\S]))")
+_COPY_NULL = "\\N"
+
+# COPY values made only of these characters are treated like bare SQL literals
+_BARE_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+# Full-block check that every COPY line has the same number of fields, keyed by width
+_copy_block_res = {}
+
+# Equal values of a column share one str object until the column has this
+# many distinct values; beyond that it is treated as high-cardinality
+_INTERN_MAX_DISTINCT = 4096
+
+_NULL_WORDS = frozenset(map("".join, itertools.product(*zip("null", "NULL"))))
+_QUOTES = frozenset("'\"")
+
+_SEEK, _HEADER, _ROWS, _SKIP, _COPY_HEADER, _COPY_DATA = range(6)
+
+_NEED_MORE = object()
+
+
+def _unquote_identifier(name):
+    name = name.strip()
+    if len(name) >= 2 and name[0] in '`["\'' and name[-1] in '`]"\'':
+        return name[1:-1]
+    return name
+
+
+def _qualified_name(tokens):
+    """Split [schema.]table tokens into their unquoted parts"""
+    parts = [""]
+    for kind, text in tokens:
+        if kind == "word":
+            pieces = text.split(".")
+            parts[-1] += pieces[0]
+            parts.extend(pieces[1:])
+        else:
+            parts[-1] += _unquote_identifier(text)
+    return parts
+
+
+def _mysql_unescape(match):
+    char = match.group(1)
+    if char is None:
+        # A doubled quote
+        return match.group()[0]
+    return _MYSQL_ESCAPES.get(char, char)
+
+
+def _convert_value(raw, backslash_escapes=False):
+    """Convert the source text of one value to a Python value"""
+    quote = raw[:1]
+    if quote == "'" or quote == '"':
+        inner = raw[1:-1]
+        if backslash_escapes and "\\" in inner:
+            return _MYSQL_ESCAPE_RES[quote].sub(_mysql_unescape, inner)
+        doubled = quote * 2
+        return inner.replace(doubled, quote) if doubled in inner else inner
+    if raw in _NULL_WORDS:
+        return None
+    return raw
+
+
+def _copy_unescape(match):
+    octal, hexadecimal, char = match.groups()
+    if octal is not None:
+        return chr(int(octal, 8))
+    if hexadecimal is not None:
+        return chr(int(hexadecimal, 16))
+    return _COPY_ESCAPES.get(char, char)
+
+
+def _convert_copy_value(raw):
+    """Convert one field of a COPY text-format line to a Python value"""
+    if raw == _COPY_NULL:
+        return None
+    return _COPY_ESCAPE_RE.sub(_copy_unescape, raw) if "\\" in raw else raw
+
+
+def _looks_quoted(values):
+    """True if a COPY column holds anything but bare numbers, which SQL would have quoted"""
+    present = [value for value in values if value is not None]
+    return "" in present or not set("".join(present)) <= _BARE_NUMBER_CHARS
+
+
+def detect_dialect(sample):
+    """
+    Guess the dialect of a SQL dump from its first few kilobytes
+
+    Args:
+        sample: Text from the start of the dump
+
+    Returns:
+        str: "mysql" for mysqldump output or MySQL-style backtick inserts,
+             "postgres" for pg_dump output or COPY ... FROM stdin blocks,
+             otherwise "generic"
+    """
+    if _MYSQL_HINT_RE.search(sample):
+        return "mysql"
+    if _POSTGRES_HINT_RE.search(sample):
+        return "postgres"
+    return "generic"
+
+
+class InsertStatementParser:
+    """
+    Incremental, single-pass parser for INSERT INTO ... VALUES statements.
+
+    Text can be fed in arbitrary pieces; rows are emitted as soon as their
+    closing parenthesis has been seen, so a multi-row INSERT is never held in
+    memory as a whole. Rows are collected column-wise: consecutive rows of the
+    same table and column header share one batch holding a list per column.
+    Handles single and double quoted literals with doubled quote escapes,
+    semicolons and parentheses inside strings, nested parentheses in unquoted
+    expressions (e.g. NOW()) and NULL.
+
+    In the "mysql" dialect quoted literals may also contain backslash escapes.
+    In the other dialects the tab-separated data of COPY ... FROM stdin blocks
+    is read line-wise, without SQL tokenization.
+    """
+
+    def __init__(self, default_schema, dialect="generic"):
+        if dialect not in DIALECTS:
+            raise ValueError(f"Unknown SQL dialect: {dialect}")
+        self.default_schema = default_schema
+        self.dialect = dialect
+        self._backslash_escapes = dialect == "mysql"
+        self._copy_blocks = dialect != "mysql"
+        self._token_re, self._flat_run_re, self._run_field_re = _SYNTAX[self._backslash_escapes]
+        self._copy_text = True
+        self.rows_emitted = 0
+        self.rows_skipped = 0
+        self._buf = ""
+        self._pos = 0
+        self._state = _SEEK
+        self._schema = None
+        self._table = None
+        self._columns = None
+        self._batches = []
+        self._batch = None
+        # Per schema, table and column: value -> shared value, or None once
+        # the column has too many distinct values to be worth interning
+        self._intern_memos = {}
+
+    def feed(self, text):
+        """
+        Parse the next piece of input
+
+        Args:
+            text: Next chunk of SQL text
+
+        Returns:
+            list: Column batches for the rows completed by this chunk
+        """
+        if self._pos:
+            self._buf = self._buf[self._pos:] + text
+            self._pos = 0
+        else:
+            self._buf += text
+        self._run(final=False)
+        return self._take_batches()
+
+    def close(self):
+        """
+        Parse whatever is left in the buffer as the end of the input
+
+        Returns:
+            list: Column batches for the remaining rows
+        """
+        self._run(final=True)
+        self._buf = ""
+        self._pos = 0
+        return self._take_batches()
+
+    @property
+    def idle(self):
+        """True when the parser is between statements"""
+        return self._state == _SEEK
+
+    def _take_batches(self):
+        batches = self._batches
+        self._batches = []
+        self._batch = None
+        return batches
+
+    def _column_batch(self, columns):
+        """Return the batch collecting rows of the current table with these columns"""
+        batch = self._batch
+        if (batch is None or batch["columns"] != columns
+                or batch["table_name"] != self._table or batch["schema_name"] != self._schema):
+            batch = self._batch = {
+                "schema_name": self._schema,
+                "table_name": self._table,
+                "columns": columns,
+                "column_values": [[] for _ in columns],
+                # True for columns holding at least one quoted literal
+                "quoted": [False] * len(columns),
+                "row_count": 0,
+            }
+            self._batches.append(batch)
+        return batch
+
+    def _extend_column(self, batch, index, values):
+        """Append values to a column of a batch, interning repeated values"""
+        key = (self._schema, self._table, batch["columns"][index])
+        memo = self._intern_memos.get(key, {})
+        if memo is None:
+            batch["column_values"][index].extend(values)
+            return
+        batch["column_values"][index].extend(map(memo.setdefault, values, values))
+        self._intern_memos[key] = memo if len(memo) <= _INTERN_MAX_DISTINCT else None
+
+    def _next_token(self, pos, final):
+        """Return (kind, text, end) for the token at pos, or _NEED_MORE"""
+        buf = self._buf
+        if pos >= len(buf):
+            return _NEED_MORE if not final else (None, "", pos)
+        m = self._token_re.match(buf, pos)
+        kind = m.lastgroup
+        end = m.end()
+        if not final and (kind == "open" or end == len(buf)):
+            # The token might continue in the next chunk
+            return _NEED_MORE
+        return kind, m.group(), end
+
+    def _run(self, final):
+        while True:
+            if self._state == _SEEK:
+                progressed = self._seek(final)
+            elif self._state == _HEADER:
+                progressed = self._header(final)
+            elif self._state == _ROWS:
+                progressed = self._values(final)
+            elif self._state == _COPY_HEADER:
+                progressed = self._copy_header(final)
+            elif self._state == _COPY_DATA:
+                progressed = self._copy_data(final)
+            else:
+                progressed = self._skip(final)
+            if not progressed:
+                return
+
+    def _seek(self, final):
+        pos = self._pos
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                self._pos = pos
+                return False
+            kind, text, end = tok
+            if kind is None:
+                self._pos = end
+                return False
+            if kind == "word":
+                upper = text.upper()
+                if upper == "INSERT":
+                    self._pos = pos
+                    self._state = _HEADER
+                    return True
+                if upper == "COPY" and self._copy_blocks:
+                    self._pos = pos
+                    self._state = _COPY_HEADER
+                    return True
+            pos = end
+
+    def _header(self, final):
+        """Parse INSERT [modifiers] INTO name [(columns)] VALUES"""
+        pos = self._pos
+        name_parts = []
+        columns = None
+        seen_into = False
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                return False
+            kind, text, end = tok
+            if kind is None:
+                self._pos = end
+                self._state = _SEEK
+                return False
+            if kind in ("ws", "comment"):
+                pos = end
+                continue
+            upper = text.upper() if kind == "word" else None
+            if not seen_into:
+                if upper == "INTO":
+                    seen_into = True
+                elif text == ";":
+                    self._pos = end
+                    self._state = _SEEK
+                    return True
+                pos = end
+                continue
+            if upper in ("VALUES", "VALUE"):
+                break
+            if text == "(" and name_parts and columns is None:
+                columns, pos = self._column_list(end, final)
+                if columns is _NEED_MORE:
+                    return False
+                continue
+            if text == ";":
+                self._pos = end
+                self._state = _SEEK
+                return True
+            if kind in ("word", "ident", "dquote") and columns is None:
+                name_parts.append((kind, text))
+                pos = end
+                continue
+            # INSERT ... SELECT, INSERT ... SET, DEFAULT VALUES: nothing to extract
+            self._pos = end
+            self._state = _SKIP
+            return True
+
+        parts = _qualified_name(name_parts)
+        if not parts[-1]:
+            self._pos = end
+            self._state = _SKIP
+            return True
+        self._table = parts[-1]
+        self._schema = parts[-2] if len(parts) > 1 and parts[-2] else self.default_schema
+        self._columns = columns
+        self._pos = end
+        self._state = _ROWS
+        return True
+
+    def _column_list(self, pos, final):
+        columns = []
+        current = ""
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                return _NEED_MORE, pos
+            kind, text, end = tok
+            if kind is None:
+                return columns, end
+            pos = end
+            if text == ",":
+                columns.append(_unquote_identifier(current))
+                current = ""
+            elif text == ")":
+                if current.strip():
+                    columns.append(_unquote_identifier(current))
+                return columns, pos
+            elif kind not in ("ws", "comment"):
+                current += text
+
+    def _values(self, final):
+        buf = self._buf
+        pos = self._pos
+        size = len(buf)
+        while True:
+            end = self._flat_run_re.match(buf, pos, min(size, pos + _RUN_WINDOW)).end()
+            if end > pos:
+                self._emit_run(buf, pos, end)
+                pos = end
+                continue
+
+            # Anything that is not a flat tuple: separators, comments, nested
+            # parentheses, the end of the statement
+            pos = _GAP_RE.match(buf, pos).end()
+            if pos >= size:
+                self._pos = pos
+                if final:
+                    self._state = _SEEK
+                return False
+            char = buf[pos]
+            if char == "(":
+                row, end = self._nested_row(pos, final)
+                if row is _NEED_MORE:
+                    self._pos = pos
+                    return False
+                if row is not None:
+                    self._emit(*row)
+                pos = end
+            elif char == ",":
+                pos += 1
+            elif char == ";":
+                self._pos = pos + 1
+                self._state = _SEEK
+                return True
+            elif not final and (pos + 1 >= size or buf.startswith(("--", "/*"), pos)):
+                # Possibly a comment that is cut off at the end of this chunk
+                self._pos = pos
+                return False
+            else:
+                # ON DUPLICATE KEY UPDATE / RETURNING ... up to the end of the statement
+                self._pos = pos
+                self._state = _SKIP
+                return True
+
+    def _emit_run(self, buf, pos, end):
+        """Split a run of flat tuples and emit its rows"""
+        fields, separators = zip(*self._run_field_re.findall(buf, pos, end))
+
+        nulls = _NULL_WORDS
+        if self._backslash_escapes and buf.find("\\", pos, end) != -1:
+            values = [
+                None if raw in nulls else _convert_value(raw, True) if "\\" in raw
+                else raw[1:-1].replace("''", "'") if raw[:1] == "'"
+                else raw[1:-1].replace('""', '"') if raw[:1] == '"' else raw
+                for raw in fields
+            ]
+        elif buf.find("''", pos, end) != -1 or buf.find('""', pos, end) != -1:
+            values = [
+                None if raw in nulls else raw[1:-1].replace("''", "'") if raw[:1] == "'"
+                else raw[1:-1].replace('""', '"') if raw[:1] == '"' else raw
+                for raw in fields
+            ]
+        else:
+            quotes = _QUOTES
+            values = [None if raw in nulls else raw[1:-1] if raw[:1] in quotes else raw for raw in fields]
+
+        width = len(self._columns) if self._columns else separators.index(")") + 1
+        rows = len(values) // width
+        if rows * width == len(values) and separators[width - 1::width].count(")") == rows == separators.count(")"):
+            start = 0
+            if not self._columns:
+                self._emit(values[:width], [raw[:1] in _QUOTES for raw in fields[:width]])
+                start = width
+            # Transpose with strided slices instead of building a list per row
+            batch = self._column_batch(self._columns)
+            quoted = batch["quoted"]
+            for i in range(len(self._columns)):
+                self._extend_column(batch, i, values[start + i::width])
+                if not quoted[i]:
+                    # Bare values never contain quote characters
+                    raw = "".join(fields[start + i::width])
+                    quoted[i] = "'" in raw or '"' in raw
+            batch["row_count"] += rows - start // width
+            self.rows_emitted += rows - start // width
+            return
+
+        # Tuples of different widths: emit one by one so that bad rows are reported
+        start = 0
+        for i, separator in enumerate(separators):
+            if separator == ")":
+                self._emit(values[start:i + 1], [raw[:1] in _QUOTES for raw in fields[start:i + 1]])
+                start = i + 1
+
+    def _nested_row(self, pos, final):
+        """Token-level fallback for tuples that are not flat; returns ((values, quoted), end)"""
+        values = []
+        quoted = []
+        parts = []
+        depth = 0
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                return _NEED_MORE, pos
+            kind, text, end = tok
+            if kind is None:
+                # Input ended inside the tuple
+                return None, end
+            pos = end
+            if text == "(":
+                depth += 1
+                if depth == 1:
+                    continue
+            elif text == ")":
+                depth -= 1
+                if depth == 0:
+                    value, is_quoted = self._join_value(parts)
+                    values.append(value)
+                    quoted.append(is_quoted)
+                    return (values, quoted), pos
+            elif text == "," and depth == 1:
+                value, is_quoted = self._join_value(parts)
+                values.append(value)
+                quoted.append(is_quoted)
+                parts = []
+                continue
+            parts.append((kind, text))
+
+    def _join_value(self, parts):
+        """Return (value, quoted) for the tokens of one value"""
+        significant = [p for p in parts if p[0] not in ("ws", "comment")]
+        if len(significant) == 1:
+            kind, text = significant[0]
+            return _convert_value(text, self._backslash_escapes), kind in ("squote", "dquote")
+        raw = "".join(text for _, text in parts).strip()
+        return (None if raw in _NULL_WORDS else raw), False
+
+    def _copy_header(self, final):
+        """Parse COPY name [(columns)] FROM STDIN [options]; up to the first data line"""
+        pos = self._next_token(self._pos, final)[2]
+        name_parts = []
+        columns = None
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                return False
+            kind, text, end = tok
+            if kind is None:
+                self._pos = end
+                self._state = _SEEK
+                return False
+            if kind in ("ws", "comment"):
+                pos = end
+                continue
+            if kind == "word" and text.upper() == "FROM":
+                pos = end
+                break
+            if text == ";":
+                # COPY ... TO: no data follows
+                self._pos = end
+                self._state = _SEEK
+                return True
+            if text == "(" and name_parts and columns is None:
+                columns, pos = self._column_list(end, final)
+                if columns is _NEED_MORE:
+                    return False
+                continue
+            if kind in ("word", "ident", "dquote") and columns is None:
+                name_parts.append((kind, text))
+                pos = end
+                continue
+            # COPY (query) TO ...
+            self._pos = end
+            self._state = _SKIP
+            return True
+
+        # Only STDIN is followed by inline data; the options decide its format
+        options = []
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                return False
+            kind, text, end = tok
+            if kind is None:
+                self._pos = end
+                self._state = _SEEK
+                return False
+            pos = end
+            if text == ";":
+                break
+            if kind not in ("ws", "comment", "punct"):
+                options.append(text.upper())
+
+        if not options or options[0] != "STDIN":
+            self._pos = pos
+            self._state = _SEEK
+            return True
+
+        # The data starts on the line after the statement
+        newline = self._buf.find("\n", pos)
+        if newline == -1:
+            if not final:
+                return False
+            self._pos = len(self._buf)
+            self._state = _SEEK
+            return False
+
+        parts = _qualified_name(name_parts)
+        self._table = parts[-1]
+        self._schema = parts[-2] if len(parts) > 1 and parts[-2] else self.default_schema
+        self._columns = columns
+        self._copy_text = not set(options[1:]) - {"WITH", "FORMAT", "TEXT", "'TEXT'"}
+        if not self._copy_text:
+            logger.warning("Skipping COPY data for %s.%s in an unsupported format: %s", self._schema, self._table, ' '.join(options[1:]))
+        self._pos = newline + 1
+        self._state = _COPY_DATA
+        return True
+
+    def _copy_data(self, final):
+        """Consume the complete lines of a COPY block, up to its \\. terminator"""
+        buf = self._buf
+        pos = self._pos
+        limit = len(buf) if final else buf.rfind("\n", pos) + 1
+        if limit <= pos:
+            if final:
+                self._state = _SEEK
+            return False
+
+        terminator = _COPY_END_RE.search(buf, pos, limit)
+        data_end = terminator.start() if terminator else limit
+        if data_end > pos and self._copy_text:
+            self._emit_copy_block(buf[pos:data_end])
+
+        if terminator:
+            self._pos = terminator.end()
+            self._state = _SEEK
+            return True
+        self._pos = limit
+        if final:
+            self._state = _SEEK
+        return False
+
+    def _emit_copy_block(self, block):
+        """Split complete tab-separated COPY lines and emit their rows"""
+        if not block.endswith("\n"):
+            block += "\n"
+        if "\r" in block:
+            block = block.replace("\r\n", "\n")
+        rows = block.count("\n")
+
+        if not self._columns:
+            # No column list: name the columns after the first line of the block
+            width = block.count("\t", 0, block.index("\n")) + 1
+            self._columns = [f"column_{i + 1}" for i in range(width)]
+        width = len(self._columns)
+
+        if width not in _copy_block_res:
+            _copy_block_res[width] = re.compile(r"(?:[^\t\n]*+(?:\t[^\t\n]*+){%d}\n)*+" % (width - 1))
+        if _copy_block_res[width].fullmatch(block):
+            # Every line has the same width: split the whole block at once and
+            # transpose with strided slices, as for runs of flat tuples
+            values = block[:-1].replace("\n", "\t").split("\t")
+            escaped = "\\" in block
+            batch = self._column_batch(self._columns)
+            quoted = batch["quoted"]
+            for i in range(len(self._columns)):
+                column_values = values[i::width]
+                if escaped:
+                    column_values = [_convert_copy_value(value) if "\\" in value else value
+                                     for value in column_values]
+                self._extend_column(batch, i, column_values)
+                if not quoted[i]:
+                    quoted[i] = _looks_quoted(column_values)
+            batch["row_count"] += rows
+            self.rows_emitted += rows
+            return
+
+        # Lines of different widths: emit one by one so that bad rows are reported
+        for line in block[:-1].split("\n"):
+            values = [_convert_copy_value(value) for value in line.split("\t")]
+            self._emit(values, [_looks_quoted([value]) for value in values])
+
+    def _skip(self, final):
+        pos = self._pos
+        while True:
+            tok = self._next_token(pos, final)
+            if tok is _NEED_MORE:
+                self._pos = pos
+                return False
+            kind, text, end = tok
+            if kind is None or text == ";":
+                self._pos = end
+                self._state = _SEEK
+                return kind is not None
+            pos = end
+
+    def _emit(self, values, quoted):
+        columns = self._columns
+        if not columns:
+            # No column list: name the columns after the first row of the statement
+            columns = self._columns = [f"column_{i + 1}" for i in range(len(values))]
+        if len(columns) != len(values):
+            self.rows_skipped += 1
+            logger.warning("Column count (%s) doesn't match value count (%s) in %s.%s", len(columns), len(values), self._schema, self._table)
+            return
+        self.rows_emitted += 1
+        batch = self._column_batch(columns)
+        for i, value in enumerate(values):
+            self._extend_column(batch, i, (value,))
+        batch["quoted"] = [a or b for a, b in zip(batch["quoted"], quoted)]
+        batch["row_count"] += 1
+
+
+def parse_insert_rows(text, default_schema, dialect="generic"):
+    """
+    Parse all INSERT statements (and COPY blocks) in a string
+
+    Args:
+        text: SQL text
+        default_schema: Schema name for statements without a schema prefix
+        dialect: One of DIALECTS
+
+    Returns:
+        list: Column batches in input order
+    """
+    parser = InsertStatementParser(default_schema, dialect)
+    batches = parser.feed(text)
+    batches.extend(parser.close())
+    return batches
+
+
+def parse_insert_header(text, default_schema):
+    """
+    Resolve the target of the INSERT statement at the start of text
+
+    Args:
+        text: SQL text starting with INSERT, at least up to VALUES
+        default_schema: Schema name for statements without a schema prefix
+
+    Returns:
+        tuple: (schema_name, table_name), or None if text does not start with
+               an INSERT ... VALUES header
+    """
+    parser = InsertStatementParser(default_schema)
+    parser._buf = text
+    parser._state = _HEADER
+    parser._header(final=True)
+    if parser._state != _ROWS:
+        return None
+    return parser._schema, parser._table
+
+
+def parse_copy_header(text, default_schema):
+    """
+    Resolve the target of the COPY ... FROM stdin statement at the start of text
+
+    Args:
+        text: SQL text starting with COPY, at least up to the end of the line
+              holding its semicolon
+        default_schema: Schema name for statements without a schema prefix
+
+    Returns:
+        tuple: (schema_name, table_name), or None if text does not start with
+               a COPY ... FROM stdin header
+    """
+    parser = InsertStatementParser(default_schema)
+    parser._buf = text
+    parser._state = _COPY_HEADER
+    parser._copy_header(final=True)
+    if parser._state != _COPY_DATA:
+        return None
+    return parser._schema, parser._table
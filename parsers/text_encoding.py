@@ -0,0 +1,140 @@
+import codecs
+
+from parsers.file_formats import open_decompressed
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Bytes read from the start of a file to detect its encoding
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Byte order marks, longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Encodings in which ASCII text has the same bytes as in ASCII, so byte
+# offsets found by scanning for SQL keywords are valid split points
+_ASCII_COMPATIBLE = ("utf-8", "utf-8-sig", "cp1252", "latin-1")
+
+# Share of NUL bytes in alternate positions that marks BOM-less UTF-16 text
+_UTF16_NUL_SHARE = 0.4
+
+
+def detect_encoding(sample):
+    """
+    Guess the encoding of a file from the bytes at its start
+
+    Args:
+        sample: Leading bytes of the file
+
+    Returns:
+        str: Codec name; a byte order mark wins, then UTF-16 without a mark
+             (from NUL byte positions), then UTF-8 if the sample decodes or
+             has valid multi-byte UTF-8 before its first bad byte, then
+             cp1252 if it decodes, otherwise latin-1
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if len(sample) >= 2:
+        half = len(sample) // 2
+        if sample[1::2].count(0) > half * _UTF16_NUL_SHARE:
+            return "utf-16-le"
+        if sample[0::2].count(0) > half * _UTF16_NUL_SHARE:
+            return "utf-16-be"
+
+    # Not final: the sample may end in the middle of a multi-byte character
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample)
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # Multi-byte UTF-8 before the bad byte: UTF-8 with a damaged part,
+        # which single-byte text practically never looks like
+        if not sample[:e.start].isascii():
+            return "utf-8"
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def sniff_encoding(file_path):
+    """
+    Detect the encoding of a file from its first few kilobytes
+
+    Args:
+        file_path: Path to the file, possibly compressed
+
+    Returns:
+        str: Codec name, as returned by detect_encoding
+    """
+    with open_decompressed(file_path) as f:
+        return detect_encoding(f.read(ENCODING_SNIFF_BYTES))
+
+
+def read_text_sample(file_path, size=ENCODING_SNIFF_BYTES):
+    """
+    Return the first size bytes of a file decoded in its detected encoding
+
+    A character cut off at the end of the sample is dropped.
+    """
+    with open_decompressed(file_path) as f:
+        sample = f.read(size)
+    decoder = codecs.getincrementaldecoder(detect_encoding(sample))(errors="replace")
+    return decoder.decode(sample)
+
+
+def is_ascii_compatible(encoding):
+    return codecs.lookup(encoding).name in {codecs.lookup(name).name for name in _ASCII_COMPATIBLE}
+
+
+def decode_chunks(file_path, byte_chunks, encoding):
+    """
+    Decode consecutive pieces of a file into text with one incremental decoder
+
+    If a byte can't be decoded, the error is reported with its byte offset.
+    For ASCII-compatible encodings the rest of the file is then decoded as
+    latin-1, which accepts any byte sequence; for UTF-16 and UTF-32 the
+    error is raised.
+
+    Args:
+        file_path: Path of the file, for messages
+        byte_chunks: Iterable of (offset, bytes) pairs in reading order, where
+                     offset is the position of the piece in the file
+        encoding: Codec name, usually from sniff_encoding
+
+    Yields:
+        str: Decoded text of each piece
+    """
+    def pieces():
+        end = 0
+        for offset, data in byte_chunks:
+            end = offset + len(data)
+            yield offset, data, False
+        # An empty final piece flushes a character cut off at the end of the file
+        yield end, b"", True
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for offset, data, final in pieces():
+        pending = decoder.getstate()[0]
+        try:
+            text = decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            bad_offset = offset - len(pending) + e.start
+            if encoding == "latin-1" or not is_ascii_compatible(encoding):
+                raise ValueError(f"{file_path} is not valid {encoding} at byte offset {bad_offset}: {e.reason}")
+            logger.warning("%s is not valid %s at byte offset %s (%s), decoding the rest as latin-1", file_path, encoding, bad_offset, e.reason)
+            # Keep the valid prefix and switch encodings at the bad byte
+            data = pending + data
+            text = data[:e.start].decode(encoding)
+            encoding = "latin-1"
+            decoder = codecs.getincrementaldecoder(encoding)()
+            text += decoder.decode(data[e.start:], final)
+        yield text
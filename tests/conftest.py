@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import project modules the way generate_report.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+import pytest
+
+# generate_report imports the validation and LLM libraries at module level
+pytest.importorskip("great_expectations")
+pytest.importorskip("langchain_ollama")
+
+from generate_report import process_single_file
+
+
+def test_unreadable_file_yields_no_tables(tmp_path):
+    path = tmp_path / "corrupt.docx"
+    path.write_bytes(b"not a zip archive")
+
+    frames = process_single_file(str(path))
+    assert frames == {}
+    # process_document_data sums rows over every file's tables
+    assert sum(len(df) for df in frames.values()) == 0
+
+
+def test_readable_file_yields_tables(tmp_path):
+    path = tmp_path / "schema_a.sql"
+    path.write_text("INSERT INTO schema_a.items (id, name) VALUES (1, 'a'), (2, 'b');\n")
+
+    frames = process_single_file(str(path))
+    assert list(frames) == ["schema_a.items"]
+    assert len(frames["schema_a.items"]) == 2
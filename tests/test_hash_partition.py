@@ -0,0 +1,35 @@
+import operator
+
+from utils.external_sort import iter_run
+from utils.hash_partition import partition_records, repartition
+
+key = operator.itemgetter(0)
+
+
+def test_oversized_partition_splits_at_every_level(tmp_path):
+    records = [(f"key{i}", i) for i in range(20000)]
+    parts = partition_records(records, key, 16, str(tmp_path), 1000)
+    path, count = max(parts, key=operator.itemgetter(1))
+
+    # Split again by a power of two, the largest new partition holds about a quarter
+    split = repartition(path, key, 4, str(tmp_path), 1000, salt=1)
+    assert sum(rows for _, rows in split) == count
+    assert all(rows > 0 for _, rows in split)
+    assert max(rows for _, rows in split) < count / 2
+
+    # And the largest of those splits again at the next level
+    path, count = max(split, key=operator.itemgetter(1))
+    split = repartition(path, key, 2, str(tmp_path), 1000, salt=2)
+    assert max(rows for _, rows in split) < 0.75 * count
+
+
+def test_equal_keys_share_a_partition_in_stream_order(tmp_path):
+    records = [(f"key{i % 50}", i) for i in range(1000)]
+    partition_of_key = {}
+    for index, (path, _) in enumerate(partition_records(records, key, 8, str(tmp_path), 64, salt=3)):
+        positions = []
+        for key_value, position in iter_run(path):
+            assert partition_of_key.setdefault(key_value, index) == index
+            positions.append(position)
+        assert positions == sorted(positions)
+    assert len(partition_of_key) == 50
@@ -9,21 +9,26 @@ import traceback
 from werkzeug.utils import secure_filename
 import shutil
 
-print(f"Current working directory: {os.getcwd()}")
-print(f"Python path: {sys.path}")
-
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from parsers.file_formats import is_supported_file, supported_suffixes
+from utils.log_utils import configure_logging, get_logger
+
+logger = get_logger(__name__)
+logger.debug("Current working directory: %s", os.getcwd())
+logger.debug("Python path: %s", sys.path)
+
 try:
     import generate_report
-    print("Successfully imported generate_report module")
+    logger.info("Successfully imported generate_report module")
 except Exception as e:
-    print(f"Failed to import generate_report: {e}")
+    logger.error("Failed to import generate_report: %s", e)
     traceback.print_exc()
 
 app = Flask(__name__)
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads')
-ALLOWED_EXTENSIONS = {'docx', 'sql', 'txt'}
+# .docx/.sql/.txt, plus .sql/.txt dumps compressed with gzip, bzip2, xz or zstd
+ALLOWED_EXTENSIONS = supported_suffixes()
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 
@@ -37,12 +42,24 @@ os.makedirs(DEST_UPLOAD_FOLDER, exist_ok=True)
 validation_status = {}
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return '.' in filename and is_supported_file(filename)
 
 def load_config():
     config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
     with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+        config = yaml.safe_load(f)
+    configure_logging(config)
+    try:
+        from parsers.parse_cache import configure_parse_cache
+        configure_parse_cache(config)
+    except ImportError as e:
+        logger.error("Error importing parse cache: %s", e)
+    try:
+        from utils.key_discovery import configure_key_cache
+        configure_key_cache(config)
+    except ImportError as e:
+        logger.error("Error importing key cache: %s", e)
+    return config
 
 def extract_schema_from_filename(filename):
     name_without_ext = os.path.splitext(filename)[0].lower()
@@ -55,22 +72,19 @@ def extract_schema_from_filename(filename):
 def discover_tables_from_files(file_paths):
     tables = set()
     try:
-        from parsers.docx_data_parser import extract_insert_statements
+        from parsers.docx_data_parser import list_tables
     except ImportError as e:
-        print(f"Error importing parser: {e}")
+        logger.error("Error importing parser: %s", e)
         return list(tables)
 
     for file_path in file_paths:
         try:
-            print(f"Processing file: {os.path.basename(file_path)}")
-            inserts = extract_insert_statements(file_path)
-            for insert in inserts:
-                table_name = insert.get("table_name")
-                if table_name:
-                    tables.add(table_name)
+            logger.info("Processing file: %s", os.path.basename(file_path))
+            # Text and SQL dumps are answered from the dump index without parsing rows
+            tables.update(list_tables(file_path))
         except Exception as e:
-            print(f"Error processing file {file_path}: {e}")
-    print(f"Found {len(tables)} tables")
+            logger.error("Error processing file %s: %s", file_path, e)
+    logger.info("Found %s tables", len(tables))
     return sorted(list(tables))
 
 @app.route('/')
@@ -136,7 +150,7 @@ def run_validation():
                     unsupported_msg.append(f"destination files: {', '.join(dest_unsupported)}")
                 return jsonify({
                     'success': False,
-                    'error': f"Unsupported file types detected in {' and '.join(unsupported_msg)}. Allowed types are: {', '.join(f'.{ext}' for ext in ALLOWED_EXTENSIONS)}"
+                    'error': f"Unsupported file types detected in {' and '.join(unsupported_msg)}. Allowed types are: {', '.join(ALLOWED_EXTENSIONS)}"
                 })
 
             if not source_files or not dest_files:
@@ -168,15 +182,15 @@ def run_validation():
             source_schema = schema_names[0]
             dest_schema = schema_names[1]
 
-            print(f"Using source schema: {source_schema}")
-            print(f"Using destination schema: {dest_schema}")
+            logger.info("Using source schema: %s", source_schema)
+            logger.info("Using destination schema: %s", dest_schema)
 
             # Get the exact same paths from config that would be used in direct execution
             source_dir = config['schema_paths'][source_schema]
             dest_dir = config['schema_paths'][dest_schema]
 
-            print(f"Using source directory: {source_dir}")
-            print(f"Using destination directory: {dest_dir}")
+            logger.info("Using source directory: %s", source_dir)
+            logger.info("Using destination directory: %s", dest_dir)
 
             # Ensure directories exist
             os.makedirs(source_dir, exist_ok=True)
@@ -196,23 +210,23 @@ def run_validation():
                     dest_file_paths.append(filepath)
 
             # Debug - print directory contents
-            print("\n=== Source Directory Contents ===")
+            logger.info("\n=== Source Directory Contents ===")
             for file in os.listdir(source_dir):
-                print(f"  - {file} ({os.path.getsize(os.path.join(source_dir, file))} bytes)")
+                logger.info("  - %s (%s bytes)", file, os.path.getsize(os.path.join(source_dir, file)))
 
-            print("\n=== Destination Directory Contents ===")
+            logger.info("\n=== Destination Directory Contents ===")
             for file in os.listdir(dest_dir):
-                print(f"  - {file} ({os.path.getsize(os.path.join(dest_dir, file))} bytes)")
+                logger.info("  - %s (%s bytes)", file, os.path.getsize(os.path.join(dest_dir, file)))
 
             try:
-                print(f"Discovering tables from uploaded files")
+                logger.info("Discovering tables from uploaded files")
                 source_tables = set(discover_tables_from_files(source_file_paths))
                 dest_tables = set(discover_tables_from_files(dest_file_paths))
                 selected_tables = sorted(list(source_tables.intersection(dest_tables)))
 
-                print(f"Source tables: {source_tables}")
-                print(f"Destination tables: {dest_tables}")
-                print(f"Common tables: {selected_tables}")
+                logger.info("Source tables: %s", source_tables)
+                logger.info("Destination tables: %s", dest_tables)
+                logger.info("Common tables: %s", selected_tables)
 
                 if not selected_tables:
                     validation_status[run_id]['status'] = 'failed'
@@ -220,7 +234,7 @@ def run_validation():
                     return jsonify({'success': True, 'run_id': run_id})
             except Exception as e:
                 error_msg = f'Error discovering tables: {str(e)}'
-                print(error_msg)
+                logger.error("%s", error_msg)
                 validation_status[run_id]['status'] = 'failed'
                 validation_status[run_id]['error'] = error_msg
                 return jsonify({'success': True, 'run_id': run_id})
@@ -241,21 +255,21 @@ def run_validation():
             })
 
             # Print the final config for debugging
-            print("\n=== Runtime Configuration ===")
+            logger.info("\n=== Runtime Configuration ===")
             for key, value in runtime_config.items():
                 if key not in ['source_files', 'dest_files']:  # Skip long lists
-                    print(f"{key}: {value}")
-            print(f"source_files: {len(runtime_config.get('source_files', []))} files")
-            print(f"dest_files: {len(runtime_config.get('dest_files', []))} files")
+                    logger.info("%s: %s", key, value)
+            logger.info("source_files: %s files", len(runtime_config.get('source_files', [])))
+            logger.info("dest_files: %s files", len(runtime_config.get('dest_files', [])))
 
             def run_validation_thread():
                 try:
                     validation_status[run_id]['current_table'] = f'Found {len(selected_tables)} common tables'
                     validation_status[run_id]['progress'] = 10
 
-                    print(f"Starting report generation with config:")
-                    print(f"  - Schema paths: {runtime_config['schema_paths']}")
-                    print(f"  - Selected tables: {runtime_config['selected_tables']}")
+                    logger.info("Starting report generation with config:")
+                    logger.info("  - Schema paths: %s", runtime_config['schema_paths'])
+                    logger.info("  - Selected tables: %s", runtime_config['selected_tables'])
 
                     result = generate_report.main(runtime_config)
 
@@ -288,14 +302,14 @@ def run_validation():
                                 validation_status[run_id]['results'] = results
                                 validation_status[run_id]['report_data'] = report_data
                             except Exception as e:
-                                print(f"Error reading report data: {e}")
+                                logger.error("Error reading report data: %s", e)
                     else:
                         validation_status[run_id]['status'] = 'failed'
                         validation_status[run_id]['error'] = result.get('error',
                                                                         'Unknown error') if result else 'Report generation returned None'
                 except Exception as e:
                     error_msg = f"Error during validation: {str(e)}\n{traceback.format_exc()}"
-                    print(error_msg)
+                    logger.error("%s", error_msg)
                     validation_status[run_id]['status'] = 'failed'
                     validation_status[run_id]['error'] = str(e)
 
@@ -306,11 +320,11 @@ def run_validation():
 
         except Exception as e:
             error_msg = f"Error in run_validation: {str(e)}\n{traceback.format_exc()}"
-            print(error_msg)
+            logger.error("%s", error_msg)
             return jsonify({'success': False, 'error': str(e)})
         except Exception as e:
          error_msg = f"Error in run_validation: {str(e)}\n{traceback.format_exc()}"
-        print(error_msg)
+        logger.error("%s", error_msg)
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/reports/<report_id>')
@@ -3,7 +3,8 @@ def chunk_data(dataframes):
     Process dataframes into chunks with metadata for vector storage
 
     Args:
-        dataframes: Dictionary of DataFrames keyed by schema.table
+        dataframes: Dictionary of DataFrames keyed by schema.table, with the
+                    schema and table in df.attrs
 
     Returns:
         list: List of dictionaries with content and metadata
@@ -11,14 +12,13 @@ def chunk_data(dataframes):
     chunks = []
 
     for key, df in dataframes.items():
-        schema = df["__schema__"].iloc[0]
-        table = df["__table__"].iloc[0]
+        schema = df.attrs["schema"]
+        table = df.attrs["table"]
 
         # Process each row
         for idx, row in df.iterrows():
-            # Convert row to string representation (exclude metadata columns)
-            row_data = row.drop(["__schema__", "__table__"], errors='ignore')
-            row_content = row_data.to_json()
+            # Convert row to string representation
+            row_content = row.to_json(date_format="iso")
 
             chunks.append({
                 "content": row_content,
@@ -0,0 +1,281 @@
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+from parsers.docx_data_parser import _PANDAS_ISO8601
+
+# Timestamp text: a date, optionally a time with fractional seconds and a UTC offset
+_TIMESTAMP_PATTERN = (r"\d{4}-\d{2}-\d{2}"
+                      r"(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,9})?)?\s*(?:Z|[+-]\d{2}(?::?\d{2})?)?)?")
+# A UTC offset can only follow a time; a bare date ending in "-01" has none
+_OFFSET_PATTERN = r"\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$"
+# Numeric text, without words such as nan or inf that to_numeric also accepts
+_NUMBER_PATTERN = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+# Integers with a leading zero, such as postal codes, are identifiers rather than numbers
+_LEADING_ZERO_PATTERN = r"[+-]?0\d+"
+# Past 15 significant digits, or 2**53 for integers, float64 may round two
+# different values to the same number
+_FLOAT_EXACT_DIGITS = 15
+_FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+def comparison_rules(config):
+    """
+    Rules of type-aware comparison from the configuration
+
+    Args:
+        config: Configuration dictionary; reads type_aware_comparison,
+                numeric_abs_tolerance, numeric_rel_tolerance,
+                timestamp_precision, timestamp_timezone, text_trim and
+                text_case_sensitive
+
+    Returns:
+        dict: The rules, or None when values are compared as stripped text
+    """
+    if not config.get("type_aware_comparison", False):
+        return None
+    return {
+        "abs_tolerance": float(config.get("numeric_abs_tolerance") or 0),
+        "rel_tolerance": float(config.get("numeric_rel_tolerance") or 0),
+        "timestamp_precision": config.get("timestamp_precision") or "us",
+        "timestamp_timezone": config.get("timestamp_timezone") or "UTC",
+        "text_trim": bool(config.get("text_trim", True)),
+        "text_case_sensitive": bool(config.get("text_case_sensitive", True))
+    }
+
+
+def rows_frame(rows, columns):
+    """Row dicts as a DataFrame of object columns, None where a row lacks a field"""
+    return pd.DataFrame({column: pd.Series([row.get(column) for row in rows], dtype=object)
+                         for column in columns})
+
+
+def _texts(series, trim=True, case_sensitive=True):
+    """
+    Text of every value of a column, None where missing
+
+    Each distinct value is converted once.
+    """
+    codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+    texts = pd.Series(uniques, dtype=object).map(str)
+    if trim:
+        texts = texts.str.strip()
+    if not case_sensitive:
+        texts = texts.str.casefold()
+    # Code -1 marks a missing value and picks the trailing None
+    return np.append(texts.to_numpy(dtype=object), None)[codes]
+
+
+def _column_kind(series):
+    """
+    Classify one side's column as number, timestamp or text, or None when
+    it holds no values
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return "text"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "timestamp"
+    non_null = series.dropna()
+    if non_null.empty:
+        return None
+    values = non_null.to_numpy(dtype=object)
+    if all(isinstance(value, (int, float, Decimal, np.number)) and not isinstance(value, (bool, np.bool_))
+           for value in values):
+        return "number"
+    if all(isinstance(value, (datetime.date, np.datetime64)) for value in values):
+        return "timestamp"
+    texts = pd.Series(_texts(non_null), dtype=object)
+    if texts.str.fullmatch(_TIMESTAMP_PATTERN).all():
+        return "timestamp"
+    if texts.str.fullmatch(_NUMBER_PATTERN).all() and not texts.str.fullmatch(_LEADING_ZERO_PATTERN).any():
+        return "number"
+    return "text"
+
+
+def compile_plan(source, dest, rules):
+    """
+    Decide once per table how each column is compared
+
+    A column is compared as numbers or timestamps when its values on both
+    sides are of that kind (or one side has no values), and as text
+    otherwise. Values that don't convert later on are compared as text.
+
+    Args:
+        source: Source DataFrame, or a sample of its rows
+        dest: Destination DataFrame, or a sample of its rows
+        rules: Rules from comparison_rules
+
+    Returns:
+        dict: The rules with "columns", mapping each column to its kind
+    """
+    plan = dict(rules, columns={})
+    for column in list(dict.fromkeys(list(source.columns) + list(dest.columns))):
+        kinds = {_column_kind(frame[column]) for frame in (source, dest) if column in frame.columns} - {None}
+        plan["columns"][column] = kinds.pop() if len(kinds) == 1 else "text"
+    return plan
+
+
+def _numbers(series):
+    """
+    Values of a column as float64, NaN where missing or not a number, and a
+    mask of the values float64 may have rounded
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        numbers = series.to_numpy(dtype="float64", na_value=np.nan)
+        if series.dtype.kind in "iu" or str(series.dtype).startswith(("Int", "UInt")):
+            return numbers, np.abs(numbers) >= _FLOAT_EXACT_LIMIT
+        return numbers, np.zeros(len(numbers), dtype=bool)
+    texts = pd.Series(_texts(series), dtype=object)
+    numbers = pd.to_numeric(texts, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    # Text this long may carry more digits than float64 holds
+    lengths = texts.str.len().fillna(0).to_numpy()
+    return numbers, (lengths > _FLOAT_EXACT_DIGITS) | (np.abs(numbers) >= _FLOAT_EXACT_LIMIT)
+
+
+def _within_tolerance(left, right, abs_tolerance, rel_tolerance):
+    """math.isclose for arrays, with infinities of the same sign equal"""
+    with np.errstate(invalid="ignore"):
+        limit = np.maximum(abs_tolerance, rel_tolerance * np.maximum(np.abs(left), np.abs(right)))
+        return (np.abs(left - right) <= limit) | (left == right)
+
+
+def _exactly_within_tolerance(left, right, abs_tolerance, rel_tolerance):
+    """_within_tolerance for a pair of scalar values, computed in decimal"""
+    try:
+        left, right = Decimal(str(left).strip()), Decimal(str(right).strip())
+        limit = max(Decimal(repr(abs_tolerance)), Decimal(repr(rel_tolerance)) * max(abs(left), abs(right)))
+        return abs(left - right) <= limit or left == right
+    except (InvalidOperation, ValueError):
+        return False
+
+
+def _number_differences(left, right, plan):
+    """
+    Flag pairs of numbers further apart than the plan's tolerance
+
+    Returns:
+        tuple: (differs mask, mask of pairs a value of which isn't a number)
+    """
+    left_numbers, left_rounded = _numbers(left)
+    right_numbers, right_rounded = _numbers(right)
+    close = _within_tolerance(left_numbers, right_numbers, plan["abs_tolerance"], plan["rel_tolerance"])
+    # Pairs float64 can't tell apart are checked again exactly
+    for i in np.flatnonzero(close & (left_rounded | right_rounded)):
+        close[i] = _exactly_within_tolerance(left.iloc[i], right.iloc[i],
+                                             plan["abs_tolerance"], plan["rel_tolerance"])
+    unconverted = np.isnan(left_numbers) | np.isnan(right_numbers)
+    return ~close, unconverted
+
+
+def _parse_timestamps(texts, utc=False):
+    """Parse timestamp text, NaT where it isn't one; ISO 8601 explicitly where pandas supports it"""
+    if _PANDAS_ISO8601:
+        return pd.to_datetime(texts, errors="coerce", utc=utc, format="ISO8601")
+    return pd.to_datetime(texts, errors="coerce", utc=utc)
+
+
+def _utc_timestamps(series, plan):
+    """
+    Values of a column in UTC, floored to the plan's precision; NaT where
+    missing or not a timestamp. Values without a UTC offset are read in the
+    plan's timezone.
+    """
+    timezone = plan["timestamp_timezone"]
+    stamps = np.full(len(series), np.datetime64("NaT"), dtype="datetime64[us]")
+    if pd.api.types.is_datetime64_any_dtype(series):
+        local = series if series.dt.tz is not None else series.dt.tz_localize(
+            timezone, ambiguous="NaT", nonexistent="NaT")
+        stamps[:] = local.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    elif timezone == "UTC":
+        texts = pd.Series(_texts(series), dtype=object)
+        parsed = _parse_timestamps(texts, utc=True)
+        stamps[:] = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    else:
+        texts = pd.Series(_texts(series), dtype=object)
+        with_offset = texts.str.contains(_OFFSET_PATTERN).fillna(False).to_numpy(dtype=bool)
+        without_offset = texts.notna().to_numpy() & ~with_offset
+        if with_offset.any():
+            parsed = _parse_timestamps(texts[with_offset], utc=True)
+            stamps[with_offset] = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+        if without_offset.any():
+            parsed = _parse_timestamps(texts[without_offset])
+            parsed = parsed.dt.tz_localize(timezone, ambiguous="NaT", nonexistent="NaT").dt.tz_convert("UTC")
+            stamps[without_offset] = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    return pd.Series(stamps).dt.floor(plan["timestamp_precision"]).to_numpy()
+
+
+def _timestamp_differences(left, right, plan):
+    """
+    Flag pairs of timestamps that differ in UTC at the plan's precision
+
+    Returns:
+        tuple: (differs mask, mask of pairs a value of which isn't a timestamp)
+    """
+    left_stamps, right_stamps = _utc_timestamps(left, plan), _utc_timestamps(right, plan)
+    unconverted = np.isnat(left_stamps) | np.isnat(right_stamps)
+    return left_stamps != right_stamps, unconverted
+
+
+def _text_differences(left, right, plan):
+    """Flag pairs of values whose text differs under the plan's trim and case rules"""
+    return np.asarray(_texts(left, plan["text_trim"], plan["text_case_sensitive"])
+                      != _texts(right, plan["text_trim"], plan["text_case_sensitive"]), dtype=bool)
+
+
+def _objects(series):
+    """A column as an array of Python objects, with every kind of missing value as None"""
+    values = series.to_numpy(dtype=object, copy=True)
+    values[series.isna().to_numpy()] = None
+    return values
+
+
+def difference_masks(plan, source, dest, columns):
+    """
+    Flag, per column, the aligned row pairs whose values differ under a
+    comparison plan, one column at a time
+
+    Two missing values are equal and a missing value differs from any
+    other. Identical values are equal without conversion; the others are
+    converted to their column's kind, and compared as text when they don't
+    convert.
+
+    Args:
+        plan: Plan from compile_plan
+        source: Source rows
+        dest: Destination rows aligned with source
+        columns: Columns to compare; a column absent from a side is missing there
+
+    Returns:
+        dict: Column name to a boolean array, True where the pair differs
+    """
+    masks = {}
+    for column in columns:
+        left = source[column] if column in source.columns else pd.Series([None] * len(source), dtype=object)
+        right = dest[column] if column in dest.columns else pd.Series([None] * len(dest), dtype=object)
+        left_values, right_values = _objects(left), _objects(right)
+        left_missing, right_missing = pd.isna(left_values), pd.isna(right_values)
+        masks[column] = left_missing != right_missing
+        candidates = np.flatnonzero(~left_missing & ~right_missing & (left_values != right_values))
+        if not len(candidates):
+            continue
+
+        left = left.iloc[candidates].reset_index(drop=True)
+        right = right.iloc[candidates].reset_index(drop=True)
+        kind = plan["columns"].get(column, "text")
+        if kind == "number":
+            differs, unconverted = _number_differences(left, right, plan)
+        elif kind == "timestamp":
+            differs, unconverted = _timestamp_differences(left, right, plan)
+        else:
+            differs, unconverted = _text_differences(left, right, plan), np.zeros(len(left), dtype=bool)
+
+        fallback = np.flatnonzero(unconverted)
+        if len(fallback):
+            differs[fallback] = _text_differences(left.iloc[fallback], right.iloc[fallback], plan)
+        masks[column][candidates] = differs
+    return masks
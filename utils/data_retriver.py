@@ -1,33 +1,287 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
 import pandas as pd
-import json
-import hashlib
+from pandas.util import hash_array
+
+# Row fingerprints are built from 64-bit lanes; each lane has its own key for
+# hashing text and its own seed for everything else. The first key is the
+# pandas default, so text hashes in lane 0 equal hash_pandas_object's
+_LANE_KEYS = ("0123456789123456", "a7c2e94f1b6d8305")
+_LANE_SEEDS = (np.uint64(0x243f6a8885a308d3), np.uint64(0x13198a2e03707344))
+
+# Hash of a missing value of any kind (None, NaN, NaT, pd.NA)
+_MISSING_HASH = np.uint64(0x5bd1e9955bd1e995)
+
+# Mixed into the hashes of each kind of value so that, say, an integer and
+# a float with the same bit pattern don't collide
+_KIND_TAGS = {
+    "int": np.uint64(0),
+    "float": np.uint64(0x9e3779b97f4a7c15),
+    "bool": np.uint64(0xc2b2ae3d27d4eb4f),
+    "naive_ts": np.uint64(0x165667b19e3779f9),
+    "aware_ts": np.uint64(0x27d4eb2f165667c5),
+    "text": np.uint64(0),
+    "other": np.uint64(0x85ebca77c2b2ae63),
+}
+
+_INT64_MIN = -2 ** 63
+_INT64_END = 2 ** 63
+
+
+def detect_key_columns(df, table=None):
+    """
+    Detect the columns that identify each row, possibly several
+
+    Candidate keys, single columns first and ID-like names first among them,
+    are ruled out on a sample of rows and the survivors confirmed with one
+    hashed pass. When the table is named, the result is cached per table
+    layout, so later runs skip detection; frames of unknown tables are
+    never cached.
+
+    Args:
+        df: DataFrame to analyze
+        table: Table name for the key cache; df.attrs["table"] by default
 
+    Returns:
+        tuple: Names of the key columns, or None if no key was found
+    """
+    from utils.key_discovery import DEFAULT_SAMPLE_SIZE, find_key, schema_fingerprint
+
+    table = table if table is not None else df.attrs.get("table")
+    fingerprint = schema_fingerprint(table, df.columns, df.dtypes) if table is not None else None
+    sample = df.sample(min(len(df), DEFAULT_SAMPLE_SIZE), random_state=0)
+    return find_key(fingerprint, [df], sample=sample)
 
-def detect_primary_key(df):
+
+def detect_primary_key(df, table=None):
     """
     Attempt to detect primary key column
 
     Args:
         df: DataFrame to analyze
+        table: Table name for the key cache; df.attrs["table"] by default
+
+    Returns:
+        str: Name of likely primary key column or None, also when only
+             several columns together identify a row (see detect_key_columns)
+    """
+    key = detect_key_columns(df, table)
+    return key[0] if key and len(key) == 1 else None
+
+
+def _mix(values):
+    """splitmix64 finalizer over an array of uint64, wrapping on overflow"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xbf58476d1ce4e5b9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+def _canonical_value(value):
+    """
+    Return (kind, payload) for a non-missing value, such that values Python
+    considers equal get the same kind and payload
+
+    Integral numbers of any type become "int"; other floats, and Decimals
+    that are exactly a float, become "float"; timestamps become nanoseconds
+    since the epoch (in UTC for timezone-aware ones).
+    """
+    if isinstance(value, str):
+        return "text", value
+    if isinstance(value, (bool, np.bool_)):
+        return "bool", bool(value)
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        if _INT64_MIN <= value < _INT64_END:
+            return "int", value
+        return "other", f"int:{value}"
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        if value.is_integer() and _INT64_MIN <= value < _INT64_END:
+            return "int", int(value)
+        return "float", value
+    if isinstance(value, Decimal):
+        if value.is_finite() and value == value.to_integral_value() and _INT64_MIN <= value < _INT64_END:
+            return "int", int(value)
+        if Decimal(float(value)) == value:
+            return "float", float(value)
+        return "other", f"Decimal:{value.normalize()}"
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        value = pd.Timestamp(value)
+        try:
+            nanoseconds = value.value
+        except OverflowError:
+            return "other", f"Timestamp:{value.isoformat()}"
+        return ("aware_ts" if value.tzinfo is not None else "naive_ts"), nanoseconds
+    return "other", f"{type(value).__name__}:{value}"
+
+
+def _canonical_groups(series):
+    """
+    Split the non-missing values of a column by kind
+
+    Returns:
+        tuple: (missing mask, list of (kind, positions, payload array)),
+               where positions is None when the group covers every row
+    """
+    missing = series.isna().to_numpy()
+    dtype = series.dtype
+    present = None if not missing.any() else np.flatnonzero(~missing)
+
+    def whole(values):
+        return values if present is None else values[present]
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        return missing, [("categorical", present, None)]
+    if dtype.kind == "b":
+        return missing, [("bool", present, whole(series.to_numpy(dtype=bool, na_value=False)))]
+    if dtype.kind == "i" or (dtype.kind == "u" and dtype.itemsize < 8):
+        return missing, [("int", present, whole(series.to_numpy(dtype=np.int64, na_value=0)))]
+    if dtype.kind == "f":
+        values = whole(series.to_numpy(dtype=np.float64, na_value=0.0))
+        integral = (values == np.round(values)) & (values >= _INT64_MIN) & (values < _INT64_END)
+        positions = np.arange(len(series)) if present is None else present
+        return missing, [("int", positions[integral], values[integral].astype(np.int64)),
+                         ("float", positions[~integral], values[~integral])]
+    if dtype.kind == "M":
+        try:
+            if getattr(dtype, "tz", None) is not None:
+                nanoseconds = series.dt.tz_convert("UTC").dt.tz_localize(None).dt.as_unit("ns")
+                kind = "aware_ts"
+            else:
+                nanoseconds = series.dt.as_unit("ns")
+                kind = "naive_ts"
+            return missing, [(kind, present, whole(nanoseconds.to_numpy().view(np.int64)))]
+        except (OverflowError, pd.errors.OutOfBoundsDatetime):
+            pass
+
+    values = whole(series.to_numpy(dtype=object))
+    if pd.api.types.infer_dtype(values, skipna=False) == "string":
+        return missing, [("text", present, values)]
+
+    groups = {}
+    positions = range(len(series)) if present is None else present
+    for position, value in zip(positions, values):
+        kind, payload = _canonical_value(value)
+        group = groups.setdefault(kind, ([], []))
+        group[0].append(position)
+        group[1].append(payload)
+    return missing, [(kind, np.array(group_positions, dtype=np.intp), payloads)
+                     for kind, (group_positions, payloads) in groups.items()]
+
+
+def _hash_group(kind, payload, lane):
+    """Hash one group of canonical values in the given lane"""
+    seed = _LANE_SEEDS[lane] ^ _KIND_TAGS[kind]
+    if kind in ("text", "other"):
+        hashes = hash_array(np.asarray(payload, dtype=object), hash_key=_LANE_KEYS[lane], categorize=False)
+        return _mix(hashes ^ seed)
+    if kind == "bool":
+        return _mix(np.asarray(payload, dtype=np.uint64) ^ seed)
+    if kind == "float":
+        return _mix(np.asarray(payload, dtype=np.float64).view(np.uint64) ^ seed)
+    return _mix(np.asarray(payload, dtype=np.int64).view(np.uint64) ^ seed)
+
+
+def _column_hashes(series, lanes):
+    """Hash every value of a column, once per lane"""
+    missing, groups = _canonical_groups(series)
+    if groups and groups[0][0] == "categorical":
+        # Categories hash like the same values outside a categorical
+        category_hashes = _column_hashes(pd.Series(series.cat.categories), lanes)
+        codes = series.cat.codes.to_numpy()
+    results = []
+    for lane in range(lanes):
+        hashes = np.full(len(series), _MISSING_HASH, dtype=np.uint64)
+        for kind, positions, payload in groups:
+            if kind == "categorical":
+                group_hashes = category_hashes[lane][codes if positions is None else codes[positions]]
+            else:
+                group_hashes = _hash_group(kind, payload, lane)
+            if positions is None:
+                hashes = group_hashes
+            else:
+                hashes[positions] = group_hashes
+        results.append(hashes)
+    return results
+
+
+def row_fingerprints(df, columns=None, bits=64):
+    """
+    Compute a fingerprint of every row of a DataFrame in one vectorized pass
+
+    Rows get the same fingerprint when they hold equal values under the same
+    column names, whatever the column order: values are hashed in a form
+    where numbers equal in Python (1, 1.0, Decimal("1")) hash alike, every
+    kind of missing value hashes alike, and categoricals hash like their
+    values. Fingerprints are stable across processes and runs.
+
+    Args:
+        df: DataFrame to fingerprint
+        columns: Columns to include; all columns by default
+        bits: 64 or 128
 
     Returns:
-        str: Name of likely primary key column or None
+        pd.Series: Fingerprint per row, aligned with df.index; uint64 for 64
+                   bits, Python ints for 128 bits
     """
-    # Look for columns with 'id' in the name
-    id_columns = [col for col in df.columns if 'id' in col.lower() and col not in ['__schema__', '__table__']]
+    if bits not in (64, 128):
+        raise ValueError(f"Fingerprints are 64 or 128 bits, not {bits}")
+    lanes = bits // 64
+    wanted = set(df.columns if columns is None else columns)
+    # Sorted by name so the fingerprint doesn't depend on column order
+    positions = sorted((i for i, col in enumerate(df.columns) if col in wanted), key=lambda i: str(df.columns[i]))
+
+    combined = [np.full(len(df), _LANE_SEEDS[lane], dtype=np.uint64) for lane in range(lanes)]
+    for position in positions:
+        name = np.array([str(df.columns[position])], dtype=object)
+        for lane, hashes in enumerate(_column_hashes(df.iloc[:, position], lanes)):
+            name_hash = hash_array(name, hash_key=_LANE_KEYS[lane])[0]
+            combined[lane] = _mix(combined[lane] ^ _mix(hashes ^ name_hash))
 
-    if id_columns:
-        # Check if any of these have unique values
-        for col in id_columns:
-            if df[col].nunique() == len(df):
-                return col
+    if lanes == 1:
+        return pd.Series(combined[0], index=df.index)
+    return pd.Series([(int(high) << 64) | int(low) for high, low in zip(*combined)], index=df.index, dtype=object)
 
-    # If no ID column found, check other columns for uniqueness
-    for col in df.columns:
-        if col not in ['__schema__', '__table__'] and df[col].nunique() == len(df):
-            return col
 
-    return None
+def text_batch_fingerprint(key_texts, columns, column_values, skip_columns=()):
+    """
+    Order-independent hashes of a batch of rows compared as stripped text
+
+    Every non-null cell is hashed with its row's key text and column name, so
+    sums over any number of batches don't depend on row order. A row's hash
+    is the sum of its key hash and cell hashes, so a missing value and an
+    absent column hash alike. This is the fingerprint of the streamed
+    comparators, which compare text; row_fingerprints hashes typed values.
+
+    Args:
+        key_texts: Key text of each row; tuples of texts for composite keys
+        columns: Column names
+        column_values: One list of values per column
+        skip_columns: Columns left out of the hashes
+
+    Returns:
+        tuple: (key hashes and row hashes as uint64 arrays, dict of column
+                name to the sum of its cell hashes), sums wrapping at 2**64
+    """
+    keys = np.array(["\x1f".join(key) if isinstance(key, tuple) else key for key in key_texts], dtype=object)
+    key_hashes = _mix(hash_array(keys, categorize=False) ^ _LANE_SEEDS[0])
+    row_hashes = key_hashes.copy()
+    column_sums = {}
+    for column, values in zip(columns, column_values):
+        if column in skip_columns:
+            continue
+        present = np.array([value is not None for value in values], dtype=bool)
+        texts = np.array(["" if value is None else str(value).strip() for value in values], dtype=object)
+        column_seed = hash_array(np.array([str(column)], dtype=object), categorize=False)[0]
+        cell_hashes = _mix(key_hashes + _mix(hash_array(texts, categorize=False) ^ column_seed))
+        cell_hashes[~present] = 0
+        row_hashes += cell_hashes
+        column_sums[column] = int(cell_hashes.sum(dtype=np.uint64))
+    return key_hashes, row_hashes, column_sums
 
 
 def calculate_row_hash(row):
@@ -38,62 +292,171 @@ def calculate_row_hash(row):
         row: Pandas Series representing a row
 
     Returns:
-        str: Hash value for the row
+        str: Hash value for the row, the 128-bit row fingerprint in hex
     """
     # Drop metadata columns if they exist
     if "__schema__" in row.index:
         row = row.drop(["__schema__", "__table__"])
 
-    # Convert row to string and hash
-    row_str = json.dumps(row.to_dict(), sort_keys=True)
-    return hashlib.md5(row_str.encode()).hexdigest()
+    return format(row_fingerprints(row.to_frame().T, bits=128).iloc[0], "032x")
+
+
+def _lookup_arrays(source_keys, dest_keys):
+    """
+    Return two key columns as arrays that compare with Python equality:
+    native arrays when both share a numpy dtype, object arrays with every
+    missing value as None otherwise
+    """
+    source_keys, dest_keys = pd.Series(source_keys), pd.Series(dest_keys)
+    if source_keys.dtype == dest_keys.dtype and isinstance(source_keys.dtype, np.dtype) and source_keys.dtype.kind != "O":
+        return source_keys.to_numpy(), dest_keys.to_numpy()
+
+    arrays = []
+    for keys in (source_keys, dest_keys):
+        values = keys.to_numpy(dtype=object, copy=True)
+        values[keys.isna().to_numpy()] = None
+        arrays.append(values)
+    return arrays
+
+
+def match_positions(source_keys, dest_keys, pair_duplicates=True, match_missing=False):
+    """
+    Match every source key to a destination row with an equal key
+
+    Keys are factorized together and looked up in one pass, so the cost is
+    linear in the number of rows. Keys compare with Python equality, so 1,
+    1.0 and Decimal("1") are the same key.
+
+    Args:
+        source_keys: Series or array of source keys
+        dest_keys: Series or array of destination keys
+        pair_duplicates: If True, the n-th source row with a key matches the
+                         n-th destination row with it and is unmatched when
+                         there are fewer; if False, every source row matches
+                         the first destination row with its key
+        match_missing: Whether a missing key matches a missing key
+
+    Returns:
+        numpy.ndarray: Destination row position per source row, -1 where
+                       there is no match
+    """
+    source, dest = _lookup_arrays(source_keys, dest_keys)
+    codes, _ = pd.factorize(np.concatenate([source, dest]), use_na_sentinel=not match_missing)
+    source_codes, dest_codes = codes[:len(source)], codes[len(source):]
+
+    # Number repeated keys by occurrence and look up (key, occurrence) pairs;
+    # every destination pair is unique, so the first occurrence wins when
+    # duplicates aren't paired
+    dest_occurrence = pd.Series(dest_codes).groupby(dest_codes).cumcount().to_numpy()
+    if pair_duplicates:
+        source_occurrence = pd.Series(source_codes).groupby(source_codes).cumcount().to_numpy()
+    else:
+        source_occurrence = np.zeros(len(source), dtype=np.int64)
+    stride = max(len(source), len(dest)) + 1
+    dest_pairs = dest_codes.astype(np.int64) * stride + dest_occurrence
+    # Missing destination keys get distinct negative values no source pair has
+    dest_pairs[dest_codes < 0] = -1 - np.flatnonzero(dest_codes < 0)
+    found = pd.Index(dest_pairs).get_indexer(source_codes.astype(np.int64) * stride + source_occurrence)
+    found[source_codes < 0] = -1
+    return found
+
+
+def match_multiset(source_keys, dest_keys, source_hashes, dest_hashes, match_missing=False):
+    """
+    Match rows as multisets of (key, row hash) pairs
+
+    Rows with an equal key and row hash pair up first, the n-th source row
+    of a pair with the n-th destination row of it. The rows left over then
+    pair up by key alone, in order, so a key with more rows on one side
+    leaves the surplus unmatched. Both steps are vectorized lookups, linear
+    in the number of rows.
+
+    Args:
+        source_keys: Series or array of source keys
+        dest_keys: Series or array of destination keys
+        source_hashes: uint64 hash of every source row, e.g. row_fingerprints
+        dest_hashes: uint64 hash of every destination row
+        match_missing: Whether a missing key matches a missing key
+
+    Returns:
+        tuple: (destination row position per source row, -1 where there is
+               no match; boolean array, True where the rows matched on an
+               equal row hash)
+    """
+    source, dest = _lookup_arrays(source_keys, dest_keys)
+    codes, _ = pd.factorize(np.concatenate([source, dest]), use_na_sentinel=not match_missing)
+    source_codes, dest_codes = codes[:len(source)], codes[len(source):]
+
+    def pair_hashes(key_codes, row_hashes):
+        return _mix(np.asarray(row_hashes, dtype=np.uint64) ^ _mix(key_codes.astype(np.uint64)))
+
+    equal = match_positions(pair_hashes(source_codes, source_hashes), pair_hashes(dest_codes, dest_hashes))
+    equal[source_codes < 0] = -1
+
+    taken = np.zeros(len(dest), dtype=bool)
+    taken[equal[equal >= 0]] = True
+    rest_source = np.flatnonzero(equal < 0)
+    rest_dest = np.flatnonzero(~taken)
+    paired = match_positions(source_codes[rest_source], dest_codes[rest_dest])
+    paired[source_codes[rest_source] < 0] = -1
+
+    positions = equal.copy()
+    hit = paired >= 0
+    positions[rest_source[hit]] = rest_dest[paired[hit]]
+    return positions, equal >= 0
+
+
+def key_multiplicities(source_keys, dest_keys):
+    """
+    Count the rows per distinct key on each side, with missing keys counted
+    together as one key
+
+    Returns:
+        tuple: (distinct keys, source row count per key, destination row
+               count per key), as arrays in order of first appearance
+    """
+    source, dest = _lookup_arrays(source_keys, dest_keys)
+    codes, uniques = pd.factorize(np.concatenate([source, dest]), use_na_sentinel=False)
+    source_counts = np.bincount(codes[:len(source)], minlength=len(uniques))
+    dest_counts = np.bincount(codes[len(source):], minlength=len(uniques))
+    return np.asarray(uniques, dtype=object), source_counts, dest_counts
 
 
 def find_matching_rows(df1, df2, primary_key=None):
     """
     Find matching rows between two dataframes
 
+    Rows are matched on the primary key when both frames have it, and on
+    row fingerprints (equal values in every column) otherwise. Duplicates
+    pair up in order: the n-th row of df1 with a key matches the n-th row
+    of df2 with that key. Rows with a missing primary key never match.
+
     Args:
         df1: First DataFrame
         df2: Second DataFrame
         primary_key: Column name for primary key
 
     Returns:
-        dict: Dictionary mapping rows from df1 to df2
+        numpy.ndarray: Position in df2 of the row matching each row of df1,
+                       -1 where there is none
     """
-    matches = {}
-
     # Drop metadata columns if they exist
     if "__schema__" in df1.columns:
         df1_clean = df1.drop(["__schema__", "__table__"], axis=1)
     else:
-        df1_clean = df1.copy()
+        df1_clean = df1
 
     if "__schema__" in df2.columns:
         df2_clean = df2.drop(["__schema__", "__table__"], axis=1)
     else:
-        df2_clean = df2.copy()
+        df2_clean = df2
 
     # If primary key is specified, use it for matching
     if primary_key and primary_key in df1_clean.columns and primary_key in df2_clean.columns:
-        for idx1, row1 in df1_clean.iterrows():
-            pk_value = row1[primary_key]
-            matching_rows = df2_clean[df2_clean[primary_key] == pk_value]
-
-            if not matching_rows.empty:
-                matches[idx1] = matching_rows.index[0]
-    else:
-        # Otherwise, try to match based on row hash
-        df1_hashes = df1_clean.apply(calculate_row_hash, axis=1)
-        df2_hashes = df2_clean.apply(calculate_row_hash, axis=1)
-
-        for idx1, hash1 in df1_hashes.items():
-            matches_in_df2 = df2_hashes[df2_hashes == hash1].index
-
-            if not matches_in_df2.empty:
-                matches[idx1] = matches_in_df2[0]
+        return match_positions(df1_clean[primary_key], df2_clean[primary_key])
 
-    return matches
+    # Otherwise, try to match based on row fingerprints
+    return match_positions(row_fingerprints(df1_clean), row_fingerprints(df2_clean))
 
 
 def get_common_tables(schema1_data, schema2_data):
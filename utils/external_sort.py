@@ -0,0 +1,101 @@
+import heapq
+import os
+import pickle
+import tempfile
+
+# Runs merged at once; more runs are first merged in groups into longer runs
+MERGE_FAN_IN = 64
+
+# Fewest records read from a run per block while merging
+_MIN_BLOCK_RECORDS = 16
+
+
+def _write_run(records, spill_dir, block_records):
+    """Write sorted records to a new run file and return its path"""
+    fd, path = tempfile.mkstemp(suffix=".run", dir=spill_dir)
+    with os.fdopen(fd, "wb") as f:
+        block = []
+        for record in records:
+            block.append(record)
+            if len(block) >= block_records:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+                block = []
+        if block:
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def iter_run(path):
+    """Yield the records of a run file in order"""
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def spill_sorted_runs(records, sort_key, run_size, spill_dir):
+    """
+    Split a stream of records into sorted runs on disk
+
+    At most run_size records are held in memory at a time.
+
+    Args:
+        records: Iterable of picklable records
+        sort_key: Function giving the sort key of a record
+        run_size: Maximum number of records per run
+        spill_dir: Directory for the run files
+
+    Returns:
+        list: Paths of the run files, each sorted by sort_key
+    """
+    run_size = max(1, run_size)
+    block_records = max(_MIN_BLOCK_RECORDS, run_size // MERGE_FAN_IN)
+    runs = []
+    buffer = []
+    for record in records:
+        buffer.append(record)
+        if len(buffer) >= run_size:
+            buffer.sort(key=sort_key)
+            runs.append(_write_run(buffer, spill_dir, block_records))
+            buffer = []
+    if buffer:
+        buffer.sort(key=sort_key)
+        runs.append(_write_run(buffer, spill_dir, block_records))
+    return runs
+
+
+def merge_runs(runs, sort_key, run_size, spill_dir):
+    """
+    Stream the records of sorted runs as one sorted sequence
+
+    Runs are merged MERGE_FAN_IN at a time, reading each in blocks of about
+    run_size / MERGE_FAN_IN records, so memory stays near run_size records
+    however many runs there are. Run files are deleted once merged.
+
+    Args:
+        runs: Paths of run files from spill_sorted_runs
+        sort_key: Function the runs are sorted by
+        run_size: Run size passed to spill_sorted_runs
+        spill_dir: Directory for intermediate runs
+
+    Yields:
+        Records in sort_key order; break ties in the key where the order of
+        equal records matters
+    """
+    block_records = max(_MIN_BLOCK_RECORDS, max(1, run_size) // MERGE_FAN_IN)
+    runs = list(runs)
+    try:
+        while len(runs) > MERGE_FAN_IN:
+            group, runs = runs[:MERGE_FAN_IN], runs[MERGE_FAN_IN:]
+            merged = heapq.merge(*(iter_run(path) for path in group), key=sort_key)
+            runs.append(_write_run(merged, spill_dir, block_records))
+            for path in group:
+                os.remove(path)
+        yield from heapq.merge(*(iter_run(path) for path in runs), key=sort_key)
+    finally:
+        for path in runs:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+from utils.external_sort import iter_run
+
+# Fewest records buffered per partition before a block is written
+_MIN_BLOCK_RECORDS = 16
+
+
+def partition_of(key, partitions, salt=0):
+    """
+    Partition of a key: a blake2b digest of its repr keyed by the salt, so
+    each salt splits keys independently of every other salt
+    """
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8, key=salt.to_bytes(8, "big")).digest()
+    return int.from_bytes(digest, "big") % partitions
+
+
+def partition_records(records, partition_key, partitions, spill_dir, buffer_records, salt=0):
+    """
+    Hash-partition a stream of records into files on disk
+
+    Records with equal keys always land in the same partition, and each
+    partition keeps the records in stream order. Partitions are assigned by
+    partition_of, so streams partitioned with the same salt line up in any
+    process.
+
+    Args:
+        records: Iterable of picklable records
+        partition_key: Function giving the key of a record
+        partitions: Number of partitions
+        spill_dir: Directory for the partition files
+        buffer_records: Records held in memory across all partitions before
+                        they are written out
+        salt: Varies the assignment, for repartitioning an oversized partition
+
+    Returns:
+        list: (path, record count) per partition, readable with iter_run
+    """
+    partitions = max(1, partitions)
+    block_records = max(_MIN_BLOCK_RECORDS, buffer_records // partitions)
+    paths = []
+    files = []
+    try:
+        for _ in range(partitions):
+            fd, path = tempfile.mkstemp(suffix=".part", dir=spill_dir)
+            paths.append(path)
+            files.append(os.fdopen(fd, "wb"))
+
+        buffers = [[] for _ in range(partitions)]
+        counts = [0] * partitions
+        for record in records:
+            i = partition_of(partition_key(record), partitions, salt)
+            buffers[i].append(record)
+            counts[i] += 1
+            if len(buffers[i]) >= block_records:
+                pickle.dump(buffers[i], files[i], protocol=pickle.HIGHEST_PROTOCOL)
+                buffers[i] = []
+
+        for f, buffer in zip(files, buffers):
+            if buffer:
+                pickle.dump(buffer, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        for path in paths:
+            os.remove(path)
+        raise
+    finally:
+        for f in files:
+            f.close()
+
+    return list(zip(paths, counts))
+
+
+def repartition(path, partition_key, partitions, spill_dir, buffer_records, salt):
+    """
+    Split one partition file into smaller ones with a different salt,
+    deleting the original
+
+    Returns:
+        list: (path, record count) per new partition
+    """
+    parts = partition_records(iter_run(path), partition_key, partitions, spill_dir, buffer_records, salt)
+    os.remove(path)
+    return parts
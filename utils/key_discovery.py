@@ -0,0 +1,256 @@
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.data_retriver import row_fingerprints
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Settings travel through the environment so that worker processes inherit them
+_ENV_PATH = "KEY_CACHE_PATH"
+_ENV_ENABLED = "KEY_CACHE_ENABLED"
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, ".parse_cache", "keys.json")
+
+# Most columns in a composite key, and most columns combined into one
+MAX_KEY_COLUMNS = 3
+_COMBINATION_POOL = 8
+
+# Rows sampled to rule out candidate keys before the confirming pass
+DEFAULT_SAMPLE_SIZE = 10000
+
+# Most sample-unique candidates checked in the confirming pass
+MAX_CANDIDATES = 8
+
+
+def configure_key_cache(config):
+    """
+    Apply key cache settings from the configuration
+
+    Args:
+        config: Configuration dictionary; reads key_cache_enabled and
+                key_cache_path
+    """
+    cache_path = config.get("key_cache_path")
+    if cache_path:
+        if not os.path.isabs(cache_path):
+            cache_path = os.path.join(PROJECT_ROOT, cache_path)
+        os.environ[_ENV_PATH] = cache_path
+    if config.get("key_cache_enabled") is not None:
+        os.environ[_ENV_ENABLED] = "1" if config["key_cache_enabled"] else "0"
+
+
+def _cache_path():
+    return os.environ.get(_ENV_PATH, DEFAULT_CACHE_PATH)
+
+
+def _enabled():
+    return os.environ.get(_ENV_ENABLED, "1") != "0"
+
+
+def _read_cache():
+    try:
+        with open(_cache_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def schema_fingerprint(table, columns, dtypes=None):
+    """
+    Identify a table layout: its name, column names and, optionally, dtypes
+
+    Returns:
+        str: Hex digest
+    """
+    layout = [str(table), [str(column) for column in columns]]
+    if dtypes is not None:
+        layout.append([str(dtype) for dtype in dtypes])
+    return hashlib.blake2b(json.dumps(layout).encode(), digest_size=16).hexdigest()
+
+
+def cached_key(fingerprint):
+    """
+    Look up the key found earlier for a table layout
+
+    Returns:
+        tuple: (found, key columns or None when the layout has no key)
+    """
+    if not _enabled():
+        return False, None
+    cache = _read_cache()
+    if fingerprint not in cache:
+        return False, None
+    key = cache[fingerprint]
+    return True, tuple(key) if key is not None else None
+
+
+def store_key(fingerprint, key):
+    """Remember the key found for a table layout; None records that it has none"""
+    if not _enabled():
+        return
+    cache_path = _cache_path()
+    cache = _read_cache()
+    cache[fingerprint] = list(key) if key is not None else None
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, "w") as f:
+            json.dump(cache, f, indent=1)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not save key cache at %s: %s", cache_path, e)
+
+
+def sample_candidates(sample, preferred=(), required=(), max_columns=MAX_KEY_COLUMNS, limit=MAX_CANDIDATES):
+    """
+    Find the column sets that identify every row of a sample
+
+    Smaller sets are tried first, and larger ones only when no smaller set
+    identifies the sample rows; sets needing two or more columns besides the
+    required ones combine the most varied columns. Columns with missing
+    values are never part of a key.
+
+    Args:
+        sample: DataFrame of sample rows
+        preferred: Columns to rank first, in order
+        required: Columns every candidate must include
+        max_columns: Most columns in a composite key
+        limit: Most candidates returned
+
+    Returns:
+        list: Tuples of column names, smallest and preferred first
+    """
+    if sample.empty:
+        return []
+
+    rank = {column: i for i, column in enumerate(preferred)}
+    usable = [column for column in sample.columns if not sample[column].isna().any()]
+    if not set(required) <= set(usable):
+        return []
+    # Preferred columns first, then ID-like names, then table order
+    usable.sort(key=lambda column: (rank.get(column, len(rank)), 'id' not in str(column).lower()))
+    distinct = {column: sample[column].nunique() for column in usable}
+    others = [column for column in usable if column not in required]
+    pool = sorted(others, key=lambda column: -distinct[column])[:_COMBINATION_POOL]
+    pool.sort(key=others.index)
+
+    candidates = []
+    size = max(1, len(required))
+    while not candidates and size <= max_columns:
+        added = size - len(required)
+        for extra in itertools.combinations(others if added <= 1 else pool, added):
+            candidate = tuple(required) + extra
+            if len(candidate) == 1:
+                unique = distinct[candidate[0]] == len(sample)
+            else:
+                unique = not sample.duplicated(subset=list(candidate)).any()
+            if unique:
+                candidates.append(candidate)
+                if len(candidates) >= limit:
+                    break
+        size += 1
+    return candidates
+
+
+def confirm_unique(chunks, candidates):
+    """
+    Keep the candidate keys that identify every row, in one pass over the data
+
+    Each candidate's columns are fingerprinted per chunk (8 bytes per row and
+    candidate); a candidate drops out at its first missing value or repeated
+    fingerprint. Values compare as in row_fingerprints, so 1 and 1.0 are the
+    same key value.
+
+    Args:
+        chunks: Iterable of DataFrames holding every row
+        candidates: Tuples of column names
+
+    Returns:
+        list: The candidates that are unique over all rows, in order
+    """
+    remaining = list(candidates)
+    fingerprints = {candidate: [] for candidate in remaining}
+    for chunk in chunks:
+        for candidate in list(remaining):
+            columns = list(candidate)
+            if not set(columns) <= set(chunk.columns) or chunk[columns].isna().any().any():
+                remaining.remove(candidate)
+                continue
+            values = row_fingerprints(chunk, columns=columns).to_numpy()
+            if len(np.unique(values)) != len(values):
+                remaining.remove(candidate)
+                continue
+            fingerprints[candidate].append(values)
+        if not remaining:
+            return []
+
+    unique = []
+    for candidate in remaining:
+        values = np.concatenate(fingerprints[candidate]) if fingerprints[candidate] else np.empty(0, np.uint64)
+        if len(np.unique(values)) == len(values):
+            unique.append(candidate)
+    return unique
+
+
+def row_chunks(rows, chunk_size):
+    """Group an iterable of row dicts into DataFrames of up to chunk_size rows"""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, max(1, chunk_size)))
+        if not chunk:
+            return
+        yield pd.DataFrame.from_records(chunk)
+
+
+def find_key(fingerprint, chunks, preferred=(), required=(), sample=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Find the smallest set of columns that identifies every row of a table
+
+    A key found earlier for the same layout is reused without reading the
+    data. Otherwise candidates are tested on a sample, and the survivors are
+    confirmed in one pass over chunks.
+
+    Args:
+        fingerprint: schema_fingerprint of the table, or None to detect the
+                     key without the cache
+        chunks: Iterable of DataFrames holding every row; not read on a cache hit
+        preferred: Columns to choose first among keys of the same size
+        required: Columns the key must include
+        sample: Sample rows; the first sample_size rows of chunks by default
+        sample_size: Rows taken from chunks when no sample is given
+
+    Returns:
+        tuple: Key column names, or None if no key of up to MAX_KEY_COLUMNS columns exists
+    """
+    found, key = cached_key(fingerprint) if fingerprint is not None else (False, None)
+    if found:
+        logger.debug("Key for layout %s from cache: %s", fingerprint, key)
+        return key
+
+    chunks = iter(chunks)
+    if sample is None:
+        head = []
+        rows = 0
+        for chunk in chunks:
+            head.append(chunk)
+            rows += len(chunk)
+            if rows >= sample_size:
+                break
+        chunks = itertools.chain(head, chunks)
+        sample = pd.concat(head, ignore_index=True).head(sample_size) if head else pd.DataFrame()
+
+    candidates = sample_candidates(sample, preferred, required)
+    logger.debug("Candidate keys from %s sample rows: %s", len(sample), candidates)
+    unique = confirm_unique(chunks, candidates) if candidates else []
+    key = unique[0] if unique else None
+    logger.info("Discovered key: %s", list(key) if key else None)
+    if fingerprint is not None:
+        store_key(fingerprint, key)
+    return key
@@ -0,0 +1,160 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+# Settings travel through the environment so that worker processes inherit them
+_ENV_LEVEL = "LOG_LEVEL"
+_ENV_RATE_LIMIT = "LOG_RATE_LIMIT"
+_ENV_RATE_INTERVAL = "LOG_RATE_INTERVAL"
+
+# Parent of every logger handed out by get_logger
+ROOT_LOGGER = "data_validation"
+
+DEFAULT_LEVEL = "INFO"
+# DEBUG and WARNING records allowed from one call site per interval before the
+# rest are dropped; INFO progress and errors are never dropped
+RATE_LIMITED_LEVELS = (logging.DEBUG, logging.WARNING)
+DEFAULT_RATE_LIMIT = 20
+DEFAULT_RATE_INTERVAL = 10.0
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, so redirection keeps working"""
+
+    def __init__(self, level=logging.NOTSET):
+        logging.Handler.__init__(self, level)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+class _LevelPrefixFormatter(logging.Formatter):
+    """Plain message for INFO, "LEVEL: message" for everything else"""
+
+    def format(self, record):
+        message = super().format(record)
+        if record.levelno == logging.INFO:
+            return message
+        return f"{record.levelname}: {message}"
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `limit` DEBUG or WARNING records per call site in
+    each `interval` seconds; records of other levels always pass
+
+    A call site is the logger name, source line and unformatted message, so
+    a message logged once per row is cut off after the first few rows while
+    other messages still get through. When a new interval starts, the number
+    of records dropped in the last one is added to the next record let
+    through from that call site.
+    """
+
+    def __init__(self, limit, interval):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno not in RATE_LIMITED_LEVELS:
+            return True
+
+        site = (record.name, record.lineno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._sites.get(site, (now, 0, 0))
+            if now - window_start >= self.interval:
+                window_start, count = now, 0
+            if count >= self.limit:
+                self._sites[site] = (window_start, count, suppressed + 1)
+                return False
+            self._sites[site] = (window_start, count + 1, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+def _level_from_env():
+    level = os.environ.get(_ENV_LEVEL, DEFAULT_LEVEL).upper()
+    return level if isinstance(logging.getLevelName(level), int) else DEFAULT_LEVEL
+
+
+def _apply_settings():
+    """(Re)build the handler on the root logger from the environment settings"""
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    handler = _StdoutHandler()
+    handler.setFormatter(_LevelPrefixFormatter("%(message)s"))
+    try:
+        limit = int(os.environ.get(_ENV_RATE_LIMIT, DEFAULT_RATE_LIMIT))
+        interval = float(os.environ.get(_ENV_RATE_INTERVAL, DEFAULT_RATE_INTERVAL))
+    except ValueError:
+        limit, interval = DEFAULT_RATE_LIMIT, DEFAULT_RATE_INTERVAL
+    handler.addFilter(RateLimitFilter(limit, interval))
+
+    logger.addHandler(handler)
+    logger.setLevel(_level_from_env())
+    # Records stay out of the root logger, which third-party libraries configure
+    logger.propagate = False
+
+
+def configure_logging(config):
+    """
+    Apply logging settings from the configuration
+
+    Args:
+        config: Configuration dictionary; reads log_level (DEBUG, INFO,
+                WARNING or ERROR), quiet (true for WARNING and above only,
+                overriding log_level), log_rate_limit (DEBUG and WARNING
+                records per call site per interval, 0 for no limit) and log_rate_interval (seconds)
+    """
+    global _configured
+
+    if config.get("quiet"):
+        os.environ[_ENV_LEVEL] = "WARNING"
+    elif config.get("log_level"):
+        os.environ[_ENV_LEVEL] = str(config["log_level"]).upper()
+    if config.get("log_rate_limit") is not None:
+        os.environ[_ENV_RATE_LIMIT] = str(config["log_rate_limit"])
+    if config.get("log_rate_interval") is not None:
+        os.environ[_ENV_RATE_INTERVAL] = str(config["log_rate_interval"])
+
+    with _configure_lock:
+        _apply_settings()
+        _configured = True
+
+
+def get_logger(name):
+    """
+    Return the logger for a module
+
+    The first call in a process sets up output from the environment settings,
+    so worker processes log the same way as the process that started them.
+
+    Args:
+        name: Module name, usually __name__
+
+    Returns:
+        logging.Logger: Child of the "data_validation" logger; use %-style
+                        arguments (logger.debug("%s rows", n)) so that
+                        messages below the level are never formatted
+    """
+    global _configured
+
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                _apply_settings()
+                _configured = True
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,57 @@
+import numpy as np
+
+# Children per node of a checksum tree
+MERKLE_FAN_OUT = 16
+
+
+def build_levels(leaf_digests, fan_out=MERKLE_FAN_OUT):
+    """
+    Build a checksum tree over leaf digests
+
+    Args:
+        leaf_digests: One hashable digest per leaf
+        fan_out: Children per node
+
+    Returns:
+        list: Levels of node digests, from the leaves up to a single root
+    """
+    levels = [list(leaf_digests)]
+    while len(levels[-1]) > 1:
+        children = levels[-1]
+        levels.append([hash(tuple(children[i:i + fan_out])) for i in range(0, len(children), fan_out)])
+    return levels
+
+
+def differing_leaves(levels_a, levels_b, fan_out=MERKLE_FAN_OUT):
+    """
+    Find the leaves whose digests differ between two trees of the same shape,
+    descending only into nodes whose digests differ
+
+    Args:
+        levels_a: Levels from build_levels
+        levels_b: Levels from build_levels over as many leaves
+        fan_out: Children per node the trees were built with
+
+    Returns:
+        list: Indexes of the differing leaves, in order
+    """
+    nodes = [0]
+    for depth in range(len(levels_a) - 1, 0, -1):
+        differing = [i for i in nodes if levels_a[depth][i] != levels_b[depth][i]]
+        width = len(levels_a[depth - 1])
+        nodes = [child for i in differing for child in range(i * fan_out, min((i + 1) * fan_out, width))]
+    return [i for i in nodes if levels_a[0][i] != levels_b[0][i]]
+
+
+def repeated_values(values):
+    """
+    Return the distinct int64 values that occur more than once
+
+    Args:
+        values: Buffer of int64 values, such as an array.array("q")
+
+    Returns:
+        numpy.ndarray: The repeated values
+    """
+    ordered = np.sort(np.frombuffer(values, dtype=np.int64))
+    return np.unique(ordered[1:][ordered[1:] == ordered[:-1]])
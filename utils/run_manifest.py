@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MANIFEST_DIR = os.path.join(PROJECT_ROOT, "validation_reports", "manifest")
+
+# Bumped when the manifest layout changes; older manifests are ignored
+MANIFEST_VERSION = 1
+
+_MANIFEST_FILE = "manifest.json"
+_RESULTS_DIR = "tables"
+
+
+def manifest_dir(config):
+    """
+    Directory of the run manifest and the table results it refers to
+
+    Args:
+        config: Configuration dictionary; reads run_manifest_dir
+
+    Returns:
+        str: Absolute directory path
+    """
+    path = config.get("run_manifest_dir")
+    if not path:
+        return DEFAULT_MANIFEST_DIR
+    return path if os.path.isabs(path) else os.path.join(PROJECT_ROOT, path)
+
+
+def fingerprint(*parts):
+    """
+    Combine JSON-serializable parts, such as per-file digests, into one digest
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True, default=str).encode(),
+                           digest_size=20).hexdigest()
+
+
+def entry_key(source_schema, dest_schema, table):
+    """Manifest key of one table compared between two schemas"""
+    return f"{source_schema}/{dest_schema}/{table}"
+
+
+def load_manifest(directory):
+    """
+    Read the manifest of the previous run
+
+    Returns:
+        dict: Entries keyed by entry_key, each with source, destination and
+              settings fingerprints and the file holding the comparison
+              result; empty when there is no usable manifest
+    """
+    try:
+        with open(os.path.join(directory, _MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest["tables"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def save_manifest(directory, entries):
+    """Write the manifest, replacing the previous one in a single step"""
+    path = os.path.join(directory, _MANIFEST_FILE)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(temp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "tables": entries}, f, indent=1)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning("Could not save run manifest at %s: %s", path, e)
+
+
+def cached_result(directory, entries, key, source, destination, settings):
+    """
+    Return the stored comparison result of a table whose inputs and settings
+    are unchanged since it was compared
+
+    Args:
+        directory: Manifest directory
+        entries: Manifest entries from load_manifest
+        key: entry_key of the table
+        source: Fingerprint of the table's source input
+        destination: Fingerprint of the table's destination input
+        settings: Fingerprint of the settings the result depends on
+
+    Returns:
+        dict: The table comparison, or None if it has to be recomputed
+    """
+    entry = entries.get(key)
+    if not entry:
+        return None
+    if (entry.get("source"), entry.get("destination"), entry.get("settings")) != (source, destination, settings):
+        changed = [name for name, value in (("source", source), ("destination", destination), ("settings", settings))
+                   if entry.get(name) != value]
+        logger.debug("Recomparing %s: %s changed", key, ", ".join(changed))
+        return None
+    try:
+        with open(os.path.join(directory, _RESULTS_DIR, entry["result"])) as f:
+            return json.load(f)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Could not read stored result for %s: %s", key, e)
+        return None
+
+
+def store_result(directory, entries, key, source, destination, settings, comparison):
+    """
+    Save a table comparison and record it in the manifest entries
+
+    The entries are updated in memory; save_manifest writes them out.
+    """
+    name = fingerprint(key) + ".json"
+    path = os.path.join(directory, _RESULTS_DIR, name)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, "w") as f:
+            json.dump(comparison, f)
+        os.replace(temp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("Could not store result for %s: %s", key, e)
+        entries.pop(key, None)
+        return
+    entries[key] = {"source": source, "destination": destination, "settings": settings, "result": name}
@@ -0,0 +1,65 @@
+import hashlib
+import math
+from statistics import NormalDist
+
+# Confidence level of the reported intervals unless configured
+DEFAULT_CONFIDENCE = 0.95
+
+
+def sample_point(key_value):
+    """
+    Place a key in [0, 1) by a hash of its text
+
+    The point is the same on both sides of a comparison and in every run, so
+    selecting keys below a threshold samples the same keys everywhere.
+
+    Args:
+        key_value: Key text, or a tuple of texts for a composite key
+    """
+    digest = hashlib.blake2b(repr(key_value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def prune_bottom_k(kept, size, threshold=1.0):
+    """
+    Keep the entries of the size lowest distinct points
+
+    Args:
+        kept: (point, item) pairs, in stream order, all below threshold
+        size: Number of distinct points to keep
+        threshold: Threshold from the previous pruning
+
+    Returns:
+        tuple: (kept pairs in the same order, threshold; every point of a
+               kept pair is below it)
+    """
+    points = sorted({point for point, _ in kept})
+    if len(points) <= size:
+        return kept, threshold
+    threshold = points[size]
+    return [(point, item) for point, item in kept if point < threshold], threshold
+
+
+def wilson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    """
+    Wilson score interval for a proportion
+
+    Args:
+        successes: Number of successes
+        trials: Number of trials
+        confidence: Confidence level, e.g. 0.95
+
+    Returns:
+        tuple: (lower, upper) bounds, or (None, None) without trials
+    """
+    if trials <= 0:
+        return None, None
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    center = (rate + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    # The bounds reach 0 and 1 exactly when every trial failed or succeeded
+    lower = 0.0 if successes == 0 else max(0.0, center - margin)
+    upper = 1.0 if successes == trials else min(1.0, center + margin)
+    return lower, upper
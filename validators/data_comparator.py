@@ -1,9 +1,113 @@
 import datetime
 import copy
+from decimal import Decimal
+import numpy as np
 import pandas as pd
 
+from utils.comparison_plan import compile_plan, difference_masks as plan_difference_masks
+from utils.data_retriver import key_multiplicities, match_multiset, match_positions, row_fingerprints
+from utils.log_utils import get_logger
 
-def generate_data_comparison_report(schema1_data, schema2_data, schema1_name, schema2_name):
+logger = get_logger(__name__)
+
+
+def _value_kind(series):
+    """
+    Classify a column as number, boolean, timestamp or text for comparison
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "timestamp"
+    non_null = series.dropna()
+    if len(non_null) and isinstance(non_null.iloc[0], Decimal):
+        return "number"
+    return "text"
+
+
+def _display_value(value):
+    """
+    Format a value for the report the way it would appear as text
+    """
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value):
+        return "None"
+    return str(value)
+
+
+def _display_texts(series):
+    """
+    Format every value of a column as _display_value would
+
+    Datetime and categorical columns are formatted once per distinct value.
+    """
+    if series.dtype.kind == "M" or isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = pd.factorize(series)
+        # Code -1 marks a missing value and picks the trailing "None"
+        texts = np.array([_display_value(value) for value in uniques] + ["None"], dtype=object)
+        return texts[codes].tolist()
+    return ["None" if value is None else str(value) for value in _comparable_values(series)]
+
+
+def _display_column(series):
+    return pd.Series(_display_texts(series), index=series.index, dtype=object)
+
+
+def _comparable_values(series):
+    """
+    Return a column as an array of Python objects, with every kind of missing
+    value as None
+    """
+    values = series.to_numpy(dtype=object, copy=True)
+    values[series.isna().to_numpy()] = None
+    return values
+
+
+def _display_records(df, columns):
+    """Rows of a DataFrame as dicts of display text"""
+    texts = [_display_texts(df.iloc[:, i]) for i in range(len(columns))]
+    return [dict(zip(columns, row)) for row in zip(*texts)]
+
+
+def _difference_masks(df1, df2, columns):
+    """
+    Flag, per column, the aligned row pairs whose text differs
+
+    Args:
+        df1: Matched source rows
+        df2: Destination rows aligned with df1
+        columns: Columns to compare
+
+    Returns:
+        dict: Column name to a boolean array, True where the pair differs
+    """
+    return {
+        col: np.asarray(_comparable_values(df1[col]) != _comparable_values(df2[col]), dtype=bool)
+        for col in columns
+    }
+
+
+def _duplicate_keys(source_keys, dest_keys):
+    """
+    Keys held by more than one row on either side, with their row counts
+
+    Returns:
+        tuple: (detail dict per duplicate key, surplus source rows, surplus
+               destination rows), a surplus row being any past the first
+               with its key
+    """
+    keys, source_counts, dest_counts = key_multiplicities(source_keys, dest_keys)
+    duplicate = (source_counts > 1) | (dest_counts > 1)
+    details = [
+        {"key": _display_value(key), "source_rows": int(source_count), "destination_rows": int(dest_count)}
+        for key, source_count, dest_count in zip(keys[duplicate], source_counts[duplicate], dest_counts[duplicate])
+    ]
+    return details, int(np.maximum(source_counts - 1, 0).sum()), int(np.maximum(dest_counts - 1, 0).sum())
+
+
+def generate_data_comparison_report(schema1_data, schema2_data, schema1_name, schema2_name, multiset=False,
+                                    rules=None):
     """
     Generate a data comparison report between two schemas
 
@@ -12,6 +116,14 @@ def generate_data_comparison_report(schema1_data, schema2_data, schema1_name, sc
         schema2_data (dict): Dictionary of DataFrames for schema 2
         schema1_name (str): Name of schema 1
         schema2_name (str): Name of schema 2
+        multiset (bool): Compare rows as multisets of (key, row) pairs and
+                         report keys held by several rows, instead of
+                         matching every source row to the first destination
+                         row with its key
+        rules (dict): Type-aware comparison rules from comparison_rules;
+                      each table is then compared by a plan compiled from
+                      its columns, with numeric tolerances, timestamps in
+                      UTC and text trim and case rules
 
     Returns:
         dict: Data comparison report
@@ -48,15 +160,23 @@ def generate_data_comparison_report(schema1_data, schema2_data, schema1_name, sc
         df1_columns = list(df1.columns)
         df2_columns = list(df2.columns)
 
-        # Debug print
-        print(f"Comparing table {table} with columns:")
-        print(f"  Source: {df1_columns}")
-        print(f"  Destination: {df2_columns}")
+        logger.debug("Comparing table %s with columns: source %s, destination %s", table, df1_columns, df2_columns)
 
-        # Convert all columns to string for comparison
-        for df in [df1, df2]:
-            for col in df.columns:
-                df[col] = df[col].astype(str)
+        if rules is not None:
+            # Compare typed values by the plan where both sides hold the same
+            # kind of data, and fall back to their text form where they don't.
+            # Missing values stay missing, so the plan sees the text of the values alone
+            for col in set(df1_columns) & set(df2_columns):
+                if _value_kind(df1[col]) != _value_kind(df2[col]):
+                    df1[col] = _display_column(df1[col]).where(df1[col].notna(), None)
+                    df2[col] = _display_column(df2[col]).where(df2[col].notna(), None)
+            plan = compile_plan(df1, df2, rules)
+        else:
+            # Compare every value as text
+            for df in (df1, df2):
+                for i in range(df.shape[1]):
+                    df.isetitem(i, _display_column(df.iloc[:, i]))
+            plan = None
 
         # Create comparison result
         table_result = {
@@ -86,63 +206,80 @@ def generate_data_comparison_report(schema1_data, schema2_data, schema1_name, sc
         # Identify key column (assume first column is the key)
         key_column = df1_columns[0]
 
-        # Convert DataFrames to records for easier comparison
-        df1_records = df1.to_dict('records')
-        df2_records = df2.to_dict('records')
-
-        # Dictionary to track df2 rows that have been matched
-        df2_matched_indices = set()
-
-        # Compare each row in df1 with rows in df2
-        for row1 in df1_records:
-            row1_key = row1[key_column]
-            matching_rows_in_df2 = [
-                (i, row2) for i, row2 in enumerate(df2_records)
-                if row2[key_column] == row1_key
-            ]
-
-            if matching_rows_in_df2:
-                # Found at least one row with matching key
-                idx, row2 = matching_rows_in_df2[0]
-                df2_matched_indices.add(idx)
-
-                # Check if the rows are identical
-                differences = {}
-                for col in set(df1_columns) & set(df2_columns):
-                    if row1[col] != row2[col]:
-                        differences[col] = {
-                            "source": row1[col],
-                            "destination": row2[col]
-                        }
-
-                if not differences:
-                    # Exact match
-                    table_result["summary"]["matching_rows"] += 1
-                    table_result["details"]["matching_rows"].append(row1)
-                else:
-                    # Same key but different values
-                    table_result["summary"]["different_rows"] += 1
-                    table_result["details"]["different_rows"].append({
-                        "source_row": row1,
-                        "destination_row": row2,
-                        "differences": differences
-                    })
-                    table_result["success"] = False
-                    report["summary"]["all_matched"] = False
-            else:
-                # Row in df1 not found in df2
-                table_result["summary"]["missing_rows"] += 1
-                table_result["details"]["missing_rows"].append(row1)
-                table_result["success"] = False
-                report["summary"]["all_matched"] = False
-
-        # Find rows in df2 that weren't matched
-        for i, row2 in enumerate(df2_records):
-            if i not in df2_matched_indices:
-                table_result["summary"]["extra_rows"] += 1
-                table_result["details"]["extra_rows"].append(row2)
-                table_result["success"] = False
-                report["summary"]["all_matched"] = False
+        # Match every source row to the first destination row with the same
+        # key in one hash lookup, then compare the matched pairs column by column.
+        # As multisets, equal rows sharing a key pair up first and the rest of
+        # the key's rows pair up in order, leaving any surplus unmatched
+        common_columns = [col for col in df1_columns if col in df2.columns]
+        if key_column in df2.columns and multiset:
+            dest_positions, _ = match_multiset(df1[key_column], df2[key_column],
+                                               row_fingerprints(df1, common_columns),
+                                               row_fingerprints(df2, common_columns), match_missing=True)
+        elif key_column in df2.columns:
+            dest_positions = match_positions(df1[key_column], df2[key_column],
+                                             pair_duplicates=False, match_missing=True)
+        else:
+            dest_positions = np.full(len(df1), -1, dtype=np.intp)
+
+        matched = dest_positions >= 0
+        source_matched = np.flatnonzero(matched)
+        dest_matched = dest_positions[matched]
+        if plan is not None:
+            difference_masks = plan_difference_masks(plan, df1.iloc[source_matched], df2.iloc[dest_matched],
+                                                     common_columns)
+        else:
+            difference_masks = _difference_masks(df1.iloc[source_matched], df2.iloc[dest_matched], common_columns)
+        any_difference = np.zeros(len(source_matched), dtype=bool)
+        for mask in difference_masks.values():
+            any_difference |= mask
+
+        extra = np.ones(len(df2), dtype=bool)
+        extra[dest_matched] = False
+        missing_positions = np.flatnonzero(~matched)
+        extra_positions = np.flatnonzero(extra)
+
+        # Destination text is only built for the rows that appear in the
+        # report: the differing rows in source order, then the extra rows
+        source_rows = _display_records(df1, df1_columns)
+        dest_display_rows = _display_records(
+            df2.iloc[np.concatenate([dest_matched[any_difference], extra_positions])], df2_columns)
+        matching_details = []
+        different_details = []
+        different_rows_seen = 0
+        for i, source_position in enumerate(source_matched):
+            if not any_difference[i]:
+                matching_details.append(source_rows[source_position])
+                continue
+            row1 = source_rows[source_position]
+            row2 = dest_display_rows[different_rows_seen]
+            different_rows_seen += 1
+            different_details.append({
+                "source_row": row1,
+                "destination_row": row2,
+                "differences": {
+                    col: {"source": row1[col], "destination": row2[col]}
+                    for col in common_columns if difference_masks[col][i]
+                }
+            })
+
+        table_result["summary"]["matching_rows"] = len(matching_details)
+        table_result["summary"]["different_rows"] = len(different_details)
+        table_result["summary"]["missing_rows"] = len(missing_positions)
+        table_result["summary"]["extra_rows"] = len(extra_positions)
+        table_result["details"]["matching_rows"] = matching_details
+        table_result["details"]["different_rows"] = different_details
+        table_result["details"]["missing_rows"] = [source_rows[i] for i in missing_positions]
+        table_result["details"]["extra_rows"] = dest_display_rows[different_rows_seen:]
+        if multiset:
+            dest_keys = df2[key_column] if key_column in df2.columns else pd.Series([], dtype=object)
+            duplicate_details, source_surplus, dest_surplus = _duplicate_keys(df1[key_column], dest_keys)
+            table_result["summary"]["duplicate_keys"] = len(duplicate_details)
+            table_result["summary"]["duplicate_source_rows"] = source_surplus
+            table_result["summary"]["duplicate_destination_rows"] = dest_surplus
+            table_result["details"]["duplicate_keys"] = duplicate_details
+        if different_details or len(missing_positions) or len(extra_positions):
+            table_result["success"] = False
+            report["summary"]["all_matched"] = False
 
         # Add table result to report
         report["table_comparisons"][table] = table_result
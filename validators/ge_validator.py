@@ -34,12 +34,17 @@ def create_data_expectations(df, table_name, context):
         if column not in ["__schema__", "__table__"]:
             batch.expect_column_to_exist(column)
 
-            # Check data type based on first non-null value
+            # Check data type based on the column dtype and first non-null value
             non_null_values = df[column].dropna()
             if len(non_null_values) > 0:
                 first_value = non_null_values.iloc[0]
 
-                if isinstance(first_value, (int, float)):
+                if pd.api.types.is_bool_dtype(df[column]):
+                    batch.expect_column_values_to_be_in_type_list(
+                        column,
+                        ["bool", "boolean", "BOOLEAN"]
+                    )
+                elif pd.api.types.is_numeric_dtype(df[column]) or isinstance(first_value, (int, float)):
                     batch.expect_column_values_to_be_in_type_list(
                         column,
                         ["int", "float", "INTEGER", "FLOAT", "NUMERIC", "int64", "float64"]
@@ -54,7 +59,7 @@ def create_data_expectations(df, table_name, context):
                     else:
                         batch.expect_column_values_to_be_in_type_list(
                             column,
-                            ["str", "STRING", "TEXT", "VARCHAR", "object"]
+                            ["str", "STRING", "TEXT", "VARCHAR", "object", "category"]
                         )
 
     # Save the expectation suite